@@ -1,18 +1,20 @@
 
 # python modules
 import json
-import time
+from concurrent.futures import Future
 import rlp
 
 # uip modules
 from uiputils.chain_dns import ChainDNS
 from uiputils.uiptypes.attestation import Attestation
-from uiputils.errors import VerificationError
+from uiputils.uiptools.attestation_verifier import AttestationVerifier
+from uiputils.uiptools.action_batcher import ActionBatcher, ANCHOR_STATE, check_anchored
+from uiputils.errors import VerificationError, Mismatch
 from uiputils.transaction import StateType
 from uiputils.contract.wrapped_contract_function import ContractFunctionClient
 
 # eth modules
-from uiputils.ethtools import JsonRPC
+from uiputils.ethtools import JsonRPC, ReceiptWatcher, UnlockManager, LocalSigner, SignatureVerifier
 
 # ethereum modules
 from hexbytes import HexBytes
@@ -22,7 +24,7 @@ from eth_hash.auto import keccak
 from py_nsbcli.system_action import SystemAction, Action
 
 # config
-from uiputils.config import HTTP_HEADER, action_using_flag
+from uiputils.config import HTTP_HEADER, action_using_flag, nsb_action_batching
 
 from uiputils.loggers import console_logger
 
@@ -36,6 +38,8 @@ class DApp:
         self.info = {}
         self.session_event = {}
         self.name = user_info['name']
+        # domain -> ActionBatcher, used if nsb_action_batching
+        self.action_batchers = {}
 
         if 'accounts' not in user_info:
             if 'domain' not in user_info:
@@ -50,6 +54,7 @@ class DApp:
             }
             if 'passphrase' in user_info:
                 self.info[chain_host]['password'] = user_info['passphrase']
+            self.info[chain_host]['signer'] = DApp.load_signer(user_info, self.info[chain_host])
             self.default_domain = user_info['domain']
         else:
             if not hasattr(user_info, '__len__') or len(user_info['accounts']) == 0:
@@ -67,8 +72,20 @@ class DApp:
                 }
                 if 'passphrase' in infomation:
                     self.info[infomation['domain']]['password'] = infomation['passphrase']
+                self.info[chain_host]['signer'] = DApp.load_signer(infomation, self.info[chain_host])
             self.default_domain = user_info['accounts'][0]['domain']
 
+    @staticmethod
+    def load_signer(account_info, host_info):
+        # the LocalSigner of an Ethereum account with {'signer': 'local', 'keystore': path} in its
+        # account_info, None if the account signs by eth_sign on the node
+        if account_info.get('signer', 'node') != 'local':
+            return None
+        signer = LocalSigner.load(account_info['keystore'], host_info['password'])
+        if signer.address.lower() != host_info['address'].lower():
+            raise Mismatch("keystore " + account_info['keystore'] + " is not of account " + host_info['address'])
+        return signer
+
     def unlockself(self, host_name=None):
         """
         assuming self.address is on Ethereum
@@ -83,10 +100,8 @@ class DApp:
         if host_info['chain_type'] == 'Tendermint':
             return
         elif host_info['chain_type'] == 'Ethereum':
-            unlock = JsonRPC.personal_unlock_account(host_info['address'], host_info['password'], 20)
-            response = JsonRPC.send(unlock, HTTP_HEADER, host_info['host'])
-            if not response['result']:
-                raise ValueError("unlock failed. wrong password?")
+            # only sends personal_unlockAccount if the last unlock is about to lapse
+            UnlockManager.ensure(host_info['host'], host_info['address'], host_info['password'])
         else:
             raise TypeError("unsupported chain-type: ", + host_info['chain_type'])
 
@@ -109,9 +124,13 @@ class DApp:
                 msg = bytes.fromhex(msg)
             return host_info['password'].sign(msg)
         elif host_info['chain_type'] == 'Ethereum':
-            self.unlockself(host_name)
+            if host_info['signer'] is not None:
+                return host_info['signer'].sign(msg)
             sign_json = JsonRPC.eth_sign(host_info['address'], msg)
-            return JsonRPC.send(sign_json, HTTP_HEADER, host_info['host'])['result']
+            return UnlockManager.run(
+                host_info['host'], host_info['address'], host_info['password'],
+                JsonRPC.send, sign_json, HTTP_HEADER, host_info['host']
+            )['result']
         else:
             raise TypeError("unsupported chain-type: ", + host_info['chain_type'])
 
@@ -137,25 +156,18 @@ class DApp:
         :return: None
         """
         if passphrase is None:
-            passphrase = self.info[trans.chain_host]
+            passphrase = self.info[trans.chain_host]['password']
         if trans.chain_type == 'Ethereum':
-            unlock = JsonRPC.personal_unlock_account(self.info[trans.chain_host]['address'], passphrase, 20)
-            tx_response = JsonRPC.send(unlock, HTTP_HEADER, trans.chain_host)
-            print(json.dumps(tx_response, sort_keys=True, indent=4, separators=(', ', ': ')))
-
             packet_transaction = JsonRPC.eth_send_transaction(trans.jsonize())
-            tx_response = JsonRPC.send(packet_transaction, HTTP_HEADER, trans.chain_host)
+            tx_response = UnlockManager.run(
+                trans.chain_host, self.info[trans.chain_host]['address'], passphrase,
+                JsonRPC.send, packet_transaction, HTTP_HEADER, trans.chain_host
+            )
             print(json.dumps(tx_response, sort_keys=True, indent=4, separators=(', ', ': ')))
 
             tx_hash = tx_response['result']
-            query = JsonRPC.eth_get_transaction_receipt(tx_hash)
-            while True:
-                tx_response = JsonRPC.send(query, HTTP_HEADER, trans.chain_host)
-                if tx_response['result'] is None:
-                    print("transacting")
-                    time.sleep(2)
-                    continue
-                break
+            print("transacting")
+            tx_response = ReceiptWatcher.of(trans.chain_host).wait(tx_hash)
             print(json.dumps(tx_response, sort_keys=True, indent=4, separators=(', ', ': ')))
         else:
             raise TypeError("unsupported chain-type: ", + trans.chain_type)
@@ -220,7 +232,8 @@ class DApp:
                 'nsb': "PLACEHODER"
             }
 
-    def receive(self, rlped_atte, session_id, tid, aid, host_name=None) -> Attestation:
+    def receive(self, rlped_atte, session_id, tid, aid, host_name=None, proof=None) -> Attestation:
+        # proof: the InclusionProof of the attestation, if it was anchored in a batch
 
         if host_name is None:
             host_name = self.default_domain
@@ -239,8 +252,15 @@ class DApp:
             # )
             sys_act = SystemAction(host_info['host'])
 
+            # every signature of the chain must be valid
+            AttestationVerifier.default().check(rlped_atte)
             atte = Attestation(rlped_atte)
-            print(sys_act.get_action(host_info['password'], bytes.fromhex("123456"), tid, aid))
+            if proof is not None:
+                check_anchored(atte, proof, sys_act.get_action(
+                    host_info['password'], bytes.fromhex("123456"), proof.window, ANCHOR_STATE.value
+                ))
+            else:
+                print(sys_act.get_action(host_info['password'], bytes.fromhex("123456"), tid, aid))
             # if not nsb.validate_action(msghash=atte.pre_hash, signature=atte.signatures[-1][0]):
             #     raise VerificationError("this action is not on nsb")
 
@@ -268,10 +288,7 @@ class DApp:
         if host_name is None:
             host_name = self.default_domain
         content_list = [
-            json.dumps(
-                onchain_tx,
-                sort_keys=True
-            ).encode(ENC),
+            Attestation.encode_transaction(onchain_tx),
             HexBytes(state.value),
             HexBytes(session_index),
             HexBytes(tx_index)
@@ -290,7 +307,9 @@ class DApp:
             atte: Attestation,
             tx_index: int, state: StateType,
             host_name: str = None
-    ) -> ContractFunctionClient:
+    ) -> Future:
+        # return a Future of the InclusionProof of atte if the attestations are anchored in batches,
+        # of None if atte is added as an action of its own
         if host_name is None:
             host_name = self.default_domain
         host_info = self.info[host_name]
@@ -307,16 +326,22 @@ class DApp:
             '    atte: ({4}, {5})\n'
             ']'.format(
                 self.name, self.session_event[session_index]['isc'], tx_index, state.value,
-                HexBytes(atte.pre_hash).hex(), atte.signatures[-1][0].to_hex()
+                HexBytes(atte.pre_hash).hex(), atte.signature(-1)[0].to_hex()
             )
         )
+        if nsb_action_batching:
+            # resolved to the InclusionProof of atte once its window is anchored
+            return self.anchor_batcher(host_name).add_attestation(atte)
         self.unlockself(host_name)
         sys_act = SystemAction(host_info['host'])
         sys_act.add_action(host_info['password'], Action(
             bytes.fromhex("123456"), tx_index, state.value,
             action_using_flag[host_info['chain_type']].value, HexBytes(atte.pre_hash),
-            atte.signatures[-1][0].bytes()
+            atte.signature(-1)[0].bytes()
         ))
+        added = Future()
+        added.set_result(None)
+        return added
         # return nsb.add_action_proposal(
         #     self.session_event[session_index]['isc'],
         #     tx_index,
@@ -325,6 +350,33 @@ class DApp:
         #     atte.signatures[-1][0].to_hex()
         # )
 
+    def anchor_batcher(self, host_name: str = None) -> ActionBatcher:
+        if host_name is None:
+            host_name = self.default_domain
+        domain = self.info[host_name]['domain']
+        if domain not in self.action_batchers:
+            self.action_batchers[domain] = ActionBatcher(
+                lambda root, window: self.send_anchor(root, window, domain),
+                HexBytes(self.info[host_name]['address'])
+            )
+        return self.action_batchers[domain]
+
+    def send_anchor(self, root: bytes, window: int, host_name: str = None):
+        # one action for the Merkle root of a window of attestations
+        if host_name is None:
+            host_name = self.default_domain
+        host_info = self.info[host_name]
+        console_logger.info('dapp ({0}) anchoring window {1}, root: {2}'.format(
+            self.name, window, HexBytes(root).hex()
+        ))
+        self.unlockself(host_name)
+        sys_act = SystemAction(host_info['host'])
+        sys_act.add_action(host_info['password'], Action(
+            bytes.fromhex("123456"), window, ANCHOR_STATE.value,
+            action_using_flag[host_info['chain_type']].value, root,
+            SignatureVerifier.init_signature(self.sign(HexBytes(root).hex(), host_name)).bytes()
+        ))
+
 # aborted code
 # user ack:
 # from hexbytes import HexBytes
@@ -1,7 +1,6 @@
 
 
 from functools import partial
-import time
 
 from eth_hash.auto import keccak
 from eth_utils import to_checksum_address, to_normalized_address, to_canonical_address
@@ -10,7 +9,7 @@ from web3 import Web3
 
 from uiputils.uiptools.cast import JsonRlpize
 from uiputils.contract.eth_contract import EthContract
-from uiputils.ethtools import AbiEncoder, FileLoad, JsonRPC
+from uiputils.ethtools import AbiEncoder, FileLoad, JsonRPC, NonceManager
 from uiputils.transaction import StateType
 from uiputils.uiptypes import Attestation
 from uiputils.errors import Missing
@@ -156,7 +155,9 @@ class EthInsuranceSmartContract(InsuranceSmartContract):
     def make_contract(owners, signature, rlped_txs, tx_count, ves, bytescode=None, bin_dir=isc_bin_dir):
         try:
             rlped_txs = HexBytes(rlped_txs)
-            encoded_data = AbiEncoder.encodes(
+            encoded_data = AbiEncoder.compile(
+                ['address[]', 'uint256[]', 'bytes', 'bytes', 'bytes32', 'uint256']
+            ).encode_hex(
                 [
                     owners,
                     [0, 0, 0],
@@ -164,46 +165,38 @@ class EthInsuranceSmartContract(InsuranceSmartContract):
                     signature,
                     keccak(ETHSIGN_HEADER + b'\x36\x35' + HexBytes(signature)),
                     tx_count
-                ],
-                ['address[]', 'uint256[]', 'bytes', 'bytes', 'bytes32', 'uint256']
+                ]
             )
             if bytescode is None:
                 bytescode = FileLoad.getbytecode(bin_dir)
 
             ves.unlockself()
-            tx_json = JsonRPC.eth_send_transaction({
+            # by eth_sendRawTransaction if the account of the ves is kept by a NonceManager
+            tx_hash = NonceManager.send_transaction(ves.chain_host, {
                 'from': ves.address,
                 'data': bytescode.decode(ENC) + encoded_data,
                 'gas': hex(8000000)
             })
-            # print(tx_json)
-            response = JsonRPC.send(tx_json, rpc_host=ves.chain_host)
-            rp_json = JsonRPC.eth_get_transaction_receipt(response['result'])
         except Exception as e:
             isc_log.debug('ISCBulidError: {}'.format(str(e)))
             raise e
-        while True:
-            try:
-
-                response = JsonRPC.send(rp_json, rpc_host=ves.chain_host)
-                if response['result'] is None:
-                    console_logger.info("Contract is deploying, please stand by")
-                    time.sleep(2)
-                    continue
-                console_logger.info("got Transaction_result {}".format(response['result']))
+        try:
+            console_logger.info("Contract is deploying, please stand by")
+            response = NonceManager.wait_receipt(ves.chain_host, tx_hash)
+            console_logger.info("got Transaction_result {}".format(response['result']))
 
-                block_number = response['result']['blockNumber']
-                contract_addr = response['result']['contractAddress']
+            block_number = response['result']['blockNumber']
+            contract_addr = response['result']['contractAddress']
 
-                cd_json = JsonRPC.eth_get_code(contract_addr, block_number)
-                response = JsonRPC.send(cd_json, rpc_host=ves.chain_host)
-                if response['result'] == '0x':
-                    raise IndexError("Contract deployment failed")
+            cd_json = JsonRPC.eth_get_code(contract_addr, block_number)
+            response = JsonRPC.send(cd_json, rpc_host=ves.chain_host)
+            if response['result'] == '0x':
+                raise IndexError("Contract deployment failed")
 
-                return contract_addr
-            except Exception as e:
-                isc_log.debug('ISCBulidError: {exec}'.format(exec=str(e)), extra={"addr": ""})
-                raise e
+            return contract_addr
+        except Exception as e:
+            isc_log.debug('ISCBulidError: {exec}'.format(exec=str(e)), extra={"addr": ""})
+            raise e
 
     def update_tx_info(
             self,
@@ -258,7 +251,7 @@ class EthInsuranceSmartContract(InsuranceSmartContract):
         if tx is None:
             tx = self.tx
         console_logger.info('isc({0}) claiming:\n Attestation: {1},\n tid:{2},\n state: {3}'.format(
-            self.address, atte.__dict__, tid, state
+            self.address, atte.to_dict(), tid, state
         ))
         print(atte, "is not verified")
         if state == StateType.opened:
@@ -322,7 +315,7 @@ class EthInsuranceSmartContract(InsuranceSmartContract):
         return self.handle.func('getResult', tid)
 
     def get_transaction_info(self, tid):
-        ret = self.handle.func('getTransactionInfo', tid)
+        ret = self.handle.abifunc('getTransactionInfo', tid)
         console_logger.info('geted transaction information(index: {0}) {1}'.format(tid, ret))
         ret[4] = JsonRlpize.unserialize(ret[4])
         return ret
@@ -333,9 +326,11 @@ class EthInsuranceSmartContract(InsuranceSmartContract):
     def vesack(self):
         return self.handle.func('vesack')
 
-    def freeze_info(self, idx, tx=None):
+    def freeze_info(self, idx, tx=None, lazy=False):
         if tx is None:
             tx = self.tx
+        if lazy:
+            return self.handle.lazyfunct('freezeInfo', tx, idx)
         return self.handle.funct('freezeInfo', tx, idx)
 
 
@@ -21,9 +21,13 @@ from uiputils.ethtools import(
     Prover,
     JsonRPC,
     LocationTransLator,
-    SignatureVerifier
+    SignatureVerifier,
+    SelectorRegistry
 )
 
+# config
+from uiputils.config import nsb_abi_dir
+
 # constant
 SLOT_WAITING_QUEUE = 0
 SLOT_VOTEDPOINTER = 5
@@ -31,13 +35,14 @@ SLOT_MERKLEPROOFTREE = 6
 
 
 class EthLightNetStatusBlockChain:
+    selectors = SelectorRegistry.load(nsb_abi_dir)
     Function_Sign = {
-        'add_transaction_proposal':  "0x3aadafba",
-        'add_action_proposal':       "0x5959c982",
-        'add_merkleproof_proposal':  "0x3e91d71e",
-        'get_action':                "0xdce9f070",
-        'is_active_isc':             "0x5640ee94",
-        'valid_action_or_not':       "0xfd1d8671"
+        'add_transaction_proposal':  selectors.selector('addTransactionProposal'),
+        'add_action_proposal':       selectors.selector('addActionProposal'),
+        'add_merkleproof_proposal':  selectors.selector('addMerkleProofProposal'),
+        'get_action':                selectors.selector('getAction'),
+        'is_active_isc':             selectors.selector('activeISC'),
+        'valid_action_or_not':       selectors.selector('validActionorNot')
     }
 
     def __init__(
@@ -183,6 +188,7 @@ class EthNetStatusBlockchain:
         # , nsb_db_addr):
 
         self.handle = EthContract(host, nsb_addr, nsb_abi_dir, nsb_bytecode_dir, timeout=timeout)
+        self.host = host
         self.web3 = self.handle.web3
         self.address = self.handle.address
         self.owner = Web3.toChecksumAddress(owner_addr)
@@ -234,8 +240,21 @@ class EthNetStatusBlockchain:
         # return Queue[idx]
         return self.web3.eth.getStorageAt(self.address, LocationTransLator.queueloc(idx))
 
+    def get_queue_contents(self, indices):
+        # return [Queue[idx] for idx in indices] by one batched round-trip
+        responses = JsonRPC.send_batch([
+            JsonRPC.eth_get_storage_at(self.address, HexBytes(LocationTransLator.queueloc(idx)).hex(), "latest")
+            for idx in indices
+        ], rpc_host=self.host)
+        contents = []
+        for response in responses:
+            if isinstance(response, Exception):
+                raise response
+            contents.append(HexBytes(response['result']))
+        return contents
+
     def get_merkle_proof_by_hash(self, keccakhash):
-        merkleproof = MerkleProof(*self.handle.func('getMerkleProofByHash', keccakhash))
+        merkleproof = MerkleProof(*self.handle.abifunc('getMerkleProofByHash', keccakhash))
         print("    block_address", HexBytes(merkleproof.blockaddr).hex())
         print("    storageHash", HexBytes(merkleproof.storagehash).hex())
         print("    key", HexBytes(merkleproof.key).hex())
@@ -243,7 +262,7 @@ class EthNetStatusBlockchain:
         return merkleproof
 
     def get_merkle_proof_by_pointer(self, idx):
-        merkleproof = MerkleProof(*self.handle.func('getMerkleProofByPointer', idx))
+        merkleproof = MerkleProof(*self.handle.abifunc('getMerkleProofByPointer', idx))
         print("    block_address", HexBytes(merkleproof.blockaddr).hex())
         print("    storageHash", HexBytes(merkleproof.storagehash).hex())
         print("    key", HexBytes(merkleproof.key).hex())
@@ -253,14 +272,14 @@ class EthNetStatusBlockchain:
     def watch_proof_pool(self):
         queue_left, queue_right = bytestoint(self.get_queue_l()), bytestoint(self.get_queue_r())
         print(queue_left, queue_right)
-        for idx in range(queue_left, queue_right):
+        indices = range(queue_left, queue_right)
+        for idx, keccakhash in zip(indices, self.get_queue_contents(indices)):
             print("idx: ", idx)
-            keccakhash = self.get_queue_content(idx)
             print("    hash: ", HexBytes(keccakhash).hex())
             if bytestoint(keccakhash) == 0:
                 continue
             if keccakhash not in self.pf_pool and not self.owner_voted(keccakhash):
-                self.pf_pool[keccakhash] = self.get_merkle_proof_by_hash(self.get_queue_content(idx))
+                self.pf_pool[keccakhash] = self.get_merkle_proof_by_hash(keccakhash)
 
     def prove_proofs(self):
         for keccakhash, merkleproof in self.pf_pool:
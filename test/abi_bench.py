@@ -0,0 +1,96 @@
+
+# python modules
+import os
+import time
+
+# eth modules
+from uiputils.ethtools import AbiEncoder, AbiDecoder
+
+try:
+    from eth_abi import decode as eth_abi_decode
+except ImportError:
+    try:
+        from eth_abi import decode_abi as eth_abi_decode
+    except ImportError:
+        eth_abi_decode = None
+
+# the argument shapes of the NSB proposals and of the ISC constructor
+ADDRESS = "0x7019fa779024c0a0eac1d8475733eefe10a49f3b"
+ENCODE_CASES = (
+    ('add_transaction_proposal', ['address', 'uint'], [ADDRESS, 3]),
+    ('add_merkleproof_proposal', ['address', 'uint', 'string', 'bytes32', 'bytes32', 'bytes32'], [
+        ADDRESS, 1, "0x8a6b0a4d71d7a8e3e0bcf2aa2ac9b5b38d1e0a71",
+        "0x" + os.urandom(32).hex(), "0x" + os.urandom(32).hex(), "0x" + os.urandom(32).hex()
+    ]),
+    ('add_action_proposal', ['address', 'uint', 'uint', 'bytes32', 'bytes'], [
+        ADDRESS, 1, 2, "0x" + os.urandom(32).hex(), "0x" + os.urandom(65).hex()
+    ]),
+    ('isc constructor', ['address[]', 'uint256[]', 'bytes', 'bytes', 'bytes32', 'uint256'], [
+        [ADDRESS] * 3, [0, 0, 0], "0x" + os.urandom(600).hex(), "0x" + os.urandom(65).hex(),
+        "0x" + os.urandom(32).hex(), 3
+    ]),
+)
+# the return values of the ISC and NSB getters, and the arrays, whether AbiDecoder.decodes can decode them
+DECODE_CASES = (
+    ('getTransactionInfo', ['address', 'address', 'uint256', 'uint256', 'bytes'], [
+        ADDRESS, ADDRESS, 1, 2, "0x" + os.urandom(300).hex()
+    ], True),
+    ('getMerkleProofByHash', ['string', 'bytes32', 'bytes32', 'bytes32'], [
+        "0x8a6b0a4d71d7a8e3e0bcf2aa2ac9b5b38d1e0a71",
+        "0x" + os.urandom(32).hex(), "0x" + os.urandom(32).hex(), "0x" + os.urandom(32).hex()
+    ], True),
+    ('address[], uint256[]', ['address[]', 'uint256[]'], [[ADDRESS] * 8, list(range(8))], True),
+    ('string, uint256[2][]', ['string', 'uint256[2][]'], ["nsb", [[1, 2], [3, 4], [5, 6]]], False),
+)
+ROUNDS = 20000
+
+
+def timeit(function, *args):
+    beg = time.perf_counter()
+    for _ in range(ROUNDS):
+        function(*args)
+    return (time.perf_counter() - beg) / ROUNDS * 1e6
+
+
+def compiled_encodes(para_list, para_type_list):
+    return AbiEncoder.compile(para_type_list).encode_hex(para_list)
+
+
+def encoded_returns(ret_type_list, rets):
+    # the returned hex string of an eth_call, encoded by the compiled plan of the return types
+    return "0x" + AbiEncoder.compile(ret_type_list).encode_hex(rets)
+
+
+def compiled_decodes(raw_rets, ret_type_list):
+    return AbiDecoder.compile(ret_type_list).decode(raw_rets)
+
+
+def legacy_decodes(raw_rets, ret_type_list):
+    # AbiDecoder.decodes takes the hex string without prefix
+    return AbiDecoder.decodes(raw_rets[2:], ret_type_list)
+
+
+def eth_abi_decodes(raw_rets, ret_type_list):
+    return eth_abi_decode(ret_type_list, bytes.fromhex(raw_rets[2:]))
+
+
+if __name__ == '__main__':
+    print("encode                      AbiEncoder.encodes(us)   compiled(us)")
+    for name, types, args in ENCODE_CASES:
+        print("{0:26s}  {1:22.2f}  {2:13.2f}".format(
+            name, timeit(AbiEncoder.encodes, args, types), timeit(compiled_encodes, args, types)
+        ))
+
+    print()
+    if eth_abi_decode is None:
+        print("eth_abi is not installed, the eth_abi column is skipped")
+    print("decode                      AbiDecoder.decodes(us)   eth_abi(us)   compiled(us)")
+    for name, types, rets, legacy in DECODE_CASES:
+        raw = encoded_returns(types, rets)
+        columns = [
+            "{0:.2f}".format(timeit(legacy_decodes, raw, types)) if legacy else "-",
+            "{0:.2f}".format(timeit(eth_abi_decodes, raw, types)) if eth_abi_decode is not None else "-"
+        ]
+        print("{0:26s}  {1:>22s}  {2:>12s}  {3:13.2f}".format(
+            name, columns[0], columns[1], timeit(compiled_decodes, raw, types)
+        ))
@@ -0,0 +1,90 @@
+
+# python modules
+import os
+
+# ethereum modules
+import pytest
+from hexbytes import HexBytes
+
+# eth modules
+from uiputils.ethtools import AbiEncoder, AbiDecoder
+
+ADDRESS = "0x7019fa779024c0a0eac1d8475733eefe10a49f3b"
+# the return values of the ISC and NSB getters, which AbiDecoder.decodes decodes as well
+LEGACY_CASES = [
+    (['address', 'address', 'uint256', 'uint256', 'bytes'], [ADDRESS, ADDRESS, 1, 2, "0x" + os.urandom(300).hex()]),
+    (['string', 'bytes32', 'bytes32', 'bytes32'], [
+        "0x8a6b0a4d71d7a8e3e0bcf2aa2ac9b5b38d1e0a71",
+        "0x" + os.urandom(32).hex(), "0x" + os.urandom(32).hex(), "0x" + os.urandom(32).hex()
+    ]),
+    (['address[]', 'uint256[]'], [[ADDRESS] * 8, list(range(8))]),
+    (['int256', 'bool', 'uint8'], [-5, True, 255]),
+]
+# the shapes AbiDecoder.decodes can't decode
+CASES = LEGACY_CASES + [
+    (['string', 'uint256[2][]'], ["nsb", [[1, 2], [3, 4], [5, 6]]]),
+    (['string[]', 'bytes'], [["nsb", "", "isc"], "0x"]),
+    (['(address,uint256)', '(string,uint256[])'], [(ADDRESS, 7), ("nsb", [1, 2, 3])]),
+    (['(uint256,bytes32)[2]'], [[(1, b'\x01' * 32), (2, b'\x02' * 32)]]),
+]
+
+
+def encoded_returns(ret_type_list, rets):
+    # the returned hex string of an eth_call, by the compiled encoder
+    return "0x" + AbiEncoder.compile(ret_type_list).encode_hex(rets)
+
+
+def eth_abi_returns(eth_abi, ret_type_list, rets):
+    # the same by eth_abi, for the tuples the compiled encoder doesn't encode
+    encode = getattr(eth_abi, 'encode', None) or eth_abi.encode_abi
+    return "0x" + encode(ret_type_list, [
+        bytes.fromhex(ret[2:]) if ret_type == 'bytes' or ret_type[:5] == 'bytes' and ret_type[5:].isdigit() else ret
+        for ret_type, ret in zip(ret_type_list, rets)
+    ]).hex()
+
+
+def as_lists(value):
+    # eth_abi returns tuples for the arrays and lower case addresses
+    if isinstance(value, (list, tuple)):
+        return [as_lists(element) for element in value]
+    if isinstance(value, str) and len(value) == 42 and value[:2] == '0x':
+        return value.lower()
+    return value
+
+
+@pytest.mark.parametrize('types,rets', CASES)
+def test_compiled_plan_matches_eth_abi(types, rets):
+    eth_abi = pytest.importorskip('eth_abi')
+    decode = getattr(eth_abi, 'decode', None) or eth_abi.decode_abi
+    raw_rets = eth_abi_returns(eth_abi, types, rets)
+    plan = AbiDecoder.compile(types)
+    assert as_lists(plan.decode(raw_rets)) == as_lists(decode(types, bytes.fromhex(raw_rets[2:])))
+    # the hex string with or without prefix, and the bytes
+    assert plan.decode(raw_rets[2:]) == plan.decode(bytes.fromhex(raw_rets[2:])) == plan.decode(raw_rets)
+    # the plan is cached per type list
+    assert AbiDecoder.compile(list(types)) is plan
+
+
+@pytest.mark.parametrize('types,rets', LEGACY_CASES)
+def test_compiled_plan_matches_decodes(types, rets):
+    raw_rets = encoded_returns(types, rets)
+    legacy = AbiDecoder.decodes(raw_rets[2:], types)
+    for ret_type, compiled, ret in zip(types, AbiDecoder.compile(types).decode(raw_rets), legacy):
+        # decodes returns the addresses as integers and the strings as their hex encoding
+        if ret_type == 'address':
+            assert int(compiled, 16) == ret
+        elif ret_type == 'address[]':
+            assert [int(address, 16) for address in compiled] == ret
+        elif ret_type == 'string':
+            assert compiled == bytes.fromhex(ret.decode()).decode()
+        elif ret_type == 'bool':
+            assert compiled == ret
+        else:
+            assert (HexBytes(compiled) == HexBytes(ret)) if isinstance(ret, bytes) else (compiled == ret)
+
+
+@pytest.mark.parametrize('types', [['bytes'], ['uint256[]'], ['uint256', 'uint256']])
+def test_truncated_returns_are_refused(types):
+    raw_rets = "0x" + '%064x' % 32 + '%064x' % 3
+    with pytest.raises(OverflowError):
+        AbiDecoder.compile(types).decode(raw_rets[:-2] if types == ['uint256', 'uint256'] else raw_rets)
@@ -0,0 +1,82 @@
+
+# python modules
+import os
+
+# ethereum modules
+import pytest
+
+# uip modules
+from uiputils.errors import GenerationError, Mismatch
+
+# eth modules
+from uiputils.ethtools import AbiEncoder
+from uiputils.contract.wrapped_contract_function import ContractFunction, ContractFunctionClass
+
+ADDRESS = "0x7019fa779024c0a0eac1d8475733eefe10a49f3b"
+CASES = [
+    (['address', 'uint'], [ADDRESS, 3]),
+    (['uint8', 'uint256', 'int', 'int64', 'bool'], [255, '0x10', -1, -(2 ** 40), 1]),
+    (['bytes32', 'bytes1', 'byte'], ["0x" + os.urandom(32).hex(), "0xab", "0xcd"]),
+    (['bytes', 'uint'], ["0x" + os.urandom(65).hex(), 7]),
+    (['string'], [""]),
+    (['address[]', 'uint256[]', 'bytes', 'bytes', 'bytes32', 'uint256'], [
+        [ADDRESS] * 3, [0, 0, 0], "0x" + os.urandom(600).hex(), "0x" + os.urandom(65).hex(),
+        "0x" + os.urandom(32).hex(), 3
+    ]),
+    (['uint256[3]', 'address'], [[1, 2, 3], ADDRESS]),
+]
+
+
+def word(value):
+    return '%064x' % value
+
+
+@pytest.mark.parametrize('types,args', CASES)
+def test_compiled_plan_matches_encodes(types, args):
+    assert AbiEncoder.compile(types).encode_hex(args) == AbiEncoder.encodes(args, types)
+    # the plan is cached per type list
+    assert AbiEncoder.compile(list(types)) is AbiEncoder.compile(tuple(types))
+
+
+def test_known_encodings():
+    # the standard ABI encodings of a string and of a dynamic array of static arrays
+    assert AbiEncoder.compile(['uint', 'string']).encode_hex([1, "nsb"]) == \
+        word(1) + word(64) + word(3) + '6e7362' + '0' * 58
+    assert AbiEncoder.compile(['uint256[2][]']).encode_hex([[[1, 2], [3, 4]]]) == \
+        word(32) + word(2) + word(1) + word(2) + word(3) + word(4)
+
+
+@pytest.mark.parametrize('types,args', [
+    (['uint8'], [256]),
+    (['bytes32'], ["0xab"]),
+    (['uint256'], [-1]),
+])
+def test_compiled_plan_refuses_what_encodes_refuses(types, args):
+    with pytest.raises(Exception) as legacy:
+        AbiEncoder.encodes(args, types)
+    with pytest.raises(legacy.type):
+        AbiEncoder.compile(types).encode_hex(args)
+
+
+def test_arguments_count_mismatch():
+    with pytest.raises(Mismatch):
+        AbiEncoder.compile(['address', 'uint']).encode_hex([ADDRESS])
+
+
+def test_check_sig():
+    assert ContractFunctionClass.check_sig('0x12345678') == '0x12345678'
+    assert ContractFunctionClass.check_sig('12345678') == '0x12345678'
+    assert ContractFunctionClass.check_sig(b'\x12\x34\x56\x78') == '0x12345678'
+    assert ContractFunctionClass.check_sig(bytearray(b'\x12\x34\x56\x78')) == '0x12345678'
+    with pytest.raises(GenerationError):
+        ContractFunctionClass.check_sig('0x2345678')
+
+
+def test_signature_checked_when_the_function_runs():
+    # building the lazy function doesn't check the selector, nor hash the (unhashable) arguments
+    transact = ContractFunction.transact('http://127.0.0.1:8545', '0x2345678', [[1, 2]], ['uint256[]'], {})
+    call = ContractFunction.call('http://127.0.0.1:8545', '0x2345678', [[1, 2]], ['uint256[]'], {})
+    with pytest.raises(GenerationError):
+        transact()
+    with pytest.raises(GenerationError):
+        call()
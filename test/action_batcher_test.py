@@ -0,0 +1,96 @@
+
+# python modules
+import base64
+import json
+
+# ethereum modules
+import rlp
+import pytest
+from eth_hash.auto import keccak
+from hexbytes import HexBytes
+
+# uip modules
+from uiputils.errors import DecodeFail, VerificationError
+from uiputils.ethtools import LocalSigner
+from uiputils.uiptypes import InclusionProof
+from uiputils.uiptools.action_batcher import (
+    ActionBatcher, ANCHOR_STATE, attestation_leaf, verify_inclusion, window_id, check_anchored
+)
+
+POSTER = LocalSigner(b'\x46' * 32)
+OTHER = LocalSigner(b'\x47' * 32)
+
+
+def attestation(tid, signer=POSTER):
+    content = [b'{"tid": %d}' % tid, b'\x01', b'\x07', bytes([tid])]
+    sig = bytes.fromhex(signer.sign(keccak(rlp.encode([content, []])))[2:])
+    return rlp.encode([content, [[sig, signer.address.encode()]]])
+
+
+def get_action_response(root, window, signer=POSTER, aid=ANCHOR_STATE.value):
+    # the broadcast_tx_commit response of getAction, the action as SystemAction.add_action sent it
+    action = {
+        '1': base64.b64encode(bytes.fromhex("123456")).decode(),
+        '2': window,
+        '3': aid,
+        '4': 0,
+        '5': base64.b64encode(root).decode(),
+        '6': base64.b64encode(bytes.fromhex(signer.sign(root)[2:])).decode()
+    }
+    return {'result': {'deliver_tx': {'code': 0, 'data': base64.b64encode(json.dumps(action).encode()).decode()}}}
+
+
+def anchored(attestations, scope=HexBytes(POSTER.address)):
+    posted = []
+    batcher = ActionBatcher(lambda root, window: posted.append((root, window)), scope, size=len(attestations))
+    futures = [batcher.add_attestation(atte) for atte in attestations]
+    return [future.result(1) for future in futures], posted
+
+
+@pytest.mark.parametrize('count', [1, 2, 3, 5, 8])
+def test_inclusion_proofs(count):
+    attestations = [attestation(tid) for tid in range(count)]
+    proofs, posted = anchored(attestations)
+    assert posted == [(proofs[0].root, proofs[0].window)]
+    for atte, proof in zip(attestations, proofs):
+        assert verify_inclusion(attestation_leaf(atte), proof)
+    if count > 1:
+        assert not verify_inclusion(attestation_leaf(attestations[1]), proofs[0])
+        sibling, on_right = proofs[0].path[0]
+        forged = proofs[0]._replace(path=[(keccak(sibling), on_right)] + proofs[0].path[1:])
+        assert not verify_inclusion(attestation_leaf(attestations[0]), forged)
+
+
+def test_window_ids_are_scoped_by_poster():
+    root = keccak(b'root')
+    assert window_id(b'\x01' * 20, root) != window_id(b'\x02' * 20, root)
+    assert window_id(b'\x01' * 20, root) < 2 ** 63
+
+
+def test_check_anchored():
+    attestations = [attestation(tid) for tid in range(3)]
+    proofs, _ = anchored(attestations)
+    proof = proofs[1]
+    check_anchored(attestations[1], proof, get_action_response(proof.root, proof.window))
+
+    # another root anchored in the window
+    with pytest.raises(VerificationError):
+        check_anchored(attestations[1], proof, get_action_response(keccak(b'other'), proof.window))
+    # the root anchored by someone else
+    with pytest.raises(VerificationError):
+        check_anchored(attestations[1], proof, get_action_response(proof.root, proof.window, OTHER))
+    # the action of another window
+    with pytest.raises(VerificationError):
+        check_anchored(attestations[1], proof, get_action_response(proof.root, proof.window + 1))
+    # a proof made up for a root that was never anchored by the signer of the attestation
+    forged = InclusionProof(attestation_leaf(attestations[1]), attestation_leaf(attestations[1]), 0, [], 1)
+    with pytest.raises(VerificationError):
+        check_anchored(attestations[1], forged, get_action_response(forged.root, 1))
+
+
+def test_unexpected_response_is_refused():
+    attestations = [attestation(tid) for tid in range(2)]
+    proofs, _ = anchored(attestations)
+    for response in ({}, {'result': {'deliver_tx': {'data': None}}}, {'result': {'deliver_tx': {'data': 'bm90IGpzb24='}}}):
+        with pytest.raises(DecodeFail):
+            check_anchored(attestations[0], proofs[0], response)
@@ -0,0 +1,79 @@
+
+# python modules
+import os
+import json
+import time
+import rlp
+
+# ethereum modules
+from eth_hash.auto import keccak
+
+# uip modules
+from uiputils.uiptypes import Attestation
+
+# the signatures are random bytes, only the encoding and hashing are measured
+ADDRESS = "0x7019fa779024c0a0eac1d8475733eefe10a49f3b"
+CONTENT = [
+    json.dumps({"from": "0x12345678", "to": "0x87654321", "data": "0x" + "23" * 256}, sort_keys=True).encode('utf-8'),
+    b'\x01',
+    b'\x02',
+    b'\x03'
+]
+ROUNDS = 20
+
+
+def random_signature():
+    return os.urandom(64) + b'\x1b'
+
+
+def chain_of(signer_count):
+    return rlp.encode([CONTENT, [[random_signature(), ADDRESS.encode('utf-8')] for _ in range(signer_count)]])
+
+
+def quadratic_decode(rlped_atte):
+    # what the decoding cost before: every prefix is encoded again
+    content, signatures = rlp.decode(rlped_atte)
+    for idx in range(len(signatures)):
+        keccak(rlp.encode([content, signatures[:idx]]))
+    return keccak(rlp.encode([content, signatures]))
+
+
+def quadratic_append(signer_count):
+    # what the signing cost before: the whole attestation is encoded again to hash it before every append
+    content, signatures = rlp.decode(chain_of(1))
+    for _ in range(signer_count - 1):
+        keccak(rlp.encode([content, signatures]))
+        signatures.append([random_signature(), ADDRESS.encode('utf-8')])
+    return rlp.encode([content, signatures])
+
+
+def incremental_decode(rlped_atte):
+    return Attestation(rlped_atte).hash
+
+
+def incremental_append(signer_count):
+    atte = Attestation(chain_of(1))
+    rlped_atte = None
+    for _ in range(signer_count - 1):
+        rlped_atte = atte.sign_and_encode([random_signature(), ADDRESS])
+    return rlped_atte
+
+
+def timeit(function, *args):
+    beg = time.time()
+    for _ in range(ROUNDS):
+        function(*args)
+    return (time.time() - beg) / ROUNDS * 1000
+
+
+if __name__ == '__main__':
+    print("signers   decode(ms): before   after     append(ms): before   after")
+    for signers in (2, 4, 8, 16, 32, 64):
+        rlped = chain_of(signers)
+        print("{0:7d}   {1:19.3f} {2:7.3f}   {3:19.3f} {4:7.3f}".format(
+            signers,
+            timeit(quadratic_decode, rlped),
+            timeit(incremental_decode, rlped),
+            timeit(quadratic_append, signers),
+            timeit(incremental_append, signers)
+        ))
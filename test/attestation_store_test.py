@@ -0,0 +1,79 @@
+
+# python modules
+import os
+
+# ethereum modules
+import rlp
+import pytest
+from hexbytes import HexBytes
+
+# uip modules
+from uiputils.errors import InitializeError
+from uiputils.uiptypes import Attestation
+from uiputils.transaction import StateType
+from uiputils.uiptools.attestation_store import AttestationStore, segment_name
+
+
+def attestation(session_id, tid, state=StateType.opened):
+    content = [Attestation.encode_transaction({'tid': tid}), HexBytes(state.value), HexBytes(session_id), HexBytes(tid)]
+    return rlp.encode([content, [[b'\x01' * 65, b'0x7019fa779024c0a0eac1d8475733eefe10a49f3b']]])
+
+
+def test_put_and_get(tmp_path):
+    store = AttestationStore(str(tmp_path), commit_delay=0)
+    store.put(attestation(7, 1))
+    store.put(attestation(7, 2), session_id=11)
+    assert store.get(7, 1, StateType.opened) == attestation(7, 1)
+    # kept under the given session instead of the one of the content
+    assert store.get(11, 2, StateType.opened) == attestation(7, 2)
+    assert store.get(7, 2, StateType.opened) is None
+    assert (7, 1, StateType.opened) in store and len(store) == 2
+    store.close()
+
+
+def test_reopen_rebuilds_the_index(tmp_path):
+    store = AttestationStore(str(tmp_path), segment_size=200, commit_delay=0)
+    store.put_many([attestation(1, tid) for tid in range(10)])
+    assert store.stats()['segments'] > 1
+    store.close()
+
+    store = AttestationStore(str(tmp_path), segment_size=200, commit_delay=0)
+    assert len(store) == 10
+    assert store.session(1)[(3, StateType.opened)] == attestation(1, 3)
+    store.close()
+
+
+def test_torn_and_corrupted_tails_are_truncated(tmp_path):
+    store = AttestationStore(str(tmp_path), commit_delay=0)
+    store.put_many([attestation(1, 1), attestation(1, 2)])
+    store.close()
+    path = os.path.join(str(tmp_path), segment_name(0))
+    size = os.path.getsize(path)
+    with open(path, 'r+b') as segment:
+        # flip the last byte of the second record, its crc no longer matches
+        segment.seek(size - 1)
+        last = segment.read(1)
+        segment.seek(size - 1)
+        segment.write(bytes([last[0] ^ 0xff]))
+
+    store = AttestationStore(str(tmp_path), commit_delay=0)
+    assert store.get(1, 1, StateType.opened) == attestation(1, 1)
+    assert store.get(1, 2, StateType.opened) is None
+    # the writes go on after the valid records
+    store.put(attestation(1, 3))
+    store.close()
+    with open(path, 'ab') as segment:
+        # a record header cut by a crash
+        segment.write(b'UIPA\x00\x00')
+
+    store = AttestationStore(str(tmp_path), commit_delay=0)
+    assert sorted(store.session(1)) == [(1, StateType.opened), (3, StateType.opened)]
+    store.close()
+
+
+def test_directory_is_held_by_one_store(tmp_path):
+    store = AttestationStore(str(tmp_path), commit_delay=0)
+    with pytest.raises(InitializeError):
+        AttestationStore(str(tmp_path), commit_delay=0)
+    store.close()
+    AttestationStore(str(tmp_path), commit_delay=0).close()
@@ -0,0 +1,76 @@
+
+# ethereum modules
+import rlp
+import pytest
+from eth_hash.auto import keccak
+
+# uip modules
+from uiputils.errors import VerificationError
+from uiputils.ethtools import LocalSigner
+from uiputils.uiptools import attestation_verifier
+from uiputils.uiptools.attestation_verifier import AttestationVerifier, verify_signature
+
+SIGNER = LocalSigner(b'\x46' * 32)
+DIGEST = keccak(b'the content of an attestation')
+
+
+def eth_sign(digest):
+    return bytes.fromhex(SIGNER.sign(digest)[2:])
+
+
+def tampered(data: bytes):
+    return data[:10] + bytes([data[10] ^ 0x01]) + data[11:]
+
+
+def test_secp256k1_round_trip():
+    sig = eth_sign(DIGEST)
+    valid, recovered = verify_signature(DIGEST, sig, SIGNER.address)
+    assert valid and recovered == SIGNER.private_key.public_key.to_bytes()
+    # checked against the known key as well
+    assert verify_signature(DIGEST, sig, SIGNER.address, recovered) == (True, None)
+    # v in {0, 1}
+    assert verify_signature(DIGEST, sig[:64] + bytes([sig[64] - 27]), SIGNER.address)[0]
+
+
+def test_secp256k1_rejects_tampering():
+    sig = eth_sign(DIGEST)
+    assert not verify_signature(tampered(DIGEST), sig, SIGNER.address)[0]
+    assert not verify_signature(DIGEST, sig, '0x' + '11' * 20)[0]
+    assert not verify_signature(DIGEST, sig[:64], SIGNER.address)[0]
+    try:
+        valid, _ = verify_signature(DIGEST, tampered(sig), SIGNER.address)
+    except Exception:
+        valid = False
+    assert not valid
+
+
+def test_ed25519_round_trip():
+    signing = pytest.importorskip('nacl.signing')
+    key = signing.SigningKey(b'\x07' * 32)
+    identification = key.verify_key.encode().hex()
+    sig = key.sign(DIGEST).signature
+    assert verify_signature(DIGEST, sig, identification) == (True, None)
+    assert not verify_signature(tampered(DIGEST), sig, identification)[0]
+    assert not verify_signature(DIGEST, tampered(sig), identification)[0]
+
+
+def test_ed25519_without_pynacl(monkeypatch):
+    monkeypatch.setattr(attestation_verifier, 'VerifyKey', None)
+    monkeypatch.setattr(attestation_verifier, 'attestation_require_ed25519', False)
+    assert verify_signature(DIGEST, b'\x00' * 64, '11' * 32) == (True, None)
+    monkeypatch.setattr(attestation_verifier, 'attestation_require_ed25519', True)
+    with pytest.raises(VerificationError):
+        verify_signature(DIGEST, b'\x00' * 64, '11' * 32)
+
+
+def test_attestation_signature_chain():
+    content = [b'{"tid": 1}', b'\x01', b'\x07', b'\x01']
+    first = eth_sign(keccak(rlp.encode([content, []])))
+    signatures = [[first, SIGNER.address.encode()]]
+    second = eth_sign(keccak(rlp.encode([content, signatures])))
+    atte = rlp.encode([content, signatures + [[second, SIGNER.address.encode()]]])
+    verifier = AttestationVerifier(workers=1)
+    verifier.check(atte)
+    forged = rlp.encode([content, signatures + [[tampered(second), SIGNER.address.encode()]]])
+    with pytest.raises(VerificationError):
+        verifier.check(forged)
@@ -0,0 +1,83 @@
+
+# ethereum modules
+import rlp
+import pytest
+
+# uip modules
+from uiputils.errors import DecodeFail
+from uiputils.uiptypes import Attestation
+from uiputils.uiptypes.canonical import (
+    CANONICAL_VERSION, TAG_STRING, TAG_HEX, TAG_BYTES, TAG_POSITIVE, TAG_NEGATIVE, TAG_FLOAT, TAG_TRUE, TAG_FALSE,
+    TAG_NONE, TAG_LIST, TAG_DICT, canonical_encode, canonical_decode, is_canonical
+)
+
+VALUES = [
+    ('text', TAG_STRING),
+    ('', TAG_STRING),
+    ('0xabcd', TAG_HEX),
+    ('0x', TAG_HEX),
+    (b'\x00\x01', TAG_BYTES),
+    (b'', TAG_BYTES),
+    (255, TAG_POSITIVE),
+    (0, TAG_POSITIVE),
+    (2 ** 300, TAG_POSITIVE),
+    (-7, TAG_NEGATIVE),
+    (1.5, TAG_FLOAT),
+    (True, TAG_TRUE),
+    (False, TAG_FALSE),
+    (None, TAG_NONE),
+    ([1, 'a', None], TAG_LIST),
+    ([], TAG_LIST),
+    ({'b': 1, 'a': {'c': [b'x']}}, TAG_DICT),
+    ({}, TAG_DICT),
+]
+
+
+def tag_of(encoded):
+    # the tag of the value following the version byte
+    item = rlp.decode(encoded[1:], strict=True)
+    if isinstance(item, list):
+        return item[0]
+    return item[0:1]
+
+
+@pytest.mark.parametrize('value,tag', VALUES)
+def test_round_trip(value, tag):
+    encoded = canonical_encode(value)
+    assert encoded[0:1] == CANONICAL_VERSION == b'\x01' and is_canonical(encoded)
+    assert canonical_decode(encoded) == value
+    assert tag_of(encoded) == tag
+    # canonical rlp: decoding and encoding again gives the same bytes
+    assert rlp.encode(rlp.decode(encoded[1:], strict=True)) == encoded[1:]
+
+
+def test_equal_values_encode_equally():
+    assert canonical_encode({'a': 1, 'b': [2]}) == canonical_encode({'b': [2], 'a': 1})
+    assert canonical_encode((1, 2)) == canonical_encode([1, 2])
+    # a hex string of upper-case digits is a plain string, it wouldn't be decoded to itself otherwise
+    assert canonical_decode(canonical_encode('0xAB')) == '0xAB'
+    assert canonical_decode(canonical_encode('0xabc')) == '0xabc'
+
+
+@pytest.mark.parametrize('data', [
+    b'',
+    b'{"a": 1}',
+    b'\x02+',
+    CANONICAL_VERSION + b'\x81s',
+    CANONICAL_VERSION + b'\x82+\x00',
+    CANONICAL_VERSION + b'-',
+    CANONICAL_VERSION + b'\xc7d\x81bn\x81an',
+    CANONICAL_VERSION + b'++',
+    CANONICAL_VERSION + b'q',
+])
+def test_non_canonical_is_refused(data):
+    with pytest.raises(DecodeFail):
+        canonical_decode(data)
+
+
+def test_attestation_content_formats():
+    tx = {'from': '0x' + 'ab' * 20, 'value': 1, 'data': '0x'}
+    binary = Attestation.encode_transaction(tx, 'binary')
+    assert is_canonical(binary) and Attestation.decode_transaction(binary) == tx
+    assert Attestation.decode_transaction(Attestation.encode_transaction(tx, 'json')) == tx
+    assert len(binary) < len(Attestation.encode_transaction(tx, 'json'))
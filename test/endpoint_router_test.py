@@ -0,0 +1,123 @@
+
+# python modules
+import json
+import time
+
+# ethereum modules
+import pytest
+
+# uip modules
+from uiputils.errors import RPCError
+
+# eth modules
+from uiputils.ethtools import JsonRPC
+from uiputils.ethtools.endpoint_router import EndpointRouter
+from uiputils.ethtools.http_pool import HTTPSessionPool
+
+PRIMARY = 'http://primary:8545'
+BACKUP = 'http://backup:8545'
+ACCOUNT = '0x7019fa779024c0a0eac1d8475733eefe10a49f3b'
+
+
+class Response(object):
+    def __init__(self, result, status_code=200):
+        self.status_code = status_code
+        self.text = json.dumps(result)
+        self.result = result
+
+    def json(self):
+        return self.result
+
+
+class Endpoints(object):
+    # the endpoints of the chain: url -> seconds to answer, the urls that refuse the connection
+    def __init__(self):
+        self.delay = {PRIMARY: 0.0, BACKUP: 0.0}
+        self.down = set()
+        self.posted = []
+        self.error = None
+
+    def post(self, url, data, headers=None, timeout=None):
+        self.posted.append(url)
+        time.sleep(self.delay.get(url, 0.0))
+        if url in self.down:
+            raise ConnectionError(url + " refused")
+        if self.error is not None:
+            return Response({'jsonrpc': '2.0', 'id': 1, 'error': self.error})
+        return Response({'jsonrpc': '2.0', 'id': 1, 'result': url})
+
+
+@pytest.fixture
+def endpoints(monkeypatch):
+    endpoints = Endpoints()
+    monkeypatch.setattr(HTTPSessionPool, 'post', staticmethod(endpoints.post))
+    monkeypatch.setattr(EndpointRouter, '_routes', {})
+    monkeypatch.setattr(EndpointRouter, '_sticky', {})
+    monkeypatch.setattr(EndpointRouter, 'hedge_percentile', None)
+    EndpointRouter.register(PRIMARY, [PRIMARY, BACKUP])
+    return endpoints
+
+
+def read(rpc_host=PRIMARY):
+    return EndpointRouter.post(rpc_host, '{}', {'method': 'eth_getBalance', 'params': [ACCOUNT, 'latest']}).json()
+
+
+def write(account=ACCOUNT):
+    return EndpointRouter.post(PRIMARY, '{}', {'method': 'eth_getTransactionCount', 'params': [account, 'pending']})
+
+
+def measure(endpoints, primary, backup):
+    # record a few requests on each endpoint at the given latencies
+    endpoints.delay = {PRIMARY: primary, BACKUP: backup}
+    for endpoint in EndpointRouter.endpoints(PRIMARY):
+        for _ in range(3):
+            EndpointRouter._timed_post(endpoint, '{}', None)
+
+
+def test_reads_go_to_the_fastest_endpoint(endpoints):
+    measure(endpoints, 0.02, 0.0)
+    assert read()['result'] == BACKUP
+    # an unregistered host is posted to as it is
+    assert read('http://other:8545')['result'] == 'http://other:8545'
+
+
+def test_reads_fail_over(endpoints):
+    measure(endpoints, 0.0, 0.02)
+    endpoints.down.add(PRIMARY)
+    assert read()['result'] == BACKUP
+    assert endpoints.posted[-2:] == [PRIMARY, BACKUP]
+
+
+def test_writes_stick_to_one_endpoint(endpoints):
+    measure(endpoints, 0.0, 0.02)
+    assert write().json()['result'] == PRIMARY
+    # the other endpoint became faster, the writes of the account stay
+    measure(endpoints, 0.02, 0.0)
+    assert write().json()['result'] == PRIMARY
+    assert write(ACCOUNT.upper().replace('0X', '0x')).json()['result'] == PRIMARY
+    # an unreachable endpoint is not retried by the writes, they move once it is unhealthy
+    endpoints.down.add(PRIMARY)
+    for _ in range(4):
+        with pytest.raises(ConnectionError):
+            write()
+    assert write().json()['result'] == BACKUP
+
+
+def test_slow_reads_are_hedged(endpoints, monkeypatch):
+    measure(endpoints, 0.01, 0.03)
+    monkeypatch.setattr(EndpointRouter, 'hedge_percentile', 90)
+    assert read()['result'] == PRIMARY
+    # the primary is now far slower than its usual latency, the backup answers first
+    endpoints.delay[PRIMARY] = 0.5
+    start = time.time()
+    assert read()['result'] == BACKUP
+    assert time.time() - start < 0.3
+    # the second endpoint is raced only after the first took longer than the percentile
+    assert endpoints.posted[-2:] == [PRIMARY, BACKUP]
+
+
+def test_failed_request_is_not_printed(endpoints, capsys):
+    endpoints.error = {'code': -32000, 'message': 'execution reverted'}
+    with pytest.raises(RPCError):
+        JsonRPC.send({'jsonrpc': '2.0', 'method': 'eth_call', 'params': [{}, 'latest'], 'id': 1}, rpc_host=PRIMARY)
+    assert capsys.readouterr().out == ''
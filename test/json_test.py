@@ -19,7 +19,7 @@ if __name__ == '__main__':
     op_intents = OpIntent.createopintents(op_intents_json['Op-intents'])
     for op_intent in op_intents:
         print("---- ---- ---- ---- ---- ---- ---- ---- ---- ---- ---- ----")
-        print(json.dumps(op_intent.__dict__, sort_keys=True, indent=4, separators=(', ', ': ')))
+        print(json.dumps(op_intent.to_dict(), sort_keys=True, indent=4, separators=(', ', ': ')))
         print("---- ---- ---- ---- ---- ---- ---- ---- ---- ---- ---- ----")
 
     # Generate Transaction intents and Dependency Graph
@@ -0,0 +1,108 @@
+
+# python modules
+import json
+
+# ethereum modules
+import pytest
+
+# uip modules
+from uiputils.errors import RPCError
+
+# eth modules
+from uiputils.ethtools import JsonRPC
+from uiputils.ethtools.rpc_cache import RPCCache
+from uiputils.ethtools.endpoint_router import EndpointRouter
+from uiputils.ethtools.http_pool import HTTPSessionPool
+
+RPC_HOST = 'http://batch:8545'
+
+
+def receipt(tx_hash):
+    return {'jsonrpc': '2.0', 'method': 'eth_getTransactionReceipt', 'params': [tx_hash], 'id': 1}
+
+
+class Response(object):
+    def __init__(self, result):
+        self.status_code = 200
+        self.text = json.dumps(result)
+        self.result = result
+
+    def json(self):
+        return self.result
+
+
+class Node(object):
+    # answers a batch in the reverse order, the hashes in errors with an error, the hashes in lost not at all
+    def __init__(self):
+        self.errors = set()
+        self.lost = set()
+        self.batches = []
+
+    def post(self, url, data, headers=None, timeout=None):
+        batch = json.loads(data)
+        self.batches.append(batch)
+        responses = []
+        for dat in reversed(batch):
+            tx_hash = dat['params'][0]
+            if tx_hash in self.lost:
+                continue
+            if tx_hash in self.errors:
+                responses.append({'jsonrpc': '2.0', 'id': dat['id'], 'error': {'code': -32000, 'message': tx_hash}})
+            else:
+                responses.append({'jsonrpc': '2.0', 'id': dat['id'], 'result': {'transactionHash': tx_hash}})
+        return Response(responses)
+
+
+@pytest.fixture
+def node(monkeypatch):
+    node = Node()
+    monkeypatch.setattr(HTTPSessionPool, 'post', staticmethod(node.post))
+    monkeypatch.setattr(EndpointRouter, '_routes', {})
+    monkeypatch.setattr(JsonRPC, 'cache', RPCCache())
+    return node
+
+
+def test_pack_and_unpack():
+    dats = [receipt('0x01'), receipt('0x02'), receipt('0x01')]
+    batch, index_of = JsonRPC.pack_batch(dats)
+    # the requests are re-numbered uniquely, the same ids of the caller don't collide
+    assert len(set(dat['id'] for dat in batch)) == 3
+    assert not set(dat['id'] for dat in batch) & set(JsonRPC.pack_batch(dats)[1])
+    assert [batch[idx]['params'] for idx in index_of.values()] == [dat['params'] for dat in dats]
+    responses = [
+        {'id': batch[2]['id'], 'result': 'third'},
+        {'id': 10 ** 12, 'result': 'unknown'},
+        {'id': batch[0]['id'], 'error': {'message': 'first'}},
+    ]
+    results = JsonRPC.unpack_batch(dats, index_of, responses)
+    assert isinstance(results[0], RPCError) and 'first' in str(results[0])
+    # no response for the second request
+    assert isinstance(results[1], RPCError)
+    assert results[2]['result'] == 'third'
+
+
+def test_whole_batch_rejected():
+    dats = [receipt('0x01')]
+    _, index_of = JsonRPC.pack_batch(dats)
+    with pytest.raises(RPCError):
+        JsonRPC.unpack_batch(dats, index_of, {'jsonrpc': '2.0', 'id': None, 'error': {'message': 'no batch'}})
+
+
+def test_send_batch_demultiplexes(node):
+    hashes = ['0x%02x' % idx for idx in range(6)]
+    node.errors.add(hashes[1])
+    node.lost.add(hashes[4])
+    results = JsonRPC.send_batch([receipt(tx_hash) for tx_hash in hashes], rpc_host=RPC_HOST)
+    assert len(node.batches) == 1 and len(node.batches[0]) == 6
+    for tx_hash, result in zip(hashes, results):
+        if tx_hash in (hashes[1], hashes[4]):
+            assert isinstance(result, RPCError)
+        else:
+            assert result['result']['transactionHash'] == tx_hash
+
+    # the receipts are cached, only the failed requests are sent again
+    node.errors.clear()
+    node.lost.clear()
+    results = JsonRPC.send_batch([receipt(tx_hash) for tx_hash in hashes], rpc_host=RPC_HOST)
+    assert [dat['params'][0] for dat in node.batches[1]] == [hashes[1], hashes[4]]
+    assert [result['result']['transactionHash'] for result in results] == hashes
@@ -0,0 +1,138 @@
+
+# python modules
+import time
+
+# ethereum modules
+import rlp
+import pytest
+from eth_hash.auto import keccak
+from hexbytes import HexBytes
+
+# uip modules
+from uiputils.errors import RPCError
+
+# eth modules
+from uiputils.ethtools import JsonRPC, NonceManager, LocalSigner, ReceiptWatcher
+from uiputils.ethtools.head_tracker import HeadTracker
+
+SIGNER = LocalSigner(b'\x46' * 32)
+TO = '0x' + '11' * 20
+
+
+class Node(object):
+    # the eth_* methods of a node the manager talks to: nonce -> (hash, gas price) of the pooled transactions
+    def __init__(self, chain_nonce=5):
+        self.chain_nonce = chain_nonce
+        self.pool = {}
+        self.refuse = {}
+        self.receipt_error = None
+
+    def send(self, dat, rpc_host=None, **kwargs):
+        if dat['method'] == 'eth_getTransactionCount':
+            return {'result': hex(self.chain_nonce)}
+        if dat['method'] == 'eth_gasPrice':
+            return {'result': hex(10 ** 9)}
+        if dat['method'] == 'eth_sendRawTransaction':
+            raw = bytes.fromhex(dat['params'][0][2:])
+            fields = rlp.decode(raw)
+            nonce, gas_price = int.from_bytes(fields[0], 'big'), int.from_bytes(fields[1], 'big')
+            if nonce in self.refuse:
+                raise RPCError(self.refuse.pop(nonce))
+            if nonce in self.pool and self.pool[nonce][1] * 1.1 > gas_price:
+                raise RPCError('replacement transaction underpriced')
+            self.pool[nonce] = ('0x' + keccak(raw).hex(), gas_price)
+            return {'result': self.pool[nonce][0]}
+        raise AssertionError('unexpected ' + dat['method'])
+
+    def send_batch(self, dats, rpc_host=None, **kwargs):
+        # the receipts of the pooled transactions, or the error of every query
+        if self.receipt_error is not None:
+            return [RPCError(self.receipt_error) for _ in dats]
+        mined = set(HexBytes(tx_hash) for tx_hash, _ in self.pool.values())
+        return [
+            {'result': {'transactionHash': dat['params'][0]} if HexBytes(dat['params'][0]) in mined else None}
+            for dat in dats
+        ]
+
+
+@pytest.fixture
+def node(monkeypatch):
+    node = Node()
+    monkeypatch.setattr(JsonRPC, 'send', staticmethod(node.send))
+    monkeypatch.setattr(JsonRPC, 'send_batch', staticmethod(node.send_batch))
+    monkeypatch.setattr(HeadTracker, 'poll_head', lambda self: '0x1')
+    # the watchers are polled by the tests
+    monkeypatch.setattr(ReceiptWatcher, '_run', lambda self: None)
+    return node
+
+
+def manager_of(host, **kwargs):
+    NonceManager._managers.pop((host, SIGNER.address.lower()), None)
+    ReceiptWatcher._watchers.pop(host, None)
+    HeadTracker._trackers.pop(host, None)
+    return NonceManager.of(host, SIGNER, **kwargs)
+
+
+def test_nonces_assigned_locally(node):
+    manager = manager_of('http://nonces', max_in_flight=4)
+    hashes = [manager.send({'from': SIGNER.address, 'to': TO}) for _ in range(3)]
+    assert sorted(node.pool) == [5, 6, 7]
+    assert [HexBytes(node.pool[nonce][0]) for nonce in (5, 6, 7)] == [HexBytes(h) for h in hashes]
+    ReceiptWatcher.of('http://nonces').poll()
+    assert manager.stats()['in_flight'] == 0
+    assert HexBytes(manager.wait(hashes[0], 1)['result']['transactionHash']) == HexBytes(hashes[0])
+
+
+def test_refused_nonce_is_given_back_or_filled(node):
+    manager = manager_of('http://gap')
+    node.refuse[5] = 'insufficient funds'
+    with pytest.raises(RPCError):
+        manager.send({'from': SIGNER.address, 'to': TO})
+    # the last nonce is given back
+    assert manager.next_nonce == 5
+    manager.send({'from': SIGNER.address, 'to': TO})
+    manager.send({'from': SIGNER.address, 'to': TO})
+    # a nonce dropped behind a sent one is filled with a no-op
+    del node.pool[5]
+    manager._release(manager.in_flight[5])
+    assert manager.filled == 1 and manager.next_nonce == 7
+    assert manager.in_flight[5].tx['to'] == manager.address and 5 in node.pool
+
+
+def test_replacement_bumps_the_gas_price(node):
+    manager = manager_of('http://replace', replace_after=0.05)
+    tx_hash = manager.send({'from': SIGNER.address, 'to': TO})
+    price = node.pool[5][1]
+    assert manager.wait(tx_hash, 0.2) is None
+    assert manager.replaced >= 1 and node.pool[5][1] > price
+    ReceiptWatcher.of('http://replace').poll()
+    # the receipt of the replacement answers the original hash
+    assert HexBytes(manager.wait(tx_hash, 1)['result']['transactionHash']) == HexBytes(node.pool[5][0])
+
+
+def test_failed_replacement_keeps_the_price(node):
+    manager = manager_of('http://refused', replace_after=0.05)
+    tx_hash = manager.send({'from': SIGNER.address, 'to': TO})
+    pending = manager.by_hash[tx_hash]
+    price = pending.gas_price
+    node.refuse[5] = 'nonce too low'
+    start = time.time()
+    assert manager.wait(tx_hash, 0.3) is None
+    assert pending.gas_price == price and not pending.replaceable
+    assert time.time() - start >= 0.3
+
+
+def test_receipt_errors_release_the_slot(node):
+    manager = manager_of('http://errors', max_in_flight=1)
+    watcher = ReceiptWatcher.of('http://errors')
+    tx_hash = manager.send({'from': SIGNER.address, 'to': TO})
+    node.receipt_error = 'unknown block'
+    for _ in range(3):
+        watcher.poll()
+    with pytest.raises(RPCError):
+        manager.wait(tx_hash, 1)
+    assert manager.stats()['in_flight'] == 0
+    # the single slot is free again
+    node.receipt_error = None
+    manager.send({'from': SIGNER.address, 'to': TO})
+    assert sorted(node.pool) == [5, 6]
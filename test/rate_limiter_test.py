@@ -0,0 +1,78 @@
+
+# python modules
+import threading
+import time
+
+# eth modules
+from uiputils.ethtools import rate_limiter
+from uiputils.ethtools.rate_limiter import RateLimiter, TokenBucket
+from uiputils.ethtools.rpc_methods import PRIORITY_WRITE, PRIORITY_READ, PRIORITY_MONITOR
+
+
+def queue_up(bucket, priorities, admitted):
+    # a thread per priority, started in order, each records its priority once admitted
+    def acquire(priority):
+        bucket.acquire(priority)
+        admitted.append(priority)
+
+    threads, queued = [], bucket.stats()['queue_depth']
+    for priority in priorities:
+        thread = threading.Thread(target=acquire, args=(priority,))
+        thread.start()
+        threads.append(thread)
+        while bucket.stats()['queue_depth'] < queued + len(threads):
+            time.sleep(0.001)
+    return threads
+
+
+def test_burst_then_rate():
+    bucket = TokenBucket(rate=20, burst=3)
+    start = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    # 3 tokens of the burst, then 2 at 20 per second
+    assert 0.08 <= time.monotonic() - start < 0.5
+    assert bucket.stats()['admitted'] == 5 and bucket.stats()['max_wait'] >= 0.04
+
+
+def test_writes_are_admitted_ahead_of_reads():
+    bucket = TokenBucket(rate=5, burst=1)
+    bucket.acquire()
+    admitted = []
+    threads = queue_up(bucket, [PRIORITY_MONITOR, PRIORITY_READ, PRIORITY_READ, PRIORITY_WRITE], admitted)
+    for thread in threads:
+        thread.join(5)
+    # the same priorities are admitted by arrival
+    assert admitted == [PRIORITY_WRITE, PRIORITY_READ, PRIORITY_READ, PRIORITY_MONITOR]
+
+
+def test_throttle_holds_the_traffic():
+    bucket = TokenBucket(rate=50, burst=50)
+    bucket.throttle(0.2)
+    start = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - start >= 0.2
+
+
+def test_backpressure(monkeypatch):
+    monkeypatch.setattr(rate_limiter, 'rpc_backpressure_queue_depth', 2)
+    monkeypatch.setattr(rate_limiter, 'rpc_backpressure_wait', 10.0)
+    monkeypatch.setattr(RateLimiter, '_limits', dict(RateLimiter._limits))
+    monkeypatch.setattr(RateLimiter, '_buckets', {})
+    RateLimiter.set_limit('http://limited:8545', 5, 1)
+    bucket = RateLimiter.bucket('http://limited:8545')
+    RateLimiter.acquire('http://limited:8545')
+    admitted = []
+    threads = queue_up(bucket, [PRIORITY_READ] * 2, admitted)
+    assert not RateLimiter.overloaded('http://limited:8545')
+    threads += queue_up(bucket, [PRIORITY_READ], admitted)
+    assert RateLimiter.overloaded('http://limited:8545')
+    for thread in threads:
+        thread.join(5)
+    # drained
+    assert not RateLimiter.overloaded('http://limited:8545') and len(admitted) == 3
+
+    # a host without limit is never overloaded
+    RateLimiter.set_limit('http://unlimited:8545', None)
+    assert RateLimiter.acquire('http://unlimited:8545') == 0.0
+    assert not RateLimiter.overloaded('http://unlimited:8545')
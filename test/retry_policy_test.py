@@ -0,0 +1,83 @@
+
+# ethereum modules
+import pytest
+import requests
+
+# uip modules
+from uiputils.errors import RPCError
+
+# eth modules
+from uiputils.ethtools.retry_policy import RetryPolicy
+
+BLOCK_NUMBER = {'jsonrpc': '2.0', 'method': 'eth_blockNumber', 'params': [], 'id': 1}
+SEND = {'jsonrpc': '2.0', 'method': 'eth_sendTransaction', 'params': [{'from': '0x11', 'to': '0x22'}], 'id': 1}
+SEND_WITH_NONCE = {
+    'jsonrpc': '2.0', 'method': 'eth_sendTransaction', 'params': [{'from': '0x11', 'to': '0x22', 'nonce': '0x5'}], 'id': 1
+}
+
+
+def failing(errors, result='0x10'):
+    # raise the given errors one call after another, then return result
+    calls = []
+
+    def function():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+    return function, calls
+
+
+def policy(attempts=5, base_delay=0.001, max_delay=0.01):
+    return RetryPolicy(attempts=attempts, base_delay=base_delay, max_delay=max_delay, deadline=5)
+
+
+@pytest.mark.parametrize('error', [
+    requests.exceptions.ConnectionError('refused'),
+    requests.exceptions.Timeout('timed out'),
+    RPCError('busy', None, 503),
+    RPCError('too many requests', None, 429),
+])
+def test_transient_failures_are_retried(error):
+    retry = policy()
+    function, calls = failing([error, error])
+    assert retry.run([BLOCK_NUMBER], function) == '0x10'
+    assert len(calls) == 3 and retry.stats()['retries'] == 2
+
+
+def test_node_errors_are_not_retried():
+    retry = policy()
+    function, calls = failing([RPCError('execution reverted', {'error': {}}), RPCError('bad request', None, 400)])
+    with pytest.raises(RPCError):
+        retry.run([BLOCK_NUMBER], function)
+    assert len(calls) == 1 and retry.stats()['retries'] == 0
+
+
+def test_non_idempotent_requests_are_not_retried():
+    retry = policy()
+    function, calls = failing([requests.exceptions.Timeout('timed out')])
+    with pytest.raises(requests.exceptions.Timeout):
+        retry.run([SEND], function)
+    assert len(calls) == 1 and retry.stats()['unsafe'] == 1
+    # nor a batch containing one
+    function, calls = failing([requests.exceptions.Timeout('timed out')])
+    with pytest.raises(requests.exceptions.Timeout):
+        retry.run([BLOCK_NUMBER, SEND], function)
+    assert len(calls) == 1
+    # a transaction carrying its nonce is mined at most once, it is retried
+    function, calls = failing([requests.exceptions.Timeout('timed out')])
+    assert retry.run([SEND_WITH_NONCE], function) == '0x10' and len(calls) == 2
+
+
+def test_attempts_and_deadline_bound_the_retries():
+    retry = policy(attempts=3)
+    function, calls = failing([RPCError('busy', None, 502)] * 5)
+    with pytest.raises(RPCError):
+        retry.run([BLOCK_NUMBER], function)
+    assert len(calls) == 3 and retry.stats()['give_ups'] == 1
+
+    retry = policy(base_delay=1, max_delay=1)
+    function, calls = failing([RPCError('busy', None, 502)] * 5)
+    with pytest.raises(RPCError):
+        retry.run([BLOCK_NUMBER], function, deadline=0)
+    assert len(calls) == 1
@@ -0,0 +1,82 @@
+
+# ethereum modules
+import pytest
+
+# eth modules
+from uiputils.ethtools.rpc_cache import RPCCache
+
+RPC_HOST = 'http://cache:8545'
+
+
+def receipt(tx_hash):
+    return {'jsonrpc': '2.0', 'method': 'eth_getTransactionReceipt', 'params': [tx_hash], 'id': 7}
+
+
+def mined(tx_hash):
+    return {'jsonrpc': '2.0', 'id': 1, 'result': {'transactionHash': tx_hash}}
+
+
+def test_only_immutable_responses_are_cached():
+    cache = RPCCache(capacity=8)
+    cache.put(RPC_HOST, receipt('0x01'), mined('0x01'))
+    # not mined yet
+    cache.put(RPC_HOST, receipt('0x02'), {'jsonrpc': '2.0', 'id': 1, 'result': None})
+    # at a moving block tag, and at a fixed block
+    latest = {'method': 'eth_getBalance', 'params': ['0x11', 'latest']}
+    fixed = {'method': 'eth_getBalance', 'params': ['0x11', '0x10']}
+    cache.put(RPC_HOST, latest, {'result': '0x1'})
+    cache.put(RPC_HOST, fixed, {'result': '0x2'})
+    # a transaction still in the pool
+    pooled = {'method': 'eth_getTransactionByHash', 'params': ['0x03']}
+    cache.put(RPC_HOST, pooled, {'result': {'blockHash': None}})
+
+    # answered with the id of the request
+    assert cache.get(RPC_HOST, receipt('0x01')) == dict(mined('0x01'), id=7)
+    assert cache.get(RPC_HOST, fixed)['result'] == '0x2'
+    assert cache.get(RPC_HOST, receipt('0x02')) is None
+    assert cache.get(RPC_HOST, latest) is None
+    assert cache.get(RPC_HOST, pooled) is None
+    # scoped by host
+    assert cache.get('http://other:8545', receipt('0x01')) is None
+    assert cache.stats()['size'] == 2
+
+
+def test_least_recently_used_is_evicted():
+    cache = RPCCache(capacity=2)
+    cache.put(RPC_HOST, receipt('0x01'), mined('0x01'))
+    cache.put(RPC_HOST, receipt('0x02'), mined('0x02'))
+    # 0x01 is used again, 0x02 becomes the least recently used
+    assert cache.get(RPC_HOST, receipt('0x01')) is not None
+    cache.put(RPC_HOST, receipt('0x03'), mined('0x03'))
+    assert cache.get(RPC_HOST, receipt('0x02')) is None
+    assert cache.get(RPC_HOST, receipt('0x01')) is not None
+    assert cache.get(RPC_HOST, receipt('0x03')) is not None
+    stats = cache.stats()
+    assert (stats['size'], stats['hits'], stats['misses'], stats['spilled']) == (2, 3, 1, 0)
+
+
+def test_evicted_responses_are_spilled(tmp_path):
+    cache = RPCCache(capacity=2, spill_path=str(tmp_path / 'spill'))
+    for idx in range(5):
+        cache.put(RPC_HOST, receipt('0x%02x' % idx), mined('0x%02x' % idx))
+    assert cache.stats()['size'] == 2 and cache.stats()['spilled'] == 3
+    # a spilled response is answered, and brought back in memory
+    assert cache.get(RPC_HOST, receipt('0x00'))['result']['transactionHash'] == '0x00'
+    assert cache.stats()['size'] == 2
+    cache.close()
+
+    # the spill outlives the process
+    cache = RPCCache(capacity=2, spill_path=str(tmp_path / 'spill'))
+    assert cache.get(RPC_HOST, receipt('0x01'))['result']['transactionHash'] == '0x01'
+    cache.clear()
+    assert cache.get(RPC_HOST, receipt('0x02')) is None
+    cache.close()
+
+
+@pytest.mark.parametrize('dat', [
+    {'method': 'eth_call', 'params': [{'to': '0x11'}]},
+    {'method': 'eth_getStorageAt', 'params': ['0x11', '0x0', 'pending']},
+    {'method': 'eth_blockNumber', 'params': []},
+])
+def test_uncacheable_requests(dat):
+    assert RPCCache.key(RPC_HOST, dat) is None
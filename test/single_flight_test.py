@@ -0,0 +1,82 @@
+
+# python modules
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# ethereum modules
+import pytest
+
+# eth modules
+from uiputils.ethtools import JsonRPC
+from uiputils.ethtools.single_flight import SingleFlight
+
+CALLERS = 8
+
+
+def run_together(flight, key, function):
+    # CALLERS concurrent calls of key
+    with ThreadPoolExecutor(max_workers=CALLERS) as pool:
+        futures = [pool.submit(flight.do, key, function) for _ in range(CALLERS)]
+        return futures
+
+
+def held_function(flight, result=None, error=None):
+    # the function returns once every caller has joined the flight
+    release, executions = threading.Event(), []
+
+    def function():
+        executions.append(1)
+        release.wait(5)
+        if error is not None:
+            raise error
+        return result
+
+    def release_when_joined():
+        while flight.stats()['calls'] < CALLERS:
+            time.sleep(0.001)
+        release.set()
+
+    threading.Thread(target=release_when_joined, daemon=True).start()
+    return function, executions
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    function, executions = held_function(flight, result={'result': '0x1'})
+    futures = run_together(flight, 'key', function)
+    assert [future.result() for future in futures] == [{'result': '0x1'}] * CALLERS
+    assert len(executions) == 1
+    assert flight.stats() == {'calls': CALLERS, 'coalesced': CALLERS - 1, 'in_flight': 0}
+
+
+def test_the_error_is_shared():
+    flight = SingleFlight()
+    function, executions = held_function(flight, error=ValueError('node down'))
+    futures = run_together(flight, 'key', function)
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result()
+    assert len(executions) == 1
+    # a new call after the flight landed runs again
+    assert flight.do('key', lambda: 'again') == 'again'
+
+
+def test_different_keys_are_not_coalesced():
+    flight = SingleFlight()
+    assert [flight.do(key, lambda key=key: key) for key in ('a', 'b', 'a')] == ['a', 'b', 'a']
+    assert flight.stats()['coalesced'] == 0
+
+
+def test_only_reads_are_coalesced(monkeypatch):
+    sent = []
+    monkeypatch.setattr(JsonRPC, '_send', staticmethod(lambda dat, hed, rpc_host, deadline=None: sent.append(dat) or {
+        'jsonrpc': '2.0', 'id': dat.get('id'), 'result': '0x1'
+    }))
+    monkeypatch.setattr(JsonRPC, 'flights', SingleFlight())
+    read = {'jsonrpc': '2.0', 'method': 'eth_blockNumber', 'params': [], 'id': 3}
+    write = {'jsonrpc': '2.0', 'method': 'eth_sendRawTransaction', 'params': ['0x00'], 'id': 4}
+    # the response carries the id of each caller
+    assert JsonRPC.send(read, rpc_host='http://flight:8545')['id'] == 3
+    JsonRPC.send(write, rpc_host='http://flight:8545')
+    assert JsonRPC.flights.stats()['calls'] == 1 and len(sent) == 2
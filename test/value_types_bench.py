@@ -0,0 +1,95 @@
+
+# python modules
+import os
+import json
+import gc
+import tracemalloc
+import rlp
+
+# uip modules
+from uiputils.uiptypes import Attestation
+from uiputils.op_intents import OpIntent
+from uiputils.transaction.transaction import EthPaymentTransaction
+
+# the memory held by value objects before and after __slots__, the legacy classes below
+# have the same fields as the former ones, kept in a per-instance __dict__
+ADDRESS = "0x7019fa779024c0a0eac1d8475733eefe10a49f3b"
+CONTENT = [
+    json.dumps({"from": ADDRESS, "to": ADDRESS, "value": 20}, sort_keys=True).encode('utf-8'),
+    b'\x01',
+    b'\x02',
+    b'\x03'
+]
+TRANSACTION = {
+    '_host': 'Ethereum://chain3',
+    '_trans_info': {'src': ADDRESS, 'dst': ADDRESS, 'value': 20}
+}
+INTENT = {
+    'op_type': 'Payment',
+    'owners': ['Ethereum://chain3.a1', 'Ethereum://chain3.a2'],
+    'name': 'Op1',
+    'amount': 20,
+    'src': {'domain': 'Ethereum://chain3', 'user_name': 'a1'},
+    'dst': {'domain': 'Ethereum://chain3', 'user_name': 'a2'},
+    'unit': 'wei'
+}
+SIGNERS = 4
+
+
+class LegacyTransaction(object):
+    def __init__(self, value):
+        self.__dict__.update(value)
+
+
+class LegacyOpIntent(object):
+    def __init__(self, value):
+        self.__dict__.update(value)
+
+
+class LegacySignature(bytes):
+    def __init__(self, sig):
+        super().__init__()
+        self.signature = sig
+
+
+class LegacyAttestation(object):
+    def __init__(self, rlped_atte):
+        atte = slotted_attestation(rlped_atte)
+        for slot in Attestation.__slots__:
+            setattr(self, slot, getattr(atte, slot))
+        self._signatures = [[LegacySignature(bytes(sig)), addr] for sig, addr in atte.signatures]
+
+
+def slotted_attestation(rlped_atte):
+    atte = Attestation(rlped_atte)
+    for idx in range(SIGNERS):
+        atte.signature(idx)
+    return atte
+
+
+def measure(factory, count):
+    # return the bytes held per object
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory() for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return (after - before) / count
+
+
+if __name__ == '__main__':
+    rlped = rlp.encode([CONTENT, [[os.urandom(64) + b'\x1b', ADDRESS.encode('utf-8')] for _ in range(SIGNERS)]])
+    cases = (
+        ('Transaction', lambda: LegacyTransaction(dict(TRANSACTION)),
+         lambda: EthPaymentTransaction.from_dict(dict(TRANSACTION))),
+        ('OpIntent', lambda: LegacyOpIntent(dict(INTENT)), lambda: OpIntent.from_dict(dict(INTENT))),
+        ('Attestation', lambda: LegacyAttestation(rlped), lambda: slotted_attestation(rlped)),
+    )
+    print("type          objects   bytes/object: before   after")
+    for count in (10000, 100000):
+        for name, legacy, slotted in cases:
+            print("{0:12s} {1:8d} {2:22.1f} {3:7.1f}".format(
+                name, count, measure(legacy, count), measure(slotted, count)
+            ))
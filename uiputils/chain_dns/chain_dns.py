@@ -9,6 +9,9 @@ from uiputils.tennsbtools import is_address as is_tennsb_address
 # uip modules
 from uiputils.errors import Missing
 
+# eth modules
+from uiputils.ethtools import EndpointRouter
+
 
 # config
 from uiputils.config import eth_blockchain_info, tennsb_blockchain_info
@@ -52,6 +55,13 @@ class EthChainDNS:
         else:
             raise Missing('no such chainID: ' + chain_id)
 
+    @staticmethod
+    def gethosts(chain_id):
+        if chain_id in eth_blockchain_info:
+            return [eth_blockchain_info[chain_id]['host']] + eth_blockchain_info[chain_id].get('hosts', [])
+        else:
+            raise Missing('no such chainID: ' + chain_id)
+
 
 class TenChainDNS:
     def __init__(self):
@@ -85,6 +95,13 @@ class TenChainDNS:
         else:
             raise Missing('no such chainID: ' + chain_id)
 
+    @staticmethod
+    def gethosts(chain_id):
+        if chain_id in tennsb_blockchain_info:
+            return [tennsb_blockchain_info[chain_id]['host']] + tennsb_blockchain_info[chain_id].get('hosts', [])
+        else:
+            raise Missing('no such chainID: ' + chain_id)
+
 
 class ChainDNS:
     DNSmethod = {
@@ -126,6 +143,31 @@ class ChainDNS:
     def gethost(chain_type, chain_id):
         return ChainDNS.DNSmethod[chain_type].gethost(chain_id)
 
+    @staticmethod
+    def gethosts(chain_type, chain_id):
+        # all the RPC endpoints of the chain, the first one is the primary host
+        return ChainDNS.DNSmethod[chain_type].gethosts(chain_id)
+
+    @staticmethod
+    def register_endpoints(chain_type, chain_id, urls):
+        # requests sent to the primary host of the chain are routed among urls (and the primary host)
+        EndpointRouter.register(ChainDNS.gethost(chain_type, chain_id), urls)
+
+    @staticmethod
+    def getpubkey(address):
+        # the public key of an address (hex string), None if it isn't known
+        #   a Tendermint address is the ed25519 public key itself
+        #   an Ethereum address has a known secp256k1 public key if its chain lists it in 'pubkeys'
+        if is_eth_address(address):
+            for chain_info in eth_blockchain_info.values():
+                for pubkey_address, pubkey in chain_info.get('pubkeys', {}).items():
+                    if pubkey_address.lower() == address.lower():
+                        return bytes.fromhex(pubkey[2:] if pubkey[0:2] == "0x" else pubkey)
+            return None
+        if is_tennsb_address(address):
+            return bytes.fromhex(address[2:] if address[0:2] == "0x" else address)
+        return None
+
     @staticmethod
     def gatherusers(users, userformat=None):
         if userformat is None:
@@ -20,6 +20,119 @@ HTTP_HEADER = {'Content-Type': 'application/json'}
 
 ETHSIGN_HEADER = b"\x19Ethereum Signed Message:\n"
 
+# keep-alive connection pool of the JSON-RPC transport
+#   rpc_pool_maxsize: the max count of idle connections kept for each rpc host
+#   rpc_default_timeout: (connect timeout, read timeout) in seconds
+#   rpc_host_timeout: per-host override of rpc_default_timeout
+rpc_pool_maxsize = 16
+
+rpc_default_timeout = (5, 30)
+
+rpc_host_timeout = {
+    # 'http://162.105.87.118:8545': (5, 60)
+}
+
+# polling cadence of the chain head (in seconds)
+#   receipt_poll_interval: used before the block interval of a host is measured
+#   head_poll_min_interval, head_poll_max_interval: bounds of the adaptive delay
+#   head_poll_jitter: the relative random jitter added to every delay
+#   head_window_size: count of recent headers used to estimate the block interval
+receipt_poll_interval = 1
+
+head_poll_min_interval = 0.1
+
+head_poll_max_interval = 15
+
+head_poll_jitter = 0.1
+
+head_window_size = 16
+
+# cache of the immutable JSON-RPC responses (receipts, blocks by hash, states at a fixed block)
+#   rpc_cache_size: the max count of responses kept in memory
+#   rpc_cache_spill_path: the shelve file that evicted responses are spilled to, None for not spilling
+rpc_cache_size = 4096
+
+rpc_cache_spill_path = None
+
+# routing among the RPC endpoints of a chain
+#   rpc_latency_ewma_alpha: the smoothing factor of the latency and error-rate EWMAs
+#   rpc_unhealthy_error_rate: endpoints with a higher error rate are avoided
+#   rpc_hedge_percentile: a read slower than this latency percentile of its endpoint is raced on
+#       the second best endpoint, None for not hedging
+rpc_latency_ewma_alpha = 0.2
+
+rpc_unhealthy_error_rate = 0.5
+
+rpc_hedge_percentile = None
+
+# admission control of the JSON-RPC traffic, one token bucket per rpc host
+#   rpc_default_rate_limit: (requests per second, burst size), None for not limiting
+#   rpc_host_rate_limit: per-host override of rpc_default_rate_limit
+#   rpc_backpressure_queue_depth, rpc_backpressure_wait: the VES refuses new sessions while
+#       more requests than this are queued on its chain, or they recently waited longer (seconds)
+rpc_default_rate_limit = (50, 100)
+
+rpc_host_rate_limit = {
+}
+
+rpc_backpressure_queue_depth = 64
+
+rpc_backpressure_wait = 2.0
+
+# retrying of the idempotent JSON-RPC requests failed by the transport, a 429 or a 5xx
+#   rpc_retry_attempts: the max count of attempts of one request
+#   rpc_retry_base_delay, rpc_retry_max_delay: bounds of the exponential backoff (seconds)
+#   rpc_retry_deadline: the default seconds a request may take over all its attempts
+rpc_retry_attempts = 5
+
+rpc_retry_base_delay = 0.2
+
+rpc_retry_max_delay = 5
+
+rpc_retry_deadline = 60
+
+# unlocking of the accounts kept by the ethereum nodes (in seconds)
+#   eth_unlock_duration: the duration of one personal_unlockAccount
+#   eth_unlock_renew_margin: an unlock lapsing within this margin is renewed before use
+eth_unlock_duration = 60
+
+eth_unlock_renew_margin = 5
+
+# sending of the raw transactions signed in-process, with the nonces assigned locally
+#   eth_chain_id: the EIP-155 chain id the transactions are signed for, None for unprotected signatures
+#   nonce_max_in_flight: the max count of unconfirmed transactions of one account, a sender waits for a slot
+#   nonce_replace_after: a transaction waited for longer than this (seconds) is resent with a higher gas price
+#   nonce_gas_price_bump: the factor of the gas price of a replacement (the nodes require at least 1.1)
+eth_chain_id = None
+
+nonce_max_in_flight = 64
+
+nonce_replace_after = 60
+
+nonce_gas_price_bump = 1.125
+
+# encoding of the on-chain transaction in the content of the attestations created here
+#   attestation_content_format: 'json' (sorted-key JSON) or 'binary' (the versioned canonical
+#       encoding of uiptypes/canonical.py), the attestations of both formats are read
+#       the binary content is about half the size of the json one and has a single encoding per value,
+#       it is not faster: the json module is C in CPython, the canonical codec is Python
+attestation_content_format = 'json'
+
+# the ed25519 signatures (Tendermint) of the attestations are verified by PyNaCl
+#   attestation_require_ed25519: reject them if PyNaCl isn't installed, otherwise they are accepted
+#       unverified with a warning (the secp256k1 signatures are always verified)
+attestation_require_ed25519 = False
+
+# anchoring of the attestations on the NSB
+#   nsb_action_batching: anchor the Merkle root of a window of attestations as one action,
+#       instead of one action per attestation (the receivers check the inclusion proofs)
+#   nsb_action_batch_window: a window is anchored this long (seconds) after its first attestation
+#   nsb_action_batch_size: or as soon as it holds this many attestations
+nsb_action_batching = False
+
+nsb_action_batch_window = 1.0
+
+nsb_action_batch_size = 64
 
 action_using_flag = {
     'Ethereum': AttestationType.using_secp256k1,
@@ -27,6 +140,10 @@ action_using_flag = {
 }
 
 
+# a chain may register extra RPC endpoints besides 'host' by the key 'hosts', e.g.
+#   'chain1': {'host': 'http://127.0.0.1:8545', 'hosts': ['http://127.0.0.1:8546'], 'user': {...}}
+# and the known public keys of its accounts by the key 'pubkeys' (address -> hex of the 64-byte key),
+# the signatures of these accounts are then verified against the key instead of recovering it
 eth_blockchain_info = {
     'legacy_chain1': {
         'host': 'http://127.0.0.1:8545',
@@ -151,10 +268,22 @@ ves_log_dir = ROOT_PATH + "/log/ves.log"
 
 isc_log_dir = ROOT_PATH + "/log/isc.log"
 
+# append-only store of the attestations kept by the VES
+#   attestation_store_dir: the directory of the segment files, kept out of the source tree
+#   attestation_store_segment_size: a new segment file is started once the current one exceeds it (bytes)
+#   attestation_store_commit_delay: a commit waits this long (seconds) for other writers to share its fsync
+attestation_store_dir = parsepath.expanduser("~/.uip/attestations")
+
+attestation_store_segment_size = 64 * 1024 * 1024
+
+attestation_store_commit_delay = 0.002
+
 isc_abi_dir = INCLUDE_PATH + "/isc.abi"
 
 isc_bin_dir = INCLUDE_PATH + "/isc.bin"
 
+nsb_abi_dir = ROOT_PATH + "/contract/solidity/nsb/nsb.abi"
+
 if platform.system() == "Windows":
     kvdb_path = "E:/project/go/src/github.com/Myriad-Dreamin/NSB/bin/kvstore"
 else:
@@ -1,41 +1,94 @@
 
+# python modules
+from functools import lru_cache
+
 # ethereum modules
 from hexbytes import HexBytes
 from web3 import Web3
 
 # eth modules
 from uiputils.contract.wrapped_contract_function import ContractFunctionClient
-from uiputils.ethtools import ServiceStart, FileLoad
+from uiputils.ethtools import (
+    ServiceStart, FileLoad, SingleFlight, JsonRPC, SelectorRegistry, NonceManager
+)
+
+
+@lru_cache(maxsize=4096)
+def contract_at(factory, contract_addr):
+    # the contract handle of the address, built once by the shared factory
+    return factory(contract_addr)
 
 
 class EthContract:
     # return a contract that can transact with web3
 
+    # the identical calls in flight at the same time, set to None to disable coalescing
+    flights = SingleFlight()
+
+    # (host, abi file, bytecode file) -> (abi, bytecode, contract factory), a factory is built again
+    # once FileLoad loads a changed file
+    factories = {}
+
     def __init__(self, web3_addr, contract_addr="", contract_abi=None, contract_bytecode=None, timeout=30):
+        # the Web3 of the host, the parsed files and the contract factory are shared by the process,
+        # building a handle of a contract (e.g. an isc per session) costs a few lookups
 
         web3 = ServiceStart.startweb3(web3_addr)
-        contract_abi = FileLoad.getabi(contract_abi)
-        contract_bytecode = FileLoad.getbytecode(contract_bytecode)
+        if isinstance(contract_abi, str):
+            self.selectors = SelectorRegistry.load(contract_abi)
+        else:
+            self.selectors = SelectorRegistry(contract_abi)
+        factory = EthContract.contract_factory(web3_addr, web3, contract_abi, contract_bytecode)
 
         if contract_addr != "":
-            self.handle = web3.eth.contract(
-                Web3.toChecksumAddress(contract_addr),
-                abi=contract_abi,
-                bytecode=contract_bytecode
-            )
+            self.handle = contract_at(factory, Web3.toChecksumAddress(contract_addr))
         else:
-            self.handle = web3.eth.contract(abi=contract_abi, bytecode=contract_bytecode)
+            self.handle = factory
 
         self.timeout = timeout
+        self.host = web3_addr
         self.web3 = web3
         self.address = self.handle.address
         self.abi = self.handle.abi
         self.bytecode = self.handle.bytecode
         self.functions = self.handle.functions
 
+    @staticmethod
+    def contract_factory(web3_addr, web3, contract_abi, contract_bytecode):
+        abi = FileLoad.getabi(contract_abi)
+        bytecode = FileLoad.getbytecode(contract_bytecode)
+        if not isinstance(web3_addr, str) or not isinstance(contract_abi, str) or \
+                not isinstance(contract_bytecode, (str, type(None))):
+            # given objects, not files
+            return web3.eth.contract(abi=abi, bytecode=bytecode)
+        key = (web3_addr, contract_abi, contract_bytecode)
+        cached = EthContract.factories.get(key)
+        if cached is None or cached[0] is not abi or cached[1] is not bytecode:
+            cached = EthContract.factories[key] = (abi, bytecode, web3.eth.contract(abi=abi, bytecode=bytecode))
+        return cached[2]
+
     def func(self, funcname, *args):
         # call a contract function
-        return self.handle.functions[funcname](*args).call()
+        if EthContract.flights is None:
+            return self.handle.functions[funcname](*args).call()
+        ret = EthContract.flights.do(
+            (self.host, self.address, funcname, repr(args)),
+            lambda: self.handle.functions[funcname](*args).call()
+        )
+        # the callers sharing the call may modify the returned tuple-as-list independently
+        return list(ret) if isinstance(ret, list) else ret
+
+    def abifunc(self, funcname, *args):
+        # call a contract function by eth_call, the returned bytes are decoded by the compiled plan of
+        # its outputs instead of web3 (the identical calls in flight are coalesced by JsonRPC.send)
+        if not isinstance(self.host, str):
+            # started on a given Web3 instance, there isn't a host to send to
+            return self.func(funcname, *args)
+        selector, encoder, decoder = self.selectors.plan(funcname, len(args))
+        return decoder.decode(JsonRPC.send(
+            JsonRPC.eth_call({'to': self.address, 'data': selector + encoder.encode_hex(args)}),
+            rpc_host=self.host
+        )['result'])
 
     def funct(self, funcname, tx_head, *args, timeout=None, gasuse=None):
         # transact a contract function
@@ -46,6 +99,10 @@ class EthContract:
             # is it necessary to deep-copy?
             to_send_tx_head = tx_head.copy()
             to_send_tx_head['gas'] = gasuse
+        manager = self.nonce_manager(to_send_tx_head)
+        if manager is not None:
+            tx_hash = manager.send(self.managed_tx(to_send_tx_head, funcname, args))
+            return self.managed_receipt(manager, tx_hash, timeout)
         tx_rec = self.handle.functions[funcname](*args).transact(to_send_tx_head)
         return self.web3.eth.waitForTransactionReceipt(HexBytes(tx_rec).hex(), timeout=timeout)
 
@@ -58,6 +115,15 @@ class EthContract:
             to_send_tx_head = tx_head.copy()
             to_send_tx_head['gas'] = gasuse
         func = self.handle.functions[funcname](*args)
+        manager = self.nonce_manager(to_send_tx_head)
+        if manager is not None:
+            return ContractFunctionClient(
+                lambda transaction: manager.send(self.managed_tx(transaction, funcname, args)),
+                func.call,
+                lambda tx_resp, wait_time: self.managed_receipt(manager, tx_resp, wait_time),
+                to_send_tx_head,
+                timeout
+            )
         return ContractFunctionClient(
             # bounded_contract_function
             func.transact,
@@ -68,6 +134,21 @@ class EthContract:
             timeout
         )
 
+    def nonce_manager(self, tx_head):
+        # the NonceManager of the sender, the transactions of a managed account are sent raw
+        if not isinstance(self.host, str) or not isinstance(tx_head, dict):
+            return None
+        return NonceManager.get(self.host, tx_head.get('from'))
+
+    def managed_tx(self, tx_head, funcname, args):
+        return dict(tx_head, to=self.address, data=self.selectors.encode_call(funcname, args))
+
+    @staticmethod
+    def managed_receipt(manager, tx_hash, timeout):
+        # the receipt as web3 returns it, None if timeout
+        response = manager.wait(tx_hash, timeout)
+        return None if response is None else response['result']
+
     def funcs(self):
         # return all functions in self.abi
         return self.handle.all_functions()
@@ -1,7 +1,6 @@
 
 # python modules
-import time
-from functools import partial
+from functools import partial, lru_cache
 
 # ethereum modules
 from hexbytes import HexBytes
@@ -9,39 +8,38 @@ from web3.utils.threads import Timeout as Web3Timeout
 from eth_utils import to_checksum_address
 
 # eth modules
-from uiputils.ethtools import JsonRPC, AbiEncoder, hex_match, hex_match_withprefix
+from uiputils.ethtools import JsonRPC, AbiEncoder, NonceManager, hex_match, hex_match_withprefix
 from uiputils.errors import GenerationError
 
 
+@lru_cache(maxsize=1024)
+def checked_sig(function_sign: str) -> str:
+    # the same few selectors are checked again and again, each of them is validated once
+    if hex_match_withprefix.match(function_sign):
+        if len(function_sign) != 10:
+            raise GenerationError("function signature must be 8 chars long (without prefix '0x')")
+    elif hex_match.match(function_sign):
+        if len(function_sign) != 8:
+            raise GenerationError("function signature must be 8 chars long (without prefix '0x')")
+        function_sign = "0x" + function_sign
+    return function_sign
+
+
 class ContractFunctionClass(object):
     # lazy contract-function
     @staticmethod
     def check_sig(function_sign: bytes or str) -> str:
-        if isinstance(function_sign, bytes):
+        if isinstance(function_sign, (bytes, bytearray)):
             function_sign = HexBytes(function_sign).hex()
-        if hex_match_withprefix.match(function_sign):
-            if len(function_sign) != 10:
-                raise GenerationError("function signature must be 8 chars long (without prefix '0x')")
-        elif hex_match.match(function_sign):
-            if len(function_sign) != 8:
-                raise GenerationError("function signature must be 8 chars long (without prefix '0x')")
-            function_sign = "0x" + function_sign
-        return function_sign
+        return checked_sig(function_sign)
 
     @staticmethod
     def wait(host: str):
 
-        def lazy_function(tx_resp: str, wait_time=25, query_period=1):
-            tx_resp_json = JsonRPC.eth_get_transaction_receipt(tx_resp)
-            expire_time = wait_time + time.time()
-            while time.time() < expire_time:
-                try:
-                    resp = JsonRPC.send(tx_resp_json, rpc_host=host)
-                    if resp['result'] is not None:
-                        return resp
-                    time.sleep(query_period)
-                except Exception:
-                    raise
+        def lazy_function(tx_resp: str, wait_time=25):
+            # the receipt is fetched by the shared watcher of host, None if not mined within wait_time
+            # (a transaction sent by a NonceManager is followed through its replacements)
+            return NonceManager.wait_receipt(host, tx_resp, wait_time)
 
         return lazy_function
 
@@ -53,13 +51,10 @@ class ContractFunction(ContractFunctionClass):
 
         def lazy_function():
             sig = ContractFunction.check_sig(function_sign)
-            return JsonRPC.send(
-                JsonRPC.eth_send_transaction(dict(
-                    tx,
-                    data=sig + AbiEncoder.encodes(function_args, function_args_type)
-                )),
-                rpc_host=host
-            )['result']
+            return NonceManager.send_transaction(host, dict(
+                tx,
+                data=sig + AbiEncoder.compile(function_args_type).encode_hex(function_args)
+            ))
 
         return lazy_function
 
@@ -70,7 +65,7 @@ class ContractFunction(ContractFunctionClass):
             sig = ContractFunction.check_sig(function_sign)
             return JsonRPC.send(
                 JsonRPC.eth_call(
-                    dict(tx, data=sig + AbiEncoder.encodes(function_args, function_args_type)),
+                    dict(tx, data=sig + AbiEncoder.compile(function_args_type).encode_hex(function_args)),
                     tag
                 ),
                 rpc_host=host
@@ -87,13 +82,10 @@ class ContractFunctionWithoutCheck(ContractFunctionClass):
         def lazy_function(transaction=None):
             if transaction is None:
                 transaction = {}
-            return JsonRPC.send(
-                JsonRPC.eth_send_transaction(dict(
-                    transaction,
-                    data=function_sign + AbiEncoder.encodes(function_args, function_args_type)
-                )),
-                rpc_host=host
-            )['result']
+            return NonceManager.send_transaction(host, dict(
+                transaction,
+                data=function_sign + AbiEncoder.compile(function_args_type).encode_hex(function_args)
+            ))
 
         return lazy_function
 
@@ -105,7 +97,10 @@ class ContractFunctionWithoutCheck(ContractFunctionClass):
                 transaction = {}
             return JsonRPC.send(
                 JsonRPC.eth_call(
-                    dict(transaction, data=function_sign + AbiEncoder.encodes(function_args, function_args_type)),
+                    dict(
+                        transaction,
+                        data=function_sign + AbiEncoder.compile(function_args_type).encode_hex(function_args)
+                    ),
                     tag
                 ),
                 rpc_host=host
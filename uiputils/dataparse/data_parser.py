@@ -1,5 +1,4 @@
 
-
 from hexbytes import HexBytes
 
 from uiputils.ethtools import JsonRPC, AbiEncoder, SoliTypes
@@ -13,6 +12,9 @@ class EthDataParser:
     @staticmethod
     def parse(args, args_types):
         parsed_args = []
+        # storage reads grouped by host, fetched with one batched request per host
+        #   domain -> [(index of parsed_args, eth_getStorageAt request)]
+        storage_reads = {}
         for arg, arg_type in zip(args, args_types):
             if isinstance(arg, str) and len(arg) > 0 and arg[0] == '@':
                 try:
@@ -21,13 +23,23 @@ class EthDataParser:
                         eth_known_contract[contract_addr]['address'], eth_known_contract[contract_addr]['host']
                     authen_pos = HexBytes(SoliTypes[arg_type].ori_loc(begining_pos)).hex()
                     # print(authen_pos, contract_addr, domain)
-                    parsed_args.append(JsonRPC.send(
-                        JsonRPC.eth_get_storage_at(contract_addr, authen_pos, "latest"),
-                        HTTP_HEADER,
-                        domain
-                    )['result'])
+                    storage_reads.setdefault(domain, []).append(
+                        (len(parsed_args), JsonRPC.eth_get_storage_at(contract_addr, authen_pos, "latest"))
+                    )
+                    parsed_args.append(None)
                 except:
                     parsed_args.append("012")
             else:
                 parsed_args.append(arg)
-        return AbiEncoder.encodes(parsed_args, args_types)
+
+        for domain, reads in storage_reads.items():
+            try:
+                responses = JsonRPC.send_batch([read for _, read in reads], HTTP_HEADER, domain)
+            except:
+                responses = [None] * len(reads)
+            for (idx, _), response in zip(reads, responses):
+                if isinstance(response, dict):
+                    parsed_args[idx] = response['result']
+                else:
+                    parsed_args[idx] = "012"
+        return AbiEncoder.compile(args_types).encode_hex(parsed_args)
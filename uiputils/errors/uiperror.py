@@ -62,3 +62,24 @@ class VerificationError(Exception):
     def __str__(self):
         return self.error_info
 
+
+
+class RPCError(Exception):
+    def __init__(self, error_info, response=None, status_code=None):
+        # RPCErrors are returned inside lists by batched requests, so keep the repr printable
+        super().__init__(error_info)
+        self.error_info = error_info
+        self.response = response
+        self.status_code = status_code
+
+    def __str__(self):
+        return self.error_info
+
+
+class BackpressureError(Exception):
+    def __init__(self, error_info):
+        super().__init__(error_info)
+        self.error_info = error_info
+
+    def __str__(self):
+        return self.error_info
@@ -1,10 +1,34 @@
 
 from .abi_covt import AbiEncoder, AbiDecoder
 
+from .http_pool import HTTPSessionPool
+
+from .rpc_cache import RPCCache
+
+from .single_flight import SingleFlight
+
+from .rate_limiter import RateLimiter
+
+from .endpoint_router import EndpointRouter
+
 from .jsonrpc import JsonRPC
 
+from .async_jsonrpc import AsyncJsonRPC
+
+from .head_tracker import HeadTracker
+
+from .receipt_watcher import ReceiptWatcher
+
+from .unlock_manager import UnlockManager
+
+from .local_signer import LocalSigner
+
+from .nonce_manager import NonceManager
+
 from .loadfile import FileLoad
 
+from .selector_registry import SelectorRegistry, FunctionABI, function_selector
+
 from .loc_cal import LocationTransLator, MapLoc, SliceLoc
 
 from .patterns import hex_match, hex_match_withprefix
@@ -24,7 +48,21 @@ __all__ = [
     'SignatureVerifier',
     'LocationTransLator',
     'JsonRPC',
+    'HTTPSessionPool',
+    'RPCCache',
+    'SingleFlight',
+    'RateLimiter',
+    'EndpointRouter',
+    'AsyncJsonRPC',
+    'HeadTracker',
+    'ReceiptWatcher',
+    'UnlockManager',
+    'LocalSigner',
+    'NonceManager',
     'FileLoad',
+    'SelectorRegistry',
+    'FunctionABI',
+    'function_selector',
     'ServiceStart',
     'MapLoc',
     'SliceLoc',
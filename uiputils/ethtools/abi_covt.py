@@ -8,6 +8,9 @@ from hexbytes import HexBytes
 # __init__ provided parterns
 from .patterns import hex_match, hex_match_withprefix
 
+# compiled encoding and decoding
+from .abi_plan import compile_encoder, compile_decoder
+
 # constant
 #   X & MOD6 == X % 64
 MOD6 = (1 << 6) - 1
@@ -123,6 +126,13 @@ class AbiEncoder:
     def is_array_type(para_type):
         return para_type[-1] == ']' or para_type == 'bytes' or para_type == 'string'
 
+    @staticmethod
+    def compile(para_type_list):
+        # the cached plan of encodes(..., para_type_list), plan.encode_hex(para_list) gives the same
+        # encoding as encodes(para_list, para_type_list): the types are parsed once, and the
+        # parameters are written straight into a bytearray
+        return compile_encoder(tuple(para_type_list))
+
     @staticmethod
     def encodes(para_list, para_type_list):
         if len(para_list) != len(para_type_list):
@@ -223,6 +233,13 @@ class AbiDecoder:
                 print("TODO array-type:", ret_type)
                 return
 
+    @staticmethod
+    def compile(rets_type_list):
+        # the cached plan of the standard decoding of rets_type_list: plan.decode(raw_rets) works on a
+        # memoryview over the returned bytes, and supports the nested dynamic arrays, strings and tuples
+        # (an address is decoded to its checksum string, a tuple to a tuple, as web3 does)
+        return compile_decoder(tuple(rets_type_list))
+
     @staticmethod
     def decodes(raw_rets, rets_type_list):
         if len(raw_rets) & MOD6:
@@ -0,0 +1,410 @@
+
+# python modules
+from functools import lru_cache
+
+# ethereum modules
+from eth_utils import to_checksum_address
+
+# eth modules
+from uiputils.errors import Mismatch, SolidityTypeError
+
+# constant
+#   INTM[c] - X == ~X (mod 2^{8c})
+INTM = [(1 << (bit_size << 3)) for bit_size in range(33)]
+ZERO_WORD = bytes(32)
+ENC = 'utf-8'
+
+
+def hex_payload(para, para_type):
+    # the bytes of a hex string (with or without "0x") or of a bytes-like parameter
+    if isinstance(para, (bytes, bytearray)):
+        return bytes(para)
+    if isinstance(para, str):
+        hexstr = para[2:] if para[1:2] == 'x' else para
+        if not hexstr.isascii() or not hexstr.isalnum():
+            raise TypeError("invalid hexstring " + para + " for initializing datatype " + para_type)
+        if len(hexstr) & 1:
+            raise Mismatch("odd-length byte-array is invalid")
+        try:
+            return bytes.fromhex(hexstr)
+        except ValueError:
+            raise TypeError("invalid hexstring " + para + " for initializing datatype " + para_type)
+    raise TypeError("unexpected type " + str(type(para)) + " for initializing datatype " + para_type)
+
+
+def hex_number(para, para_type, nibbles):
+    # the number of a hex string (with or without "0x") of at most nibbles digits
+    numstr = para[2:] if para[1:2] == 'x' else para
+    if not numstr.isascii() or not numstr.isalnum():
+        raise TypeError("invalid hexstring " + para + " for initializing datatype " + para_type)
+    if len(numstr) > nibbles:
+        raise OverflowError("too large number " + para + " to fill in type " + para_type)
+    try:
+        return int(numstr, 16) if numstr else 0
+    except ValueError:
+        raise TypeError("invalid hexstring " + para + " for initializing datatype " + para_type)
+
+
+def compile_uint(para_type, nibbles):
+    bits = nibbles << 2
+
+    def write(out, para):
+        if isinstance(para, int):
+            if para < 0:
+                raise ValueError("negative number " + str(para) + " for initializing datatype " + para_type)
+            if para.bit_length() > bits:
+                raise OverflowError("too large number " + str(para) + " to fill in type " + para_type)
+        elif isinstance(para, str):
+            para = hex_number(para, para_type, nibbles)
+        else:
+            raise TypeError("unexpected type " + str(type(para)) + " for initializing datatype " + para_type)
+        out += para.to_bytes(32, 'big')
+    return write
+
+
+def compile_int(para_type, nibbles):
+    bits, bound = nibbles << 2, INTM[nibbles >> 1]
+
+    def write(out, para):
+        if isinstance(para, int):
+            # the negative numbers are sign-extended from the two's complement of the type
+            if para < 0:
+                if bound + para < (bound >> 1):
+                    raise OverflowError("too large number " + str(para) + " to fill in type" + para_type)
+                para += INTM[32]
+            elif para.bit_length() > bits:
+                raise OverflowError("too large number " + str(para) + " to fill in type" + para_type)
+        elif isinstance(para, str):
+            para = hex_number(para, para_type, nibbles)
+        else:
+            raise TypeError("unexpected type " + str(type(para)) + " for initializing datatype " + para_type)
+        out += para.to_bytes(32, 'big')
+    return write
+
+
+def compile_bytes(para_type):
+    write_length = compile_uint('uint256', 64)
+
+    def write(out, para):
+        payload = hex_payload(para, para_type)
+        write_length(out, len(payload))
+        out += payload
+        out += ZERO_WORD[:(-len(payload)) & 31]
+    return write
+
+
+def compile_string(para_type):
+    write_bytes = compile_bytes('bytes')
+
+    def write(out, para):
+        write_bytes(out, para.encode(ENC))
+    return write
+
+
+def compile_fixed_bytes(para_type, bytes_size):
+    def write(out, para):
+        payload = hex_payload(para, para_type)
+        if len(payload) != bytes_size:
+            raise Mismatch("parameter " + str(para) + " doesn't match the datatype " + para_type)
+        out += payload
+        out += ZERO_WORD[:(-bytes_size) & 31]
+    return write
+
+
+def compile_array(para_type, element_type, array_size):
+    write_element = compile_type(element_type)
+    write_length = compile_uint('uint256', 64)
+
+    def write(out, para):
+        if not hasattr(para, '__iter__'):
+            raise TypeError("not iteraable parameter " + str(para) + " for Array type " + para_type)
+        if array_size is None:
+            write_length(out, len(para))
+        elif array_size < len(para):
+            raise Mismatch('parameters mismatch with parameters_type')
+        for element in para:
+            write_element(out, element)
+    return write
+
+
+def type_size(para_type, prefix_length):
+    # the number after the prefix of intN, uintN, bytesN (None if there isn't one)
+    size = para_type[prefix_length:]
+    if size == "":
+        return None
+    try:
+        return int(size)
+    except ValueError:
+        raise SolidityTypeError("unexpected or invalid given-datatype: " + para_type)
+
+
+@lru_cache(maxsize=None)
+def compile_type(para_type: str):
+    # return the writer of para_type: write(out: bytearray, para) appends the encoding of para,
+    # the same encoding AbiEncoder.encode gives in hex (the elements of an array are encoded in place)
+    if not isinstance(para_type, str):
+        raise ValueError("para_type description must be in string: " + str(type(para_type)))
+    if para_type == 'address':
+        return compile_uint(para_type, 40)
+    elif para_type == 'string':
+        return compile_string(para_type)
+    elif para_type == 'byte':
+        return compile_fixed_bytes(para_type, 1)
+    elif para_type == 'bool':
+        return compile_uint(para_type, 2)
+    elif para_type[-1:] == ']':  # Array
+        element_type, array_size = para_type[:-1].rsplit('[', 1)
+        return compile_array(para_type, element_type, int(array_size) if array_size != "" else None)
+    elif para_type[0:3] == 'int':
+        bits = type_size(para_type, 3)
+        if bits is None:
+            return compile_int(para_type, 32)
+        if (bits & 7) != 0 or bits > 256 or bits < 0:
+            raise SolidityTypeError("invalid given-datatype: " + para_type)
+        return compile_int(para_type, bits >> 2)
+    elif para_type[0:4] == 'uint':
+        bits = type_size(para_type, 4)
+        if bits is None:
+            return compile_uint(para_type, 64)
+        if (bits & 7) != 0 or bits > 256 or bits < 0:
+            raise SolidityTypeError("invalid datatype: " + para_type)
+        return compile_uint(para_type, bits >> 2)
+    elif para_type[0:5] == 'bytes':
+        bytes_size = type_size(para_type, 5)
+        if bytes_size is None:
+            return compile_bytes(para_type)
+        if bytes_size > 32:
+            raise SolidityTypeError("invalid given-datatype " + para_type)
+        return compile_fixed_bytes(para_type, bytes_size)
+    raise SolidityTypeError("unexpected or invalid given-datatype: " + para_type)
+
+
+class AbiEncoderPlan(object):
+    # the compiled AbiEncoder.encodes of a list of types, see compile_encoder
+    __slots__ = ('types', 'writers', 'dynamic', 'tail_free')
+
+    def __init__(self, para_type_list):
+        self.types = para_type_list
+        self.writers = [compile_type(para_type) for para_type in para_type_list]
+        # the array types are encoded in the tail, referred by their offsets in the head
+        self.dynamic = [
+            para_type[-1] == ']' or para_type == 'bytes' or para_type == 'string' for para_type in para_type_list
+        ]
+        self.tail_free = not any(self.dynamic)
+
+    def encode(self, para_list) -> bytes:
+        return bytes(self._encode(para_list))
+
+    def encode_hex(self, para_list) -> str:
+        # the hex string (without "0x") AbiEncoder.encodes returns
+        return self._encode(para_list).hex()
+
+    def _encode(self, para_list) -> bytearray:
+        if len(para_list) != len(self.writers):
+            raise Mismatch('parameters mismatch with parameters_type_list')
+        head = bytearray()
+        if self.tail_free:
+            for write, para in zip(self.writers, para_list):
+                write(head, para)
+            return head
+        tail = bytearray()
+        head_size = len(self.writers) << 5
+        for write, dynamic, para in zip(self.writers, self.dynamic, para_list):
+            if dynamic:
+                head += (head_size + len(tail)).to_bytes(32, 'big')
+                write(tail, para)
+            else:
+                write(head, para)
+        head += tail
+        return head
+
+
+@lru_cache(maxsize=1024)
+def compile_encoder(para_type_list: tuple) -> AbiEncoderPlan:
+    return AbiEncoderPlan(para_type_list)
+
+
+# decoding
+#   a compiled type is (read, dynamic, size): read(view, pos) returns the value encoded at view[pos:],
+#   which is in place (in the head of its sequence) if the type is static, or at the offset
+#   referred by the head if it is dynamic; size is the size of the head of the type
+
+
+def out_of_range(end, length):
+    return OverflowError("superflours decode: input " + str(length) + " bytes but expect at least " + str(end))
+
+
+def read_word(view, pos):
+    return int.from_bytes(view[pos:pos + 32], 'big')
+
+
+def read_int(view, pos):
+    return int.from_bytes(view[pos:pos + 32], 'big', signed=True)
+
+
+def read_bool(view, pos):
+    return int.from_bytes(view[pos:pos + 32], 'big') != 0
+
+
+@lru_cache(maxsize=4096)
+def checksum_address(address: bytes):
+    # the same few addresses (of the owners, the contracts) are returned again and again
+    return to_checksum_address('0x' + address.hex())
+
+
+def read_address(view, pos):
+    return checksum_address(bytes(view[pos + 12:pos + 32]))
+
+
+def read_bytes(view, pos):
+    start = pos + 32
+    if start > len(view):
+        raise out_of_range(start, len(view))
+    end = start + int.from_bytes(view[pos:start], 'big')
+    if end > len(view):
+        raise out_of_range(end, len(view))
+    return bytes(view[start:end])
+
+
+def read_string(view, pos):
+    start = pos + 32
+    if start > len(view):
+        raise out_of_range(start, len(view))
+    end = start + int.from_bytes(view[pos:start], 'big')
+    if end > len(view):
+        raise out_of_range(end, len(view))
+    return str(view[start:end], ENC)
+
+
+def fixed_bytes_reader(bytes_size):
+    def read(view, pos):
+        return bytes(view[pos:pos + bytes_size])
+    return read
+
+
+def sequence_reader(components):
+    # read the values of components (compiled types) encoded as a sequence at view[base:]
+    heads, head_size = [], 0
+    for read, dynamic, size in components:
+        heads.append((read, dynamic, head_size))
+        head_size += size
+
+    def read_sequence(view, base):
+        if base + head_size > len(view):
+            raise out_of_range(base + head_size, len(view))
+        return [
+            read(view, base + int.from_bytes(view[base + head:base + head + 32], 'big')) if dynamic else
+            read(view, base + head)
+            for read, dynamic, head in heads
+        ]
+    return read_sequence, head_size
+
+
+def array_reader(element, array_size):
+    read_element, dynamic, size = element
+    # the elements are read as a sequence of array_size (or the encoded length of) elements
+    step = 32 if dynamic else size
+
+    def read_elements(view, base, count):
+        if base + count * step > len(view):
+            raise out_of_range(base + count * step, len(view))
+        if dynamic:
+            return [
+                read_element(view, base + int.from_bytes(view[head:head + 32], 'big'))
+                for head in range(base, base + count * 32, 32)
+            ]
+        return [read_element(view, head) for head in range(base, base + count * size, size)]
+
+    if array_size is None:
+        def read(view, pos):
+            if pos + 32 > len(view):
+                raise out_of_range(pos + 32, len(view))
+            return read_elements(view, pos + 32, int.from_bytes(view[pos:pos + 32], 'big'))
+        return read, True, 32
+
+    def read(view, pos):
+        return read_elements(view, pos, array_size)
+    return read, dynamic, 32 if dynamic else array_size * size
+
+
+def split_components(tuple_type):
+    # the component types of "(t1,t2,...)"
+    components, depth, start = [], 0, 1
+    for idx in range(1, len(tuple_type) - 1):
+        char = tuple_type[idx]
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            components.append(tuple_type[start:idx])
+            start = idx + 1
+    if start < len(tuple_type) - 1:
+        components.append(tuple_type[start:len(tuple_type) - 1])
+    return components
+
+
+@lru_cache(maxsize=None)
+def compile_decoder_type(ret_type: str):
+    # return the compiled ret_type (read, dynamic, size) of the standard ABI decoding, supporting the
+    # elementary types, nested fixed and dynamic arrays and tuples "(t1,t2,...)"
+    if not isinstance(ret_type, str):
+        raise ValueError("ret_type description must be in string: " + str(type(ret_type)))
+    ret_type = ret_type.replace(' ', '')
+    if ret_type[-1:] == ']':  # Array
+        element_type, array_size = ret_type[:-1].rsplit('[', 1)
+        return array_reader(
+            compile_decoder_type(element_type), int(array_size) if array_size != "" else None
+        )
+    if ret_type[:1] == '(':  # Tuple
+        components = [compile_decoder_type(component) for component in split_components(ret_type)]
+        read_sequence, head_size = sequence_reader(components)
+        if any(dynamic for _, dynamic, _ in components):
+            return lambda view, pos: tuple(read_sequence(view, pos)), True, 32
+        return lambda view, pos: tuple(read_sequence(view, pos)), False, head_size
+    if ret_type == 'address':
+        return read_address, False, 32
+    elif ret_type == 'bool':
+        return read_bool, False, 32
+    elif ret_type == 'string':
+        return read_string, True, 32
+    elif ret_type == 'bytes':
+        return read_bytes, True, 32
+    elif ret_type == 'byte':
+        return fixed_bytes_reader(1), False, 32
+    elif ret_type[0:3] == 'int':
+        bits = type_size(ret_type, 3)
+        if bits is not None and ((bits & 7) != 0 or bits > 256 or bits <= 0):
+            raise SolidityTypeError("invalid given-datatype: " + ret_type)
+        return read_int, False, 32
+    elif ret_type[0:4] == 'uint':
+        bits = type_size(ret_type, 4)
+        if bits is not None and ((bits & 7) != 0 or bits > 256 or bits <= 0):
+            raise SolidityTypeError("invalid datatype: " + ret_type)
+        return read_word, False, 32
+    elif ret_type[0:5] == 'bytes':
+        bytes_size = type_size(ret_type, 5)
+        if bytes_size > 32 or bytes_size <= 0:
+            raise SolidityTypeError("invalid given-datatype " + ret_type)
+        return fixed_bytes_reader(bytes_size), False, 32
+    raise SolidityTypeError("unexpected or invalid given-datatype: " + ret_type)
+
+
+class AbiDecoderPlan(object):
+    # the compiled decoding of the return values of a list of types, see compile_decoder
+    __slots__ = ('types', 'read_sequence')
+
+    def __init__(self, rets_type_list):
+        self.types = rets_type_list
+        self.read_sequence, _ = sequence_reader([compile_decoder_type(ret_type) for ret_type in rets_type_list])
+
+    def decode(self, raw_rets) -> list:
+        # raw_rets: the returned bytes, or their hex string (with or without "0x"), e.g. the result of eth_call
+        if isinstance(raw_rets, str):
+            raw_rets = bytes.fromhex(raw_rets[2:] if raw_rets[1:2] == 'x' else raw_rets)
+        return self.read_sequence(memoryview(raw_rets), 0)
+
+
+@lru_cache(maxsize=1024)
+def compile_decoder(rets_type_list: tuple) -> AbiDecoderPlan:
+    return AbiDecoderPlan(rets_type_list)
@@ -0,0 +1,194 @@
+
+# python modules
+import asyncio
+import json
+import ssl
+from collections import deque
+from urllib.parse import urlsplit
+
+# uip modules
+from uiputils.errors import RPCError
+
+# eth modules
+from .http_pool import HTTPSessionPool, host_key
+from .jsonrpc import JsonRPC
+
+# config
+from uiputils.config import HTTP_HEADER, rpc_pool_maxsize
+
+# constant
+ENC = 'utf-8'
+
+
+class AsyncHTTPResponse(object):
+    def __init__(self, status_code, headers, body):
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+
+    @property
+    def text(self):
+        return self.body.decode(ENC, errors='replace')
+
+    def json(self):
+        return json.loads(self.body.decode(ENC))
+
+
+class AsyncHTTPConnectionPool(object):
+    # keep-alive HTTP/1.1 connections to one rpc host over asyncio streams
+    # at most max_connections requests are on the wire at the same time
+
+    def __init__(self, rpc_host, max_connections=rpc_pool_maxsize):
+        url = urlsplit(rpc_host)
+        self.host = url.hostname
+        self.port = url.port or (443 if url.scheme == 'https' else 80)
+        self.netloc = url.netloc
+        self.path = (url.path or '/') + ('?' + url.query if url.query else '')
+        self.ssl = ssl.create_default_context() if url.scheme == 'https' else None
+        self.limit = asyncio.Semaphore(max_connections)
+        self.idle = deque()
+
+    async def _connect(self, timeout):
+        while self.idle:
+            reader, writer = self.idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer
+            writer.close()
+        return await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=self.ssl),
+            timeout
+        )
+
+    async def post(self, data, headers=None, timeout=None):
+        connect_timeout, read_timeout = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        async with self.limit:
+            reader, writer = await self._connect(connect_timeout)
+            try:
+                response, keep_alive = await asyncio.wait_for(
+                    self._roundtrip(reader, writer, data, headers), read_timeout
+                )
+            except BaseException:
+                # timeout, cancellation or a broken connection: the stream state is unknown
+                writer.close()
+                raise
+            if keep_alive:
+                self.idle.append((reader, writer))
+            else:
+                writer.close()
+            return response
+
+    async def _roundtrip(self, reader, writer, data, headers):
+        body = data.encode(ENC)
+        head = ['POST ' + self.path + ' HTTP/1.1', 'Host: ' + self.netloc]
+        for key, value in (headers or {}).items():
+            head.append(key + ': ' + value)
+        head.append('Content-Length: ' + str(len(body)))
+        head.append('Connection: keep-alive')
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode(ENC) + body)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed by " + self.netloc)
+        status_code = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            key, _, value = line.decode(ENC).partition(':')
+            response_headers[key.strip().lower()] = value.strip()
+
+        keep_alive = response_headers.get('connection', '').lower() != 'close'
+        if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                chunk_size = int((await reader.readline()).split(b';')[0], 16)
+                if chunk_size == 0:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(chunk_size))
+                await reader.readline()
+            response_body = b''.join(chunks)
+        elif 'content-length' in response_headers:
+            response_body = await reader.readexactly(int(response_headers['content-length']))
+        else:
+            response_body = await reader.read()
+            keep_alive = False
+        return AsyncHTTPResponse(status_code, response_headers, response_body), keep_alive
+
+    def close(self):
+        while self.idle:
+            self.idle.pop()[1].close()
+
+
+class AsyncJsonRPC(JsonRPC):
+    # asyncio counterpart of JsonRPC: the builders are inherited, send/send_batch are awaitable
+    # the pools are bound to the event loop that first used them
+
+    def __init__(self, max_connections=rpc_pool_maxsize):
+        super().__init__()
+        self.max_connections = max_connections
+        self.pools = {}
+
+    def pool(self, rpc_host) -> AsyncHTTPConnectionPool:
+        key = host_key(rpc_host)
+        if key not in self.pools:
+            self.pools[key] = AsyncHTTPConnectionPool(rpc_host, self.max_connections)
+        return self.pools[key]
+
+    async def post(self, rpc_host, data, hed=HTTP_HEADER, timeout=None):
+        if timeout is None:
+            timeout = HTTPSessionPool.timeout(rpc_host)
+        return await self.pool(rpc_host).post(data, hed, timeout)
+
+    async def send(self, dat, hed=HTTP_HEADER, rpc_host='http://127.0.0.1:8545', timeout=None):
+        if JsonRPC.cache is not None:
+            cached = JsonRPC.cache.get(rpc_host, dat)
+            if cached is not None:
+                return cached
+        response = await self.post(rpc_host, json.dumps(dat), hed, timeout)
+        if response.status_code != 200:
+            raise RPCError(
+                "request failed with status " + str(response.status_code), response.text, response.status_code
+            )
+        result = response.json()
+        if 'error' in result:
+            raise RPCError(str(result), result)
+        if JsonRPC.cache is not None:
+            JsonRPC.cache.put(rpc_host, dat, result)
+        return result
+
+    async def send_batch(self, dats, hed=HTTP_HEADER, rpc_host='http://127.0.0.1:8545', timeout=None):
+        results, missed = JsonRPC.lookup_batch(dats, rpc_host)
+        if len(missed) == 0:
+            return results
+        missed_dats = [dats[idx] for idx in missed]
+        batch, index_of = JsonRPC.pack_batch(missed_dats)
+        response = await self.post(rpc_host, json.dumps(batch), hed, timeout)
+        if response.status_code != 200:
+            raise RPCError(
+                "batch request failed with status " + str(response.status_code), response.text, response.status_code
+            )
+        JsonRPC.merge_batch(
+            results, missed, rpc_host, missed_dats, JsonRPC.unpack_batch(missed_dats, index_of, response.json())
+        )
+        return results
+
+    def close(self):
+        for pool in self.pools.values():
+            pool.close()
+        self.pools.clear()
+
+
+if __name__ == '__main__':
+    RPC_HOST = 'http://127.0.0.1:8545'
+
+    async def sample():
+        rpc = AsyncJsonRPC()
+        heads = await asyncio.gather(*(rpc.send(rpc.eth_block_number(), rpc_host=RPC_HOST) for _ in range(8)))
+        print(heads)
+        print(await rpc.send_batch([rpc.eth_block_number(), rpc.net_version()], rpc_host=RPC_HOST))
+        rpc.close()
+
+    asyncio.get_event_loop().run_until_complete(sample())
@@ -0,0 +1,179 @@
+
+# python modules
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures, FIRST_COMPLETED
+
+# eth modules
+from .http_pool import HTTPSessionPool, host_key
+from .rpc_methods import is_write, account_of
+
+# config
+from uiputils.config import (
+    eth_blockchain_info,
+    tennsb_blockchain_info,
+    rpc_latency_ewma_alpha,
+    rpc_unhealthy_error_rate,
+    rpc_hedge_percentile
+)
+
+# constant
+#   count of the latency samples kept for the hedging percentile
+LATENCY_SAMPLES = 64
+#   seconds after the last failure that an unhealthy endpoint is given another chance
+UNHEALTHY_COOLDOWN = 30
+
+
+class Endpoint(object):
+    # an RPC endpoint with EWMA statistics of its latency (seconds) and error rate
+
+    def __init__(self, url):
+        self.url = url
+        self.latency = None
+        self.error_rate = 0.0
+        self.samples = deque(maxlen=LATENCY_SAMPLES)
+        self.failed_at = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, latency, ok):
+        with self.lock:
+            self.error_rate += rpc_latency_ewma_alpha * ((0.0 if ok else 1.0) - self.error_rate)
+            if not ok:
+                self.failed_at = time.time()
+            else:
+                self.samples.append(latency)
+                if self.latency is None:
+                    self.latency = latency
+                else:
+                    self.latency += rpc_latency_ewma_alpha * (latency - self.latency)
+
+    @property
+    def healthy(self):
+        return self.error_rate < rpc_unhealthy_error_rate or time.time() - self.failed_at > UNHEALTHY_COOLDOWN
+
+    @property
+    def score(self):
+        # lower is better, an endpoint never measured is tried first
+        if self.latency is None:
+            return 0.0
+        return self.latency * (1.0 + 4.0 * self.error_rate)
+
+    def percentile(self, pct):
+        with self.lock:
+            if len(self.samples) == 0:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def stats(self):
+        return {'url': self.url, 'latency': self.latency, 'error_rate': self.error_rate}
+
+
+class EndpointRouter(object):
+    # routes the requests of a chain to one of its registered endpoints
+    #   reads go to the fastest healthy endpoint (and are optionally hedged to the second one)
+    #   writes stay on one endpoint per account, so that nonces and unlocks stay consistent
+    # the chain is identified by its primary host, the one ChainDNS.gethost returns
+    _routes = {}
+    _sticky = {}
+    _lock = threading.Lock()
+    _hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='rpc-hedge')
+
+    hedge_percentile = rpc_hedge_percentile
+
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def register(primary_host, urls):
+        endpoints = [Endpoint(primary_host)]
+        endpoints.extend(Endpoint(url) for url in urls if url != primary_host)
+        with EndpointRouter._lock:
+            EndpointRouter._routes[host_key(primary_host)] = endpoints
+
+    @staticmethod
+    def endpoints(rpc_host):
+        return EndpointRouter._routes.get(host_key(rpc_host))
+
+    @staticmethod
+    def route(rpc_host, dat):
+        # return the endpoints to try in order, [] if rpc_host isn't a registered chain
+        endpoints = EndpointRouter.endpoints(rpc_host)
+        if endpoints is None:
+            return []
+        if is_write(dat):
+            sticky_key = (host_key(rpc_host), account_of(dat))
+            with EndpointRouter._lock:
+                endpoint = EndpointRouter._sticky.get(sticky_key)
+                if endpoint is None or not endpoint.healthy:
+                    endpoint = EndpointRouter._sticky[sticky_key] = EndpointRouter._rank(endpoints)[0]
+            return [endpoint]
+        return EndpointRouter._rank(endpoints)
+
+    @staticmethod
+    def _rank(endpoints):
+        # the healthy endpoints by score, then the unhealthy ones as the last resort
+        return sorted(endpoints, key=lambda endpoint: (not endpoint.healthy, endpoint.score))
+
+    @staticmethod
+    def post(rpc_host, data, dat, hed=None):
+        # post the serialized request data (of the request dict dat) to the chosen endpoint of rpc_host
+        ranked = EndpointRouter.route(rpc_host, dat)
+        if len(ranked) == 0:
+            return HTTPSessionPool.post(rpc_host, data, hed)
+        if is_write(dat):
+            return EndpointRouter._timed_post(ranked[0], data, hed)
+        if EndpointRouter.hedge_percentile is None or len(ranked) < 2:
+            # fail over to the next endpoint if one is unreachable
+            for endpoint in ranked[:-1]:
+                try:
+                    return EndpointRouter._timed_post(endpoint, data, hed)
+                except Exception:
+                    continue
+            return EndpointRouter._timed_post(ranked[-1], data, hed)
+
+        hedge_delay = ranked[0].percentile(EndpointRouter.hedge_percentile)
+        first = EndpointRouter._hedge_pool.submit(EndpointRouter._timed_post, ranked[0], data, hed)
+        if hedge_delay is None:
+            return first.result()
+        done, _ = wait_futures([first], timeout=hedge_delay)
+        if done:
+            return first.result()
+        # the first endpoint is slower than usual, race a second one
+        second = EndpointRouter._hedge_pool.submit(EndpointRouter._timed_post, ranked[1], data, hed)
+        done, pending = wait_futures([first, second], return_when=FIRST_COMPLETED)
+        winner = done.pop()
+        if winner.exception() is not None and pending:
+            return pending.pop().result()
+        return winner.result()
+
+    @staticmethod
+    def _timed_post(endpoint, data, hed):
+        start = time.time()
+        try:
+            response = HTTPSessionPool.post(endpoint.url, data, hed)
+        except Exception:
+            endpoint.record(time.time() - start, False)
+            raise
+        endpoint.record(time.time() - start, response.status_code == 200)
+        return response
+
+    @staticmethod
+    def stats(rpc_host=None):
+        if rpc_host is not None:
+            return [endpoint.stats() for endpoint in EndpointRouter.endpoints(rpc_host) or []]
+        return dict(
+            (key, [endpoint.stats() for endpoint in endpoints]) for key, endpoints in EndpointRouter._routes.items()
+        )
+
+
+def register_configured_endpoints():
+    # chains configured with extra 'hosts' in uiputils.config
+    for blockchain_info in (eth_blockchain_info, tennsb_blockchain_info):
+        for chain_info in blockchain_info.values():
+            if 'hosts' in chain_info:
+                EndpointRouter.register(chain_info['host'], chain_info['hosts'])
+
+
+register_configured_endpoints()
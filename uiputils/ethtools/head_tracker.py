@@ -0,0 +1,108 @@
+
+# python modules
+import random
+import threading
+import time
+from collections import deque
+
+# eth modules
+from .jsonrpc import JsonRPC
+
+# config
+from uiputils.config import (
+    receipt_poll_interval,
+    head_poll_min_interval,
+    head_poll_max_interval,
+    head_poll_jitter,
+    head_window_size
+)
+
+
+class HeadTracker(object):
+    # one tracker per chain host
+    # it estimates the block interval from the timestamps of recent headers, and tells
+    # the pollers when the next block is expected, so that they neither spin on a slow
+    # chain nor sleep through several blocks of a fast one
+    _trackers = {}
+    _lock = threading.Lock()
+
+    def __init__(self, rpc_host, window_size=head_window_size):
+        self.host = rpc_host
+        # (block number, block timestamp) of the recent heads
+        self.headers = deque(maxlen=window_size)
+        self.head = None
+        self.head_seen_at = None
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        # confirmation metrics, in seconds
+        self.confirmation_count = 0
+        self.confirmation_total = 0.0
+        self.confirmation_max = 0.0
+
+    @staticmethod
+    def of(rpc_host) -> 'HeadTracker':
+        tracker = HeadTracker._trackers.get(rpc_host)
+        if tracker is not None:
+            return tracker
+        with HeadTracker._lock:
+            if rpc_host not in HeadTracker._trackers:
+                HeadTracker._trackers[rpc_host] = HeadTracker(rpc_host)
+            return HeadTracker._trackers[rpc_host]
+
+    def poll_head(self):
+        # fetch the latest header, return the head number
+        header = JsonRPC.send(JsonRPC.eth_get_block_by_number("latest", False), rpc_host=self.host)['result']
+        number, timestamp = int(header['number'], 16), int(header['timestamp'], 16)
+        with self.lock:
+            if self.head is None or number > self.head:
+                self.head = number
+                self.head_seen_at = time.time()
+                self.headers.append((number, timestamp))
+                self.misses = 0
+            else:
+                self.misses += 1
+            return self.head
+
+    @property
+    def block_interval(self):
+        # the estimated seconds per block, None if not enough headers are seen
+        with self.lock:
+            return self._block_interval()
+
+    def _block_interval(self):
+        if len(self.headers) < 2:
+            return None
+        (first_number, first_time), (last_number, last_time) = self.headers[0], self.headers[-1]
+        return (last_time - first_time) / (last_number - first_number)
+
+    def next_delay(self):
+        # the seconds to sleep before the next poll
+        interval = self.block_interval
+        if interval is None:
+            delay = receipt_poll_interval
+        else:
+            expected_at = self.head_seen_at + interval
+            delay = expected_at - time.time()
+            if delay <= 0:
+                # the block is late, back off exponentially within one block interval
+                delay = min(head_poll_min_interval * (1 << min(self.misses, 16)), max(interval, head_poll_min_interval))
+        delay *= 1 + random.uniform(-head_poll_jitter, head_poll_jitter)
+        return min(max(delay, head_poll_min_interval), head_poll_max_interval)
+
+    def record_confirmation(self, waited):
+        # waited: the seconds from watching a transaction to getting its receipt
+        with self.lock:
+            self.confirmation_count += 1
+            self.confirmation_total += waited
+            self.confirmation_max = max(self.confirmation_max, waited)
+
+    def confirmation_stats(self):
+        with self.lock:
+            return {
+                'count': self.confirmation_count,
+                'total': self.confirmation_total,
+                'mean': self.confirmation_total / self.confirmation_count if self.confirmation_count else 0.0,
+                'max': self.confirmation_max,
+                'block_interval': self._block_interval()
+            }
@@ -0,0 +1,78 @@
+
+# python modules
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# config
+from uiputils.config import rpc_pool_maxsize, rpc_default_timeout, rpc_host_timeout
+
+
+def host_key(rpc_host):
+    # connections can be shared by every url on the same scheme://netloc
+    url = urlsplit(rpc_host)
+    return url.scheme + '://' + url.netloc
+
+
+class HTTPSessionPool(object):
+    # keep-alive http sessions shared by all JSON-RPC callers, one session per rpc host
+    _sessions = {}
+    _timeouts = dict((host_key(host), timeout) for host, timeout in rpc_host_timeout.items())
+    _lock = threading.Lock()
+
+    pool_maxsize = rpc_pool_maxsize
+    default_timeout = rpc_default_timeout
+
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def configure(pool_maxsize=None, default_timeout=None):
+        # only the sessions created after configuring are affected
+        if pool_maxsize is not None:
+            HTTPSessionPool.pool_maxsize = pool_maxsize
+        if default_timeout is not None:
+            HTTPSessionPool.default_timeout = default_timeout
+
+    @staticmethod
+    def set_timeout(rpc_host, timeout):
+        HTTPSessionPool._timeouts[host_key(rpc_host)] = timeout
+
+    @staticmethod
+    def timeout(rpc_host):
+        return HTTPSessionPool._timeouts.get(host_key(rpc_host), HTTPSessionPool.default_timeout)
+
+    @staticmethod
+    def session(rpc_host) -> requests.Session:
+        key = host_key(rpc_host)
+        session = HTTPSessionPool._sessions.get(key)
+        if session is not None:
+            return session
+        with HTTPSessionPool._lock:
+            if key not in HTTPSessionPool._sessions:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTPSessionPool.pool_maxsize)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                HTTPSessionPool._sessions[key] = session
+            return HTTPSessionPool._sessions[key]
+
+    @staticmethod
+    def post(rpc_host, data, headers=None, timeout=None):
+        if timeout is None:
+            timeout = HTTPSessionPool.timeout(rpc_host)
+        return HTTPSessionPool.session(rpc_host).post(rpc_host, headers=headers, data=data, timeout=timeout)
+
+    @staticmethod
+    def close(rpc_host=None):
+        with HTTPSessionPool._lock:
+            if rpc_host is None:
+                keys = list(HTTPSessionPool._sessions.keys())
+            else:
+                keys = [host_key(rpc_host)]
+            for key in keys:
+                session = HTTPSessionPool._sessions.pop(key, None)
+                if session is not None:
+                    session.close()
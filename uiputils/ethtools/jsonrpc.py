@@ -1,14 +1,43 @@
 
 # python modules
 import json
-import requests
+import itertools
+
+# ethereum modules
+from hexbytes import HexBytes
+from eth_hash.auto import keccak
+
+# uip modules
+from uiputils.errors import RPCError
+from uiputils.loggers import console_logger
+
+# eth modules
+from .rpc_cache import RPCCache
+from .rpc_methods import is_write, is_read, priority_of
+from .endpoint_router import EndpointRouter
+from .single_flight import SingleFlight
+from .rate_limiter import RateLimiter
+from .retry_policy import RetryPolicy
+from .http_pool import host_key
 
 # config
 from uiputils.config import HTTP_HEADER
 
+# global
+#   ids of the batched requests, unique in this process
+rpc_id_counter = itertools.count(1)
+
 
 class JsonRPC(object):
     # JSON-RPC methods
+
+    # the responses of immutable requests, set to None to disable caching
+    cache = RPCCache()
+    # the identical read requests in flight at the same time, set to None to disable coalescing
+    flights = SingleFlight()
+    # the retrying of the transient failures
+    retry = RetryPolicy()
+
     def __init__(self):
         pass
 
@@ -208,6 +237,19 @@ class JsonRPC(object):
             "id": 1
         }
 
+    @staticmethod
+    def eth_get_transaction_count(addr, tag="pending"):
+        # return the method of eth_getTransactionCount
+        # returns the number of transactions sent from an address, i.e. its next nonce
+        # tag: block id(known as the default block parameter)
+        # can be "latest","earliest","pending", or the interger block number
+        return {
+            "jsonrpc": "2.0",
+            "method": "eth_getTransactionCount",
+            "params": [addr, tag],
+            "id": 1
+        }
+
     @staticmethod
     def eth_get_transaction_receipt(transactionhash):
         # return the method of eth_getTransactionReceipt
@@ -355,13 +397,143 @@ class JsonRPC(object):
         }
 
     @staticmethod
-    def send(dat, hed=HTTP_HEADER, rpc_host='http://127.0.0.1:8545'):
-        response = requests.post(rpc_host, headers=hed, data=json.dumps(dat))
-        if response.status_code != 200 or 'error' in response.json():
-            print(json.dumps(dat))
-            raise Exception(response.json())
+    def send(dat, hed=HTTP_HEADER, rpc_host='http://127.0.0.1:8545', deadline=None):
+        # deadline: the seconds the request may take over its retries, rpc_retry_deadline if None
+        if JsonRPC.cache is not None:
+            cached = JsonRPC.cache.get(rpc_host, dat)
+            if cached is not None:
+                return cached
+        if JsonRPC.flights is not None and is_read(dat):
+            # share the outstanding request of the same method and params (the block tag included)
+            key = (host_key(rpc_host), dat.get('method'), json.dumps(dat.get('params', []), sort_keys=True))
+            return dict(JsonRPC.flights.do(key, JsonRPC._send, dat, hed, rpc_host, deadline), id=dat.get('id'))
+        return JsonRPC._send(dat, hed, rpc_host, deadline)
+
+    @staticmethod
+    def _send(dat, hed, rpc_host, deadline=None):
+        result = JsonRPC.retry.run([dat], JsonRPC._attempt, dat, hed, rpc_host, deadline=deadline)
+        if JsonRPC.cache is not None:
+            JsonRPC.cache.put(rpc_host, dat, result)
+        return result
+
+    @staticmethod
+    def _attempt(dat, hed, rpc_host):
+        # queue for a token of rpc_host, the writes are admitted ahead of the reads
+        RateLimiter.acquire(rpc_host, priority_of(dat))
+        # connections are kept alive in the pool of the endpoint chosen for rpc_host
+        response = EndpointRouter.post(rpc_host, json.dumps(dat), dat, hed)
+        if response.status_code == 429:
+            RateLimiter.throttle(rpc_host)
+            raise RPCError("request refused by " + rpc_host + " (too many requests)", response.text, 429)
+        if response.status_code != 200:
+            raise RPCError(
+                "request failed with status " + str(response.status_code), response.text, response.status_code
+            )
+        result = response.json()
+        if 'error' in result:
+            if JsonRPC.known_transaction(dat, result):
+                # an earlier attempt reached the node, the transaction is in its pool already
+                return {"jsonrpc": "2.0", "id": dat.get('id'), "result": JsonRPC.raw_transaction_hash(dat)}
+            # formatted only if the debug level is on
+            console_logger.debug('request failed: %s', dat)
+            raise RPCError(str(result), result)
+        return result
+
+    @staticmethod
+    def known_transaction(dat, result):
+        message = str(result['error'].get('message', '')) if isinstance(result['error'], dict) else ''
+        return dat.get('method') == 'eth_sendRawTransaction' and (
+            'known transaction' in message or 'already known' in message
+        )
+
+    @staticmethod
+    def raw_transaction_hash(dat):
+        return HexBytes(keccak(HexBytes(dat['params'][0]))).hex()
+
+    @staticmethod
+    def send_batch(dats, hed=HTTP_HEADER, rpc_host='http://127.0.0.1:8545', deadline=None):
+        # send the requests in one JSON-RPC 2.0 array and return the responses in the order of dats
+        # every request is re-numbered with a unique id, the responses are demultiplexed by the id
+        # a failed request results in a RPCError at its index, instead of failing the whole batch
+        # the cached requests are answered locally, only the others are sent
+        results, missed = JsonRPC.lookup_batch(dats, rpc_host)
+        if len(missed) == 0:
+            return results
+        missed_dats = [dats[idx] for idx in missed]
+        batch, index_of = JsonRPC.pack_batch(missed_dats)
+        responses = JsonRPC.retry.run(
+            missed_dats, JsonRPC._attempt_batch, missed_dats, json.dumps(batch), hed, rpc_host, deadline=deadline
+        )
+        JsonRPC.merge_batch(
+            results, missed, rpc_host, missed_dats, JsonRPC.unpack_batch(missed_dats, index_of, responses)
+        )
+        return results
+
+    @staticmethod
+    def _attempt_batch(dats, data, hed, rpc_host):
+        # a batch is admitted as one request of its most urgent priority
+        RateLimiter.acquire(rpc_host, min(priority_of(dat) for dat in dats))
+        # a batch containing any write is routed as a write
+        response = EndpointRouter.post(
+            rpc_host, data, next((dat for dat in dats if is_write(dat)), dats[0]), hed
+        )
+        if response.status_code == 429:
+            RateLimiter.throttle(rpc_host)
+        if response.status_code != 200:
+            raise RPCError(
+                "batch request failed with status " + str(response.status_code), response.text, response.status_code
+            )
         return response.json()
 
+    @staticmethod
+    def lookup_batch(dats, rpc_host):
+        # return the cached responses (None if missed) and the indexes of the missed requests
+        if JsonRPC.cache is None:
+            return [None] * len(dats), list(range(len(dats)))
+        results, missed = [], []
+        for idx, dat in enumerate(dats):
+            results.append(JsonRPC.cache.get(rpc_host, dat))
+            if results[-1] is None:
+                missed.append(idx)
+        return results, missed
+
+    @staticmethod
+    def merge_batch(results, missed, rpc_host, missed_dats, responses):
+        for idx, dat, resp in zip(missed, missed_dats, responses):
+            results[idx] = resp
+            if JsonRPC.cache is not None and not isinstance(resp, Exception):
+                JsonRPC.cache.put(rpc_host, dat, resp)
+
+    @staticmethod
+    def pack_batch(dats):
+        # return the re-numbered requests and the map from the new id to the index in dats
+        batch, index_of = [], {}
+        for idx, dat in enumerate(dats):
+            rpc_id = next(rpc_id_counter)
+            batch.append(dict(dat, id=rpc_id))
+            index_of[rpc_id] = idx
+        return batch, index_of
+
+    @staticmethod
+    def unpack_batch(dats, index_of, responses):
+        if not isinstance(responses, list):
+            # the node rejects the whole batch, or doesn't support batching
+            raise RPCError(str(responses), responses)
+
+        results = [None] * len(dats)
+        for resp in responses:
+            idx = index_of.get(resp.get('id'))
+            if idx is None:
+                continue
+            if 'error' in resp:
+                results[idx] = RPCError(str(resp['error']), resp)
+            else:
+                results[idx] = resp
+        for idx, resp in enumerate(results):
+            if resp is None:
+                results[idx] = RPCError("no response for request: " + json.dumps(dats[idx]))
+        return results
+
 
 if __name__ == '__main__':
     RPC_HOST = 'http://127.0.0.1:8545'
@@ -1,26 +1,51 @@
 
 # python modules
 import json
+import os
 
 
 class FileLoad(object):
     # simply load files
+
+    # path -> ((st_mtime_ns, st_size), loaded), the abi and bytecode files are loaded again only if they changed
+    _loaded = {}
+
     def __int__(self):
         pass
 
+    @staticmethod
+    def _load(path, loader):
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        cached = FileLoad._loaded.get(path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        loaded = loader(path)
+        FileLoad._loaded[path] = (version, loaded)
+        return loaded
+
+    @staticmethod
+    def _json(path):
+        with open(path, "r") as json_file:
+            return json.load(json_file)
+
+    @staticmethod
+    def _bytes(path):
+        with open(path, "rb") as bytes_file:
+            return bytes_file.read()
+
     @staticmethod
     def getabi(contract_abi):
+        # the parsed abi is shared by all the callers, it must not be modified
         if isinstance(contract_abi, str):
-            with open(contract_abi, "r") as abi_file:
-                return json.load(abi_file)
+            return FileLoad._load(contract_abi, FileLoad._json)
         else:
             return contract_abi
 
     @staticmethod
     def getbytecode(contract_bytecode):
         if isinstance(contract_bytecode, str):
-            with open(contract_bytecode, "rb") as bytecode_file:
-                return bytecode_file.read()
+            return FileLoad._load(contract_bytecode, FileLoad._bytes)
         else:
             return contract_bytecode
 
@@ -0,0 +1,86 @@
+
+# python modules
+import threading
+
+# ethereum modules
+import rlp
+from eth_hash.auto import keccak
+from eth_keyfile import extract_key_from_keyfile
+from eth_keys import KeyAPI
+
+# config
+from uiputils.config import ETHSIGN_HEADER
+
+# constant
+ENC = "utf-8"
+
+
+class LocalSigner(object):
+    # signs messages in-process with the key of an encrypted keystore file, the same way
+    # eth_sign does on the node: keccak(ETHSIGN_HEADER + len(msg) + msg), v in {27, 28}
+    # so the signatures are verified by SignatureVerifier.verify_by_raw_message as before
+    _signers = {}
+    _lock = threading.Lock()
+
+    def __init__(self, private_key):
+        self.private_key = KeyAPI.PrivateKey(private_key)
+        self.address = self.private_key.public_key.to_checksum_address()
+
+    @staticmethod
+    def load(keystore_path, password) -> 'LocalSigner':
+        # decrypting a keystore takes a while (scrypt), so each file is decrypted once
+        # keyed by the hash of the password too, a wrong password decrypts (and fails) as it would uncached
+        if isinstance(password, str):
+            password = password.encode(ENC)
+        key = (keystore_path, keccak(password))
+        signer = LocalSigner._signers.get(key)
+        if signer is not None:
+            return signer
+        with LocalSigner._lock:
+            if key not in LocalSigner._signers:
+                LocalSigner._signers[key] = LocalSigner(extract_key_from_keyfile(keystore_path, password))
+            return LocalSigner._signers[key]
+
+    def sign(self, msg):
+        # msg: the bytes (or the hex string of them) that would be sent to eth_sign
+        # return the signature in the hex string returned by eth_sign
+        if isinstance(msg, str):
+            if msg[0:2] == "0x":
+                msg = msg[2:]
+            msg = bytes.fromhex(msg)
+        signature = self.private_key.sign_msg(ETHSIGN_HEADER + bytes(str(len(msg)).encode(ENC)) + msg).to_bytes()
+        return '0x' + (signature[:64] + bytes([signature[64] + 27])).hex()
+
+    def sign_transaction(self, tx: dict, chain_id=None) -> bytes:
+        # return the raw (legacy) transaction for eth_sendRawTransaction
+        # tx: nonce, gasPrice, gas, to (None for creating a contract), value and data, the numbers in
+        #   int or hex string, to and data in hex string; signed for chain_id by EIP-155 if not None
+        fields = [
+            as_int(tx['nonce']),
+            as_int(tx['gasPrice']),
+            as_int(tx['gas']),
+            as_bytes(tx.get('to')),
+            as_int(tx.get('value', 0)),
+            as_bytes(tx.get('data')),
+        ]
+        if chain_id is None:
+            signature = self.private_key.sign_msg_hash(keccak(rlp.encode(fields)))
+            v = signature.v + 27
+        else:
+            signature = self.private_key.sign_msg_hash(keccak(rlp.encode(fields + [chain_id, 0, 0])))
+            v = signature.v + 35 + 2 * chain_id
+        return rlp.encode(fields + [v, signature.r, signature.s])
+
+
+def as_int(value) -> int:
+    if isinstance(value, str):
+        return int(value, 16)
+    return int(value or 0)
+
+
+def as_bytes(value) -> bytes:
+    if value is None:
+        return b''
+    if isinstance(value, str):
+        return bytes.fromhex(value[2:] if value[0:2] == "0x" else value)
+    return bytes(value)
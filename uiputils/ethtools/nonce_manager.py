@@ -0,0 +1,335 @@
+
+# python modules
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+# ethereum modules
+from hexbytes import HexBytes
+
+# uip modules
+from uiputils.errors import RPCError
+from uiputils.loggers import console_logger
+
+# eth modules
+from .jsonrpc import JsonRPC
+from .receipt_watcher import ReceiptWatcher
+
+# config
+from uiputils.config import (
+    eth_chain_id,
+    nonce_max_in_flight,
+    nonce_replace_after,
+    nonce_gas_price_bump
+)
+
+# constant
+#   the hashes of the confirmed transactions kept, so a replaced hash is still followed to its receipt
+CONFIRMED_KEPT = 4096
+#   the gas of the no-op (a transfer of nothing to self) that fills a released nonce
+FILLER_GAS = 21000
+#   the gas of a transaction that doesn't give it, as eth_sendTransaction of geth does
+DEFAULT_GAS = 90000
+#   the failed receipt queries of a transaction tolerated before it is given up
+RECEIPT_ERRORS_TOLERATED = 3
+#   the errors of a nonce already taken on the node
+TAKEN_NONCE_ERRORS = ('nonce too low', 'replacement transaction underpriced')
+
+
+class PendingTransaction(object):
+    # a transaction sent under a nonce, and the copies of it sent to replace it
+    __slots__ = ('tx', 'nonce', 'gas_price', 'tx_hash', 'hashes', 'sent_at', 'replaceable', 'receipt_errors', 'future')
+
+    def __init__(self, tx, nonce, gas_price):
+        self.tx = tx
+        self.nonce = nonce
+        self.gas_price = gas_price
+        self.tx_hash = None
+        self.hashes = []
+        self.sent_at = None
+        # False once the node reports the nonce taken, the sent copies are only waited for then
+        self.replaceable = True
+        self.receipt_errors = 0
+        # resolved with the receipt response of whichever copy is mined
+        self.future = Future()
+
+
+class NonceManager(object):
+    # sends the transactions of an account on a host by eth_sendRawTransaction, with the nonces assigned
+    # locally and the transactions signed in-process (LocalSigner): the next one is sent without waiting
+    # for the receipt of the previous one, up to max_in_flight unconfirmed at the same time
+    # a released nonce is filled with a no-op if later nonces are sent, a local nonce found too low is
+    # synchronized with the node, a transaction waited for longer than replace_after is resent with its
+    # gas price bumped
+
+    # (host, lower-cased address) -> manager
+    _managers = {}
+    _lock = threading.Lock()
+
+    def __init__(
+            self,
+            rpc_host,
+            signer,
+            chain_id=eth_chain_id,
+            max_in_flight=nonce_max_in_flight,
+            replace_after=nonce_replace_after,
+            gas_price_bump=nonce_gas_price_bump
+    ):
+        self.host = rpc_host
+        self.signer = signer
+        self.address = signer.address
+        self.chain_id = chain_id
+        self.replace_after = replace_after
+        self.gas_price_bump = gas_price_bump
+        self.slots = threading.BoundedSemaphore(max_in_flight)
+        self.lock = threading.Lock()
+        # the next nonce to assign, read from the node on the first send
+        self.next_nonce = None
+        self.gas_price = None
+        # nonce -> PendingTransaction, the unconfirmed ones
+        self.in_flight = {}
+        # hash of every copy sent -> PendingTransaction
+        self.by_hash = OrderedDict()
+        self.sent = 0
+        self.replaced = 0
+        self.filled = 0
+        self.resynced = 0
+
+    @staticmethod
+    def of(rpc_host, signer, **kwargs) -> 'NonceManager':
+        key = (rpc_host, signer.address.lower())
+        manager = NonceManager._managers.get(key)
+        if manager is not None:
+            return manager
+        with NonceManager._lock:
+            if key not in NonceManager._managers:
+                NonceManager._managers[key] = NonceManager(rpc_host, signer, **kwargs)
+            return NonceManager._managers[key]
+
+    @staticmethod
+    def get(rpc_host, address):
+        # the manager of the account, None if it isn't managed
+        if not isinstance(address, str):
+            return None
+        return NonceManager._managers.get((rpc_host, address.lower()))
+
+    @staticmethod
+    def send_transaction(rpc_host, tx: dict) -> str:
+        # send tx as eth_sendTransaction would, by the manager of tx['from'] if there is one
+        manager = NonceManager.get(rpc_host, tx.get('from'))
+        if manager is None:
+            return JsonRPC.send(JsonRPC.eth_send_transaction(tx), rpc_host=rpc_host)['result']
+        return manager.send(tx)
+
+    @staticmethod
+    def wait_receipt(rpc_host, tx_hash, timeout=None):
+        # the receipt response of tx_hash, following its replacements if it was sent by a manager
+        for (host, _), manager in list(NonceManager._managers.items()):
+            if host == rpc_host and HexBytes(tx_hash).hex() in manager.by_hash:
+                return manager.wait(tx_hash, timeout)
+        return ReceiptWatcher.of(rpc_host).wait(tx_hash, timeout)
+
+    def _chain_nonce(self):
+        return int(JsonRPC.send(
+            JsonRPC.eth_get_transaction_count(self.address, 'pending'), rpc_host=self.host
+        )['result'], 16)
+
+    def _gas_price(self):
+        if self.gas_price is None:
+            self.gas_price = int(JsonRPC.send(JsonRPC.eth_gas_price(), rpc_host=self.host)['result'], 16)
+        return self.gas_price
+
+    def send(self, tx: dict) -> str:
+        # assign the next nonce to tx, sign and send it, return its hash without waiting for the receipt
+        # tx: the object of eth_sendTransaction ('from' is the managed account)
+        self.slots.acquire()
+        try:
+            gas_price = tx.get('gasPrice')
+            gas_price = int(gas_price, 16) if isinstance(gas_price, str) else (gas_price or self._gas_price())
+            with self.lock:
+                if self.next_nonce is None:
+                    self.next_nonce = self._chain_nonce()
+                pending = PendingTransaction(tx, self.next_nonce, gas_price)
+                self.next_nonce += 1
+                self.in_flight[pending.nonce] = pending
+        except Exception:
+            self.slots.release()
+            raise
+        try:
+            self._send(pending)
+        except RPCError as e:
+            if not any(error in str(e) for error in TAKEN_NONCE_ERRORS):
+                self._release(pending)
+                raise
+            # the account has sent by other means, take the nonce of the node and send again
+            try:
+                self._resync(pending)
+                self._send(pending)
+            except Exception:
+                self._release(pending)
+                raise
+        except Exception:
+            self._release(pending)
+            raise
+        self.sent += 1
+        return pending.tx_hash
+
+    def _send(self, pending, gas_price=None):
+        # send pending at gas_price (its own if None), which is kept once the node accepts the copy
+        if gas_price is None:
+            gas_price = pending.gas_price
+        raw = self.signer.sign_transaction(dict(
+            pending.tx, nonce=pending.nonce, gasPrice=gas_price, gas=pending.tx.get('gas', DEFAULT_GAS)
+        ), self.chain_id)
+        tx_hash = HexBytes(JsonRPC.send(
+            JsonRPC.eth_send_raw_transaction('0x' + raw.hex()), rpc_host=self.host
+        )['result']).hex()
+        with self.lock:
+            pending.gas_price = gas_price
+            pending.tx_hash = tx_hash
+            pending.hashes.append(tx_hash)
+            pending.sent_at = time.time()
+            self.by_hash[tx_hash] = pending
+            while len(self.by_hash) > CONFIRMED_KEPT + len(self.in_flight):
+                self.by_hash.popitem(last=False)
+        self._watch(pending, tx_hash)
+
+    def _watch(self, pending, tx_hash):
+        ReceiptWatcher.of(self.host).watch(tx_hash).add_done_callback(
+            lambda done: self._receipt_done(pending, tx_hash, done)
+        )
+
+    def _receipt_done(self, pending, tx_hash, done):
+        # the receipt query of a copy is over: mined, unwatched (another copy was mined) or failed
+        if done.cancelled():
+            return
+        error = done.exception()
+        if error is None:
+            self._confirm(pending, done.result())
+            return
+        pending.receipt_errors += 1
+        if pending.receipt_errors < RECEIPT_ERRORS_TOLERATED:
+            # the query failed, not the transaction, ask for the receipt again
+            self._watch(pending, tx_hash)
+            return
+        self._abandon(pending, error)
+
+    def _resync(self, pending):
+        chain_nonce = self._chain_nonce()
+        with self.lock:
+            self.resynced += 1
+            del self.in_flight[pending.nonce]
+            pending.nonce = max(self.next_nonce, chain_nonce)
+            self.next_nonce = pending.nonce + 1
+            self.in_flight[pending.nonce] = pending
+        console_logger.warning('nonce of {0} on {1} was behind the node, resynchronized to {2}'.format(
+            self.address, self.host, pending.nonce
+        ))
+
+    def _release(self, pending):
+        # the transaction was refused, its nonce is given back (or filled if later nonces are taken)
+        with self.lock:
+            self.in_flight.pop(pending.nonce, None)
+            gap = pending.nonce != self.next_nonce - 1
+            if not gap:
+                self.next_nonce -= 1
+        self.slots.release()
+        if gap:
+            self._fill(pending.nonce)
+
+    def _fill(self, nonce):
+        # send a no-op under the nonce, the transactions of the later nonces are stuck until it is mined
+        filler = PendingTransaction(
+            {'from': self.address, 'to': self.address, 'value': 0, 'gas': FILLER_GAS}, nonce, self._gas_price()
+        )
+        self.slots.acquire()
+        with self.lock:
+            self.in_flight[nonce] = filler
+        try:
+            self._send(filler)
+            self.filled += 1
+        except Exception as e:
+            with self.lock:
+                self.in_flight.pop(nonce, None)
+                # read the nonce from the node again on the next send
+                self.next_nonce = None
+            self.slots.release()
+            console_logger.error('filling nonce {0} of {1} on {2} failed: {3}'.format(
+                nonce, self.address, self.host, e
+            ))
+
+    def _confirm(self, pending, response):
+        with self.lock:
+            if self.in_flight.get(pending.nonce) is not pending:
+                return
+            del self.in_flight[pending.nonce]
+        watcher = ReceiptWatcher.of(self.host)
+        mined = HexBytes(response['result']['transactionHash'])
+        for tx_hash in pending.hashes:
+            if HexBytes(tx_hash) != mined:
+                watcher.unwatch(tx_hash)
+        self.slots.release()
+        pending.future.set_result(response)
+
+    def _abandon(self, pending, error):
+        # the receipt can't be read, the slot is given back and the waiters get the error
+        # the nonce isn't reused, the node has accepted a transaction under it
+        with self.lock:
+            if self.in_flight.get(pending.nonce) is not pending:
+                return
+            del self.in_flight[pending.nonce]
+        watcher = ReceiptWatcher.of(self.host)
+        for tx_hash in pending.hashes:
+            watcher.unwatch(tx_hash)
+        self.slots.release()
+        console_logger.error('receipt of nonce {0} of {1} on {2} is unreadable: {3}'.format(
+            pending.nonce, self.address, self.host, error
+        ))
+        pending.future.set_exception(error)
+
+    def replace(self, pending):
+        # resend the transaction under the same nonce with a higher gas price
+        with self.lock:
+            if self.in_flight.get(pending.nonce) is not pending or not pending.replaceable:
+                return
+        try:
+            self._send(pending, int(pending.gas_price * self.gas_price_bump) + 1)
+            self.replaced += 1
+        except RPCError as e:
+            if any(error in str(e) for error in TAKEN_NONCE_ERRORS):
+                # a sent copy is mined (or pooled at a price this one can't beat), wait for it
+                pending.replaceable = False
+            # try again after another replace_after, at the price bumped from the kept one
+            pending.sent_at = time.time()
+            console_logger.warning('replacing nonce {0} of {1} failed: {2}'.format(pending.nonce, self.address, e))
+
+    def wait(self, tx_hash, timeout=None):
+        # the receipt response of the transaction of tx_hash (or of its replacement), None if timeout
+        pending = self.by_hash.get(HexBytes(tx_hash).hex())
+        if pending is None:
+            return ReceiptWatcher.of(self.host).wait(tx_hash, timeout)
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            if pending.replaceable:
+                wait_time = max(pending.sent_at + self.replace_after - time.time(), 0)
+                if deadline is not None:
+                    wait_time = min(wait_time, deadline - time.time())
+            else:
+                wait_time = None if deadline is None else deadline - time.time()
+            try:
+                return pending.future.result(None if wait_time is None else max(wait_time, 0))
+            except FutureTimeout:
+                if deadline is not None and time.time() >= deadline:
+                    return None
+                self.replace(pending)
+
+    def stats(self):
+        return {
+            'next_nonce': self.next_nonce,
+            'in_flight': len(self.in_flight),
+            'sent': self.sent,
+            'replaced': self.replaced,
+            'filled': self.filled,
+            'resynced': self.resynced
+        }
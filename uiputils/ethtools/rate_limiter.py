@@ -0,0 +1,145 @@
+
+# python modules
+import heapq
+import itertools
+import threading
+import time
+
+# eth modules
+from .http_pool import host_key
+from .rpc_methods import PRIORITY_READ
+
+# config
+from uiputils.config import (
+    rpc_default_rate_limit,
+    rpc_host_rate_limit,
+    rpc_backpressure_queue_depth,
+    rpc_backpressure_wait
+)
+
+
+class TokenBucket(object):
+    # a token bucket refilled with rate tokens per second, holding at most burst tokens
+    # the callers without a token queue up, and are admitted by priority (then by arrival)
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        # heap of (priority, arrival sequence, arrival time) of the queued callers
+        self.waiters = []
+        self.sequence = itertools.count()
+        self.cond = threading.Condition()
+
+        self.admitted = 0
+        self.waited_total = 0.0
+        self.waited_max = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self, priority=PRIORITY_READ):
+        # block until a token is taken, return the seconds waited
+        with self.cond:
+            start = time.monotonic()
+            ticket = (priority, next(self.sequence), start)
+            heapq.heappush(self.waiters, ticket)
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self.waiters[0] is ticket:
+                    if self.tokens >= 1:
+                        break
+                    # sleep until the next token, unless a caller of higher priority arrives
+                    self.cond.wait((1 - self.tokens) / self.rate)
+                else:
+                    self.cond.wait()
+            heapq.heappop(self.waiters)
+            self.tokens -= 1
+            waited = now - start
+            self.admitted += 1
+            self.waited_total += waited
+            self.waited_max = max(self.waited_max, waited)
+            # the next caller becomes the head of the queue
+            self.cond.notify_all()
+        return waited
+
+    def throttle(self, seconds=1.0):
+        # the host refused the traffic (429), admit nothing for about the given seconds
+        with self.cond:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, 0.0) - self.rate * seconds
+
+    def stats(self):
+        with self.cond:
+            return {
+                'queue_depth': len(self.waiters),
+                # the wait of the longest-queued caller now
+                'wait': time.monotonic() - min(waiter[2] for waiter in self.waiters) if self.waiters else 0.0,
+                'admitted': self.admitted,
+                'mean_wait': self.waited_total / self.admitted if self.admitted else 0.0,
+                'max_wait': self.waited_max
+            }
+
+
+class RateLimiter(object):
+    # per-host admission control of the JSON-RPC traffic
+    _buckets = {}
+    _limits = dict((host_key(host), limit) for host, limit in rpc_host_rate_limit.items())
+    _lock = threading.Lock()
+
+    default_limit = rpc_default_rate_limit
+
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def set_limit(rpc_host, rate, burst=None):
+        # rate: requests per second, None for not limiting rpc_host
+        key = host_key(rpc_host)
+        with RateLimiter._lock:
+            RateLimiter._limits[key] = None if rate is None else (rate, burst or rate)
+            RateLimiter._buckets.pop(key, None)
+
+    @staticmethod
+    def bucket(rpc_host):
+        # return the bucket of rpc_host, None if it isn't limited
+        key = host_key(rpc_host)
+        bucket = RateLimiter._buckets.get(key)
+        if bucket is not None:
+            return bucket
+        limit = RateLimiter._limits.get(key, RateLimiter.default_limit)
+        if limit is None:
+            return None
+        with RateLimiter._lock:
+            if key not in RateLimiter._buckets:
+                RateLimiter._buckets[key] = TokenBucket(*limit)
+            return RateLimiter._buckets[key]
+
+    @staticmethod
+    def acquire(rpc_host, priority=PRIORITY_READ):
+        bucket = RateLimiter.bucket(rpc_host)
+        if bucket is None:
+            return 0.0
+        return bucket.acquire(priority)
+
+    @staticmethod
+    def throttle(rpc_host, seconds=1.0):
+        bucket = RateLimiter.bucket(rpc_host)
+        if bucket is not None:
+            bucket.throttle(seconds)
+
+    @staticmethod
+    def stats(rpc_host):
+        bucket = RateLimiter.bucket(rpc_host)
+        if bucket is None:
+            return {'queue_depth': 0, 'wait': 0.0, 'admitted': 0, 'mean_wait': 0.0, 'max_wait': 0.0}
+        return bucket.stats()
+
+    @staticmethod
+    def overloaded(rpc_host):
+        # whether new work on rpc_host should be refused, to let the queued requests drain
+        stats = RateLimiter.stats(rpc_host)
+        return stats['queue_depth'] > rpc_backpressure_queue_depth or stats['wait'] > rpc_backpressure_wait
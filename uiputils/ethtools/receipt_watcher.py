@@ -0,0 +1,134 @@
+
+# python modules
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+# ethereum modules
+from hexbytes import HexBytes
+
+# uip modules
+from uiputils.loggers import console_logger
+
+# eth modules
+from .jsonrpc import JsonRPC
+from .head_tracker import HeadTracker
+
+
+class ReceiptWatcher(object):
+    # one watcher per chain host
+    # it follows the chain head, and fetches the receipts of all pending transactions
+    # with one batched request per new block, so the rpc load grows with the block rate
+    # instead of with the count of transactions in flight
+    # the polls are scheduled by the HeadTracker of the host
+    _watchers = {}
+    _lock = threading.Lock()
+
+    def __init__(self, rpc_host):
+        self.host = rpc_host
+        self.tracker = HeadTracker.of(rpc_host)
+        self.head = None
+        # tx_hash -> future of the eth_getTransactionReceipt response
+        self.pending = {}
+        # tx_hash -> the time it was watched
+        self.watched_at = {}
+        # hashes that have not been queried since they were watched
+        self.fresh = set()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    @staticmethod
+    def of(rpc_host) -> 'ReceiptWatcher':
+        watcher = ReceiptWatcher._watchers.get(rpc_host)
+        if watcher is not None:
+            return watcher
+        with ReceiptWatcher._lock:
+            if rpc_host not in ReceiptWatcher._watchers:
+                ReceiptWatcher._watchers[rpc_host] = ReceiptWatcher(rpc_host)
+            return ReceiptWatcher._watchers[rpc_host]
+
+    def watch(self, tx_hash, callback=None) -> Future:
+        # return a future resolved with the receipt response ({'result': receipt, ...}) of tx_hash
+        # callback(response) is called in the watcher thread when the receipt arrives
+        tx_hash = HexBytes(tx_hash).hex()
+        with self.lock:
+            future = self.pending.get(tx_hash)
+            if future is None:
+                future = self.pending[tx_hash] = Future()
+                self.watched_at[tx_hash] = time.time()
+                self.fresh.add(tx_hash)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='receipt-watcher', daemon=True)
+                self.thread.start()
+        if callback is not None:
+            def on_done(done):
+                if not done.cancelled() and done.exception() is None:
+                    callback(done.result())
+            future.add_done_callback(on_done)
+        return future
+
+    def wait(self, tx_hash, timeout=None):
+        # block until the receipt of tx_hash arrives, return None if timeout
+        try:
+            return self.watch(tx_hash).result(timeout)
+        except FutureTimeout:
+            return None
+
+    def unwatch(self, tx_hash):
+        tx_hash = HexBytes(tx_hash).hex()
+        with self.lock:
+            future = self.pending.pop(tx_hash, None)
+            self.watched_at.pop(tx_hash, None)
+            self.fresh.discard(tx_hash)
+        if future is not None:
+            future.cancel()
+
+    def _run(self):
+        while True:
+            with self.lock:
+                if len(self.pending) == 0:
+                    self.thread = None
+                    return
+            try:
+                self.poll()
+            except Exception as e:
+                # the node may be temporarily unreachable, try again in the next period
+                console_logger.info('receipt watcher({0}) polling failed: {1}'.format(self.host, e))
+            time.sleep(self.tracker.next_delay())
+
+    def poll(self):
+        head = self.tracker.poll_head()
+        with self.lock:
+            if head != self.head:
+                self.head = head
+                tx_hashes = list(self.pending.keys())
+            else:
+                tx_hashes = list(self.fresh)
+            self.fresh.clear()
+        if len(tx_hashes) == 0:
+            return
+
+        try:
+            responses = JsonRPC.send_batch(
+                [JsonRPC.eth_get_transaction_receipt(tx_hash) for tx_hash in tx_hashes],
+                rpc_host=self.host
+            )
+        except Exception:
+            # forget the head, so that every pending hash is queried in the next period
+            with self.lock:
+                self.head = None
+            raise
+        for tx_hash, response in zip(tx_hashes, responses):
+            if not isinstance(response, Exception) and response['result'] is None:
+                continue
+            with self.lock:
+                future = self.pending.pop(tx_hash, None)
+                watched_at = self.watched_at.pop(tx_hash, None)
+            if watched_at is not None:
+                self.tracker.record_confirmation(time.time() - watched_at)
+            if future is None or not future.set_running_or_notify_cancel():
+                continue
+            if isinstance(response, Exception):
+                future.set_exception(response)
+            else:
+                future.set_result(response)
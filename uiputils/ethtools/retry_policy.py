@@ -0,0 +1,90 @@
+
+# python modules
+import random
+import threading
+import time
+
+import requests
+
+# uip modules
+from uiputils.errors import RPCError
+from uiputils.loggers import console_logger
+
+# eth modules
+from .rpc_methods import is_idempotent
+
+# config
+from uiputils.config import (
+    rpc_retry_attempts,
+    rpc_retry_base_delay,
+    rpc_retry_max_delay,
+    rpc_retry_deadline
+)
+
+# constant
+#   http statuses of an overloaded or restarting node (or of the proxy in front of it)
+TRANSIENT_STATUS = (429, 500, 502, 503, 504)
+
+
+class RetryPolicy(object):
+    # retry the idempotent requests that failed for a transient reason, with exponential
+    # backoff and full jitter, until the attempts or the deadline of the call run out
+    # the errors reported by the node itself (the 'error' field) are never retried
+
+    def __init__(
+        self,
+        attempts=rpc_retry_attempts,
+        base_delay=rpc_retry_base_delay,
+        max_delay=rpc_retry_max_delay,
+        deadline=rpc_retry_deadline
+    ):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.lock = threading.Lock()
+        self.counts = {'calls': 0, 'retries': 0, 'give_ups': 0, 'unsafe': 0}
+
+    @staticmethod
+    def transient(error):
+        if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return True
+        return isinstance(error, RPCError) and error.status_code in TRANSIENT_STATUS
+
+    def backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * (1 << attempt)))
+
+    def _count(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+    def run(self, dats, function, *args, deadline=None):
+        # return function(*args), retried if every request of dats is idempotent
+        # deadline: the seconds this call may take, the default deadline of the policy if None
+        self._count('calls')
+        expire_at = time.time() + (self.deadline if deadline is None else deadline)
+        attempt = 0
+        while True:
+            try:
+                return function(*args)
+            except Exception as e:
+                if not RetryPolicy.transient(e):
+                    raise
+                if not all(is_idempotent(dat) for dat in dats):
+                    # e.g. an eth_sendTransaction without nonce may have been mined anyway
+                    self._count('unsafe')
+                    raise
+                attempt += 1
+                delay = self.backoff(attempt)
+                if attempt >= self.attempts or time.time() + delay > expire_at:
+                    self._count('give_ups')
+                    raise
+                self._count('retries')
+                console_logger.info('retrying {0} in {1:.2f}s (attempt {2}): {3}'.format(
+                    dats[0].get('method'), delay, attempt + 1, e
+                ))
+                time.sleep(delay)
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counts)
@@ -0,0 +1,114 @@
+
+# python modules
+import json
+import shelve
+import threading
+from collections import OrderedDict
+
+# eth modules
+from .http_pool import host_key
+
+# config
+from uiputils.config import rpc_cache_size, rpc_cache_spill_path
+
+# constant
+#   methods whose result never changes once it isn't null
+IMMUTABLE_BY_HASH = ('eth_getTransactionReceipt', 'eth_getBlockByHash', 'eth_getTransactionByHash')
+#   methods whose result is immutable at an explicit block, method -> index of the block tag in params
+IMMUTABLE_AT_BLOCK = {
+    'eth_getCode': 1,
+    'eth_getBalance': 1,
+    'eth_getStorageAt': 2,
+    'eth_getProof': 2,
+    'eth_call': 1
+}
+#   block tags that move with the chain head
+MUTABLE_TAGS = ('latest', 'pending')
+
+
+class RPCCache(object):
+    # bounded LRU of the JSON-RPC responses that never change once they exist
+    # the evicted responses are spilled to a shelve file, if spill_path is given
+
+    def __init__(self, capacity=rpc_cache_size, spill_path=rpc_cache_spill_path):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.spill = shelve.open(spill_path) if spill_path is not None else None
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(rpc_host, dat):
+        # return the cache key of the request, None if the request is not cacheable
+        method, params = dat.get('method'), dat.get('params', [])
+        if method in IMMUTABLE_AT_BLOCK:
+            tag_index = IMMUTABLE_AT_BLOCK[method]
+            if len(params) <= tag_index or params[tag_index] in MUTABLE_TAGS:
+                return None
+        elif method not in IMMUTABLE_BY_HASH:
+            return None
+        return host_key(rpc_host) + ' ' + method + ' ' + json.dumps(params, sort_keys=True)
+
+    @staticmethod
+    def cacheable(dat, response):
+        result = response.get('result')
+        if result is None:
+            # not mined, or not existing yet
+            return False
+        if dat['method'] == 'eth_getTransactionByHash':
+            return result.get('blockHash') is not None
+        return True
+
+    def get(self, rpc_host, dat):
+        key = RPCCache.key(rpc_host, dat)
+        if key is None:
+            return None
+        with self.lock:
+            response = self.entries.get(key)
+            if response is not None:
+                self.entries.move_to_end(key)
+            elif self.spill is not None and key in self.spill:
+                response = self.spill[key]
+                self._insert(key, response)
+            if response is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return dict(response, id=dat.get('id'))
+
+    def put(self, rpc_host, dat, response):
+        key = RPCCache.key(rpc_host, dat)
+        if key is None or not RPCCache.cacheable(dat, response):
+            return
+        with self.lock:
+            self._insert(key, response)
+
+    def _insert(self, key, response):
+        self.entries[key] = response
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            evicted_key, evicted = self.entries.popitem(last=False)
+            if self.spill is not None:
+                self.spill[evicted_key] = evicted
+
+    def stats(self):
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self.entries),
+                'spilled': len(self.spill) if self.spill is not None else 0
+            }
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            if self.spill is not None:
+                self.spill.clear()
+
+    def close(self):
+        with self.lock:
+            if self.spill is not None:
+                self.spill.close()
+                self.spill = None
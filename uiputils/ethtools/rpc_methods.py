@@ -0,0 +1,71 @@
+
+# the classification of JSON-RPC methods, shared by the routing, coalescing and retrying layers
+
+# constant
+#   methods that change the node state, or use the keystore (and nonce) of an account on the node
+WRITE_METHODS = (
+    'eth_sendTransaction',
+    'eth_sendRawTransaction',
+    'eth_sign',
+    'eth_getTransactionCount',
+    'personal_unlockAccount',
+    'personal_sendTransaction',
+    'personal_sign'
+)
+#   method -> index of the account in params
+ACCOUNT_INDEX = {
+    'eth_sign': 0,
+    'eth_getTransactionCount': 0,
+    'personal_unlockAccount': 0,
+    'personal_sign': 1
+}
+#   reads issued by the pollers that only follow the chain
+MONITOR_METHODS = (
+    'eth_blockNumber',
+    'eth_getBlockByNumber',
+    'eth_getTransactionReceipt'
+)
+
+# priority classes of the admission control, the lower is served first
+PRIORITY_WRITE = 0
+PRIORITY_READ = 1
+PRIORITY_MONITOR = 2
+
+
+def is_write(dat) -> bool:
+    return dat.get('method') in WRITE_METHODS
+
+
+def is_read(dat) -> bool:
+    return dat.get('method') not in WRITE_METHODS
+
+
+def is_idempotent(dat) -> bool:
+    # whether sending dat twice has the same effect as sending it once
+    method, params = dat.get('method'), dat.get('params', [])
+    if method in ('eth_sendTransaction', 'personal_sendTransaction'):
+        # without a nonce the node assigns a new one to every copy
+        return len(params) > 0 and isinstance(params[0], dict) and params[0].get('nonce') is not None
+    # a raw transaction carries its nonce, the other methods don't change the chain
+    return True
+
+
+def priority_of(dat) -> int:
+    method = dat.get('method')
+    if method in WRITE_METHODS:
+        return PRIORITY_WRITE
+    if method in MONITOR_METHODS:
+        return PRIORITY_MONITOR
+    return PRIORITY_READ
+
+
+def account_of(dat):
+    # return the (lower-cased) account a write request is bound to, None if unknown
+    method, params = dat.get('method'), dat.get('params', [])
+    if method in ('eth_sendTransaction', 'personal_sendTransaction'):
+        account = params[0].get('from') if len(params) > 0 and isinstance(params[0], dict) else None
+    elif method in ACCOUNT_INDEX and len(params) > ACCOUNT_INDEX[method]:
+        account = params[ACCOUNT_INDEX[method]]
+    else:
+        account = None
+    return account.lower() if isinstance(account, str) else None
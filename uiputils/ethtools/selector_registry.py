@@ -0,0 +1,132 @@
+
+# python modules
+from collections import namedtuple
+from functools import lru_cache
+
+# ethereum modules
+from eth_hash.auto import keccak
+
+# eth modules
+from .loadfile import FileLoad
+from .abi_covt import AbiEncoder, AbiDecoder
+
+# a function of the abi
+#   signature: "name(t1,t2,...)", selector: "0x" + the first 4 bytes of keccak(signature) in hex
+FunctionABI = namedtuple('FunctionABI', ('name', 'signature', 'selector', 'input_types', 'output_types'))
+
+
+@lru_cache(maxsize=4096)
+def function_selector(signature: str) -> str:
+    # "0x" + the selector of signature, hashed once for every signature
+    return '0x' + keccak(signature.encode('utf-8'))[0:4].hex()
+
+
+def abi_type(abi_param):
+    # the type of an input/output of the abi, "(t1,t2,...)" for a tuple
+    if abi_param['type'][:5] == 'tuple':
+        return '(' + ','.join(abi_type(component) for component in abi_param['components']) + ')' + \
+            abi_param['type'][5:]
+    return abi_param['type']
+
+
+class SelectorRegistry(object):
+    # the functions of an abi, indexed by their selectors (computed once when the abi is loaded),
+    # signatures and names; a name of overloaded functions is disambiguated by the number (or the
+    # types) of the arguments
+
+    # path of the abi file -> (the loaded abi, registry), rebuilt once FileLoad loads the changed file again
+    _loaded = {}
+
+    def __init__(self, contract_abi):
+        self.by_selector = {}
+        self.by_signature = {}
+        self.by_name = {}
+        # (name, number of arguments) -> (selector, compiled encoder, compiled decoder)
+        self.plans = {}
+        for entry in FileLoad.getabi(contract_abi) or ():
+            if entry.get('type', 'function') != 'function':
+                continue
+            input_types = tuple(abi_type(para) for para in entry.get('inputs', []))
+            signature = entry['name'] + '(' + ','.join(input_types) + ')'
+            function = FunctionABI(
+                entry['name'],
+                signature,
+                function_selector(signature),
+                input_types,
+                tuple(abi_type(ret) for ret in entry.get('outputs', []))
+            )
+            self.by_selector[function.selector] = function
+            self.by_signature[signature] = function
+            self.by_name.setdefault(function.name, []).append(function)
+
+    @staticmethod
+    def load(abi_dir):
+        # the registry of the abi file, loaded once
+        contract_abi = FileLoad.getabi(abi_dir)
+        loaded = SelectorRegistry._loaded.get(abi_dir)
+        if loaded is None or loaded[0] is not contract_abi:
+            loaded = SelectorRegistry._loaded[abi_dir] = (contract_abi, SelectorRegistry(contract_abi))
+        return loaded[1]
+
+    def function(self, name, args_number=None, input_types=None) -> FunctionABI:
+        # name: the function name, or its signature "name(t1,t2,...)"
+        if input_types is not None:
+            name = name + '(' + ','.join(input_types) + ')'
+        if name[-1:] == ')':
+            function = self.by_signature.get(name)
+            if function is None:
+                raise LookupError("no function " + name + " in the abi")
+            return function
+        overloads = self.by_name.get(name, ())
+        if args_number is not None:
+            overloads = [function for function in overloads if len(function.input_types) == args_number]
+        if len(overloads) == 1:
+            return overloads[0]
+        if len(overloads) == 0:
+            raise LookupError("no function " + name + (
+                "" if args_number is None else " of " + str(args_number) + " arguments"
+            ) + " in the abi")
+        raise LookupError(
+            "function " + name + " is overloaded, the candidates: " + ', '.join(f.signature for f in overloads)
+        )
+
+    def selector(self, name, args_number=None, input_types=None) -> str:
+        return self.function(name, args_number, input_types).selector
+
+    def plan(self, name, args_number):
+        # (selector, compiled encoder, compiled decoder) of calling the function with args_number arguments
+        plan = self.plans.get((name, args_number))
+        if plan is None:
+            function = self.function(name, args_number)
+            plan = self.plans[(name, args_number)] = (
+                function.selector,
+                AbiEncoder.compile(function.input_types),
+                AbiDecoder.compile(function.output_types)
+            )
+        return plan
+
+    def lookup(self, selector) -> FunctionABI:
+        # the function of a selector ("0x"-prefixed hex, or 4 bytes)
+        if not isinstance(selector, str):
+            selector = '0x' + bytes(selector).hex()
+        function = self.by_selector.get(selector.lower())
+        if function is None:
+            raise LookupError("unknown function selector " + selector)
+        return function
+
+    def encode_call(self, name, args, input_types=None) -> str:
+        # the calldata of calling the function with args
+        function = self.function(name, len(args), input_types)
+        return function.selector + AbiEncoder.compile(function.input_types).encode_hex(args)
+
+    def decode_call(self, calldata):
+        # (function, arguments) of an incoming calldata (bytes, or hex string with or without "0x")
+        if isinstance(calldata, str):
+            calldata = bytes.fromhex(calldata[2:] if calldata[1:2] == 'x' else calldata)
+        view = memoryview(calldata)
+        function = self.lookup(view[0:4])
+        return function, AbiDecoder.compile(function.input_types).decode(view[4:])
+
+    def __contains__(self, name_or_selector):
+        return name_or_selector in self.by_name or name_or_selector in self.by_signature or \
+            name_or_selector in self.by_selector
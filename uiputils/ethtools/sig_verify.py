@@ -15,21 +15,20 @@ ENC = "utf-8"
 
 
 class IdleSignature(bytes):
-    def __init__(self, sig):
-        super().__init__()
-        self.signature = sig
+    # the signature is the content of the bytes object itself, there is no per-instance __dict__
+    __slots__ = ()
 
     def bytes(self):
-        return self.signature
+        return bytes(self)
 
     def hex(self):
-        return self.signature.hex()
+        return bytes(self).hex()
 
     def to_hex(self):
-        return self.signature.hex()
+        return bytes(self).hex()
 
     def to_bytes(self):
-        return self.signature
+        return bytes(self)
 
 
 class SignatureVerifier:
@@ -0,0 +1,53 @@
+
+# python modules
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight(object):
+    # coalesce the concurrent calls of the same key into one execution
+    # the first caller (the leader) runs the function, the callers arriving while it is
+    # running wait for it and receive the same result, or the same exception
+
+    def __init__(self):
+        # key -> future of the running call
+        self.flights = {}
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key, function, *args, **kwargs):
+        with self.lock:
+            self.calls += 1
+            future = self.flights.get(key)
+            if future is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                future = self.flights[key] = Future()
+                leader = True
+        if not leader:
+            return future.result()
+
+        try:
+            result = function(*args, **kwargs)
+        except BaseException as e:
+            self._land(key)
+            future.set_exception(e)
+            raise
+        self._land(key)
+        future.set_result(result)
+        return result
+
+    def _land(self, key):
+        # new callers start a new flight from now on
+        with self.lock:
+            del self.flights[key]
+
+    def stats(self):
+        with self.lock:
+            return {
+                'calls': self.calls,
+                'coalesced': self.coalesced,
+                'in_flight': len(self.flights)
+            }
@@ -1,16 +1,24 @@
-
 # ethereum modules
 from web3 import Web3
 
 
 class ServiceStart(object):
     # simply start services
+
+    # host -> Web3, one provider (and its http session) for each host in the process
+    _web3s = {}
+
     def __int__(self):
         pass
 
     @staticmethod
     def startweb3(host):
         if isinstance(host, str):
-            return Web3(Web3.HTTPProvider(host, request_kwargs={'timeout': 10}))
+            web3 = ServiceStart._web3s.get(host)
+            if web3 is None:
+                web3 = ServiceStart._web3s.setdefault(
+                    host, Web3(Web3.HTTPProvider(host, request_kwargs={'timeout': 10}))
+                )
+            return web3
         else:
             return host
@@ -0,0 +1,81 @@
+
+# python modules
+import threading
+import time
+
+# uip modules
+from uiputils.errors import RPCError
+
+# eth modules
+from .http_pool import host_key
+from .jsonrpc import JsonRPC
+
+# config
+from uiputils.config import HTTP_HEADER, eth_unlock_duration, eth_unlock_renew_margin
+
+# constant
+#   messages of the node refusing an operation of a locked account
+LOCKED_MESSAGES = ('authentication needed', 'account is locked', 'locked account')
+
+
+class UnlockManager(object):
+    # remembers until when each (host, address) is unlocked, and sends personal_unlockAccount
+    # only when the unlock has lapsed, or is about to lapse within the renew margin
+    _expire_at = {}
+    _locks = {}
+    _lock = threading.Lock()
+
+    duration = eth_unlock_duration
+    renew_margin = eth_unlock_renew_margin
+
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def _key(rpc_host, address):
+        return host_key(rpc_host), address.lower()
+
+    @staticmethod
+    def _key_lock(key):
+        lock = UnlockManager._locks.get(key)
+        if lock is not None:
+            return lock
+        with UnlockManager._lock:
+            return UnlockManager._locks.setdefault(key, threading.Lock())
+
+    @staticmethod
+    def ensure(rpc_host, address, password):
+        # make sure the account is unlocked for at least the renew margin
+        key = UnlockManager._key(rpc_host, address)
+        if time.monotonic() < UnlockManager._expire_at.get(key, 0) - UnlockManager.renew_margin:
+            return
+        # one unlock per account at a time, the other threads wait for it instead of unlocking again
+        with UnlockManager._key_lock(key):
+            if time.monotonic() < UnlockManager._expire_at.get(key, 0) - UnlockManager.renew_margin:
+                return
+            duration = UnlockManager.duration
+            # the unlock is counted from before sending it
+            unlocked_at = time.monotonic()
+            response = JsonRPC.send(JsonRPC.personal_unlock_account(address, password, duration), HTTP_HEADER, rpc_host)
+            if not response['result']:
+                raise ValueError("unlock failed. wrong password?")
+            UnlockManager._expire_at[key] = unlocked_at + duration
+
+    @staticmethod
+    def invalidate(rpc_host, address):
+        # forget the unlock, e.g. the node was restarted or the account was locked by someone else
+        UnlockManager._expire_at.pop(UnlockManager._key(rpc_host, address), None)
+
+    @staticmethod
+    def run(rpc_host, address, password, function, *args, **kwargs):
+        # return function(*args, **kwargs) with the account unlocked
+        # if the node still reports the account locked, unlock it again and retry once
+        UnlockManager.ensure(rpc_host, address, password)
+        try:
+            return function(*args, **kwargs)
+        except RPCError as e:
+            if not any(message in str(e).lower() for message in LOCKED_MESSAGES):
+                raise
+        UnlockManager.invalidate(rpc_host, address)
+        UnlockManager.ensure(rpc_host, address, password)
+        return function(*args, **kwargs)
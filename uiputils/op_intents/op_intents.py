@@ -28,6 +28,14 @@ class OpIntent:
         'EOS': 'SYS',
         'Tendermint': 'iew',
     }
+    # every attribute an intent may have (host is set when its transactions are made), to_dict and
+    # from_dict convert from and to the {attribute: value} form that was the __dict__ of an intent
+    __slots__ = (
+        'op_type', 'owners', 'name',
+        'amount', 'src', 'dst', 'unit',
+        'invoker', 'contract_domain', 'func', 'parameters', 'parameters_description', 'code', 'address',
+        'host'
+    )
 
     def __init__(self, intent_json):
         self.op_type = ""
@@ -43,6 +51,17 @@ class OpIntent:
 
         getattr(self, self.op_type + 'Init')(intent_json)
 
+    def to_dict(self):
+        return dict((attr, getattr(self, attr)) for attr in OpIntent.__slots__ if hasattr(self, attr))
+
+    @staticmethod
+    def from_dict(value: dict):
+        # restore an intent from to_dict, without validating it again
+        op_intent = OpIntent.__new__(OpIntent)
+        for attr, field in value.items():
+            setattr(op_intent, attr, field)
+        return op_intent
+
     @staticmethod
     def createopintents(op_intents_json):
         op_intents, op_owners = [], set()
@@ -3,7 +3,6 @@
 import json
 
 # ethereum modules
-from eth_hash.auto import keccak
 from hexbytes import HexBytes
 
 # uip modules
@@ -11,7 +10,7 @@ from uiputils.errors import GenerationError
 from uiputils.chain_dns import ChainDNS
 
 # eth modules
-from uiputils.ethtools import hex_match, hex_match_withprefix
+from uiputils.ethtools import hex_match, hex_match_withprefix, function_selector
 
 # config
 from uiputils.config import (
@@ -24,10 +23,31 @@ MOD6 = (1 << 6) - 1
 
 
 class Transaction(object):
+    # the fields are kept in __slots__ (every subclass declares its own), to_dict and from_dict
+    # convert from and to the {field: value} form that was the __dict__ of a transaction,
+    # which is what purejson signs and the isc stores as the meta of a transaction
+    __slots__ = ('_host', '_trans_info')
+
     def __init__(self):
         self._host = ""
         self._trans_info = {}
 
+    def to_dict(self):
+        # the set fields, the ones of base classes first (in the order the former __dict__ had them)
+        return dict(
+            (slot, getattr(self, slot))
+            for cls in reversed(type(self).__mro__)
+            for slot in cls.__dict__.get('__slots__', ())
+            if hasattr(self, slot)
+        )
+
+    @classmethod
+    def from_dict(cls, value: dict):
+        transaction = cls.__new__(cls)
+        for slot, field in value.items():
+            setattr(transaction, slot, field)
+        return transaction
+
     def __str__(self):
         return 'chain_host: ' + str(self._host) +\
                '\ntransaction_intent: ' + str(self._trans_info)
@@ -68,10 +88,10 @@ class Transaction(object):
         self._trans_info = value
 
     def purejson(self):
-        return json.dumps(self.__dict__, sort_keys=True)
+        return json.dumps(self.to_dict(), sort_keys=True)
 
     def pretjson(self):
-        return json.dumps(self.__dict__, sort_keys=True, indent=4, separators=(', ', ': '))
+        return json.dumps(self.to_dict(), sort_keys=True, indent=4, separators=(', ', ': '))
 
     def make_intent(self):
         return {
@@ -83,11 +103,15 @@ class Transaction(object):
 
 
 class PaymentTransaction(Transaction):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__()
 
 
 class InvokeTransaction(Transaction):
+    __slots__ = ('_parameters_description',)
+
     def __init__(self):
         super().__init__()
         self._parameters_description = []
@@ -104,6 +128,8 @@ class InvokeTransaction(Transaction):
 
 
 class EthPaymentTransaction(PaymentTransaction):
+    __slots__ = ()
+
     def __init__(self, op_intent):
         super().__init__()
         self._host = op_intent.host
@@ -115,6 +141,8 @@ class EthPaymentTransaction(PaymentTransaction):
 
 
 class TenPaymentTransaction(PaymentTransaction):
+    __slots__ = ()
+
     def __init__(self, op_intent):
         super().__init__()
         self._host = op_intent.host
@@ -126,6 +154,8 @@ class TenPaymentTransaction(PaymentTransaction):
 
 
 class EthInvokeTransaction(InvokeTransaction):
+    __slots__ = ('signature',)
+
     def __init__(self, op_intent):
         super().__init__()
         self._host = op_intent.host
@@ -136,9 +166,9 @@ class EthInvokeTransaction(InvokeTransaction):
         elif len(op_intent.func) == 10 and hex_match_withprefix.match(op_intent.func):
             self.signature = op_intent.func[2:]
         elif op_intent.parameters_description is not None:
-            self.signature = HexBytes(keccak(bytes(
-                (op_intent.func + '(' + ','.join(op_intent.parameters_description) + ')').encode('utf-8')
-            ))[0:4]).hex()
+            self.signature = function_selector(
+                op_intent.func + '(' + ','.join(op_intent.parameters_description) + ')'
+            )[2:]
         else:  # function_parameters_description is None
             raise GenerationError('function-signatrue can\'t be generated')
 
@@ -151,6 +181,8 @@ class EthInvokeTransaction(InvokeTransaction):
 
 
 class TenInvokeTransaction(InvokeTransaction):
+    __slots__ = ()
+
     def __init__(self, op_intent):
         super().__init__()
         self._host = op_intent.host
@@ -240,10 +272,10 @@ if __name__ == '__main__':
 
     intent = OpIntent(intent_json)
 
-    print(formated_json(intent.__dict__))
+    print(formated_json(intent.to_dict()))
     tr: list = [*TransactionHelper.make_payment_trans(intent)]
 
-    print(*(t.__dict__ for t in tr))
+    print(*(t.to_dict() for t in tr))
     print(isinstance(tr[0], Transaction))
     print(isinstance(tr[1], Transaction))
     print(isinstance(tr[0], PaymentTransaction))
@@ -275,10 +307,10 @@ if __name__ == '__main__':
 
     intent = OpIntent(intent_json)
 
-    print(formated_json(intent.__dict__))
+    print(formated_json(intent.to_dict()))
     tr: list = [*TransactionHelper.make_invoke_trans(intent)]
 
-    print(*(t.__dict__ for t in tr))
+    print(*(t.to_dict() for t in tr))
     print(isinstance(tr[0], Transaction))
     print(isinstance(tr[0], PaymentTransaction))
     print(isinstance(tr[0], InvokeTransaction))
@@ -312,10 +344,10 @@ if __name__ == '__main__':
 
     intent = OpIntent(intent_json)
 
-    print(formated_json(intent.__dict__))
+    print(formated_json(intent.to_dict()))
     tr: list = [*TransactionHelper.make_invoke_trans(intent)]
 
-    print(*(t.__dict__ for t in tr))
+    print(*(t.to_dict() for t in tr))
     print(isinstance(tr[0], Transaction))
     print(isinstance(tr[0], PaymentTransaction))
     print(isinstance(tr[0], InvokeTransaction))
@@ -126,7 +126,7 @@ class TransactionIntents:
     def dictize(self):
         return {
             'intents': [
-                json.dumps(tx.__dict__, sort_keys=True, indent=4, separators=(', ', ': ')) for tx in self.intents],
+                json.dumps(tx.to_dict(), sort_keys=True, indent=4, separators=(', ', ': ')) for tx in self.intents],
             'dependencies': self._dependencies
         }
 
@@ -0,0 +1,181 @@
+
+# python modules
+import base64
+import json
+import threading
+from concurrent.futures import Future
+
+# ethereum modules
+from eth_hash.auto import keccak
+from hexbytes import HexBytes
+
+# uip modules
+from uiputils.errors import DecodeFail, VerificationError
+from uiputils.uiptypes import Attestation, InclusionProof
+from uiputils.uiptools.attestation_verifier import verify_signature
+from uiputils.transaction import StateType
+from uiputils.loggers import console_logger
+
+# config
+from uiputils.config import nsb_action_batch_window, nsb_action_batch_size
+
+# constant
+ENC = 'utf-8'
+#   domain separation of the leaves and the inner nodes, a leaf can't be passed off as a subtree
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+#   the action of a root is keyed by (window, ANCHOR_STATE), no attestation is in this state
+ANCHOR_STATE = StateType.unknown
+#   bytes of keccak(scope + root) taken as the window id, kept below 2 ** 63 for the int64 tid of the NSB
+WINDOW_ID_BYTES = 7
+
+
+def attestation_leaf(atte) -> bytes:
+    # the leaf of an attestation: what a single action would anchor, (pre_hash, the last signature)
+    if not isinstance(atte, Attestation):
+        atte = Attestation(atte)
+    return keccak(LEAF_PREFIX + atte.pre_hash + atte.signature(-1)[0].to_bytes())
+
+
+def node_hash(left, right):
+    return keccak(NODE_PREFIX + left + right)
+
+
+def merkle_tree(leaves: list) -> list:
+    # return the levels of the tree, from the leaves up to [root], an unpaired node is carried up as it is
+    if len(leaves) == 0:
+        raise ValueError("no leaves to build a Merkle tree on")
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [node_hash(level[idx], level[idx + 1]) for idx in range(0, len(level) - 1, 2)]
+        if len(level) % 2 == 1:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def merkle_path(levels: list, index: int) -> list:
+    # [(sibling hash, whether the sibling is on the right)] of the leaf at index
+    path = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            path.append((level[sibling], sibling > index))
+        index //= 2
+    return path
+
+
+def window_id(scope: bytes, root: bytes) -> int:
+    # the tid a root is anchored under: derived from the poster and the root, not from a counter,
+    # so the windows of different posters (or of a restarted process) don't overwrite each other
+    return int.from_bytes(keccak(scope + root)[:WINDOW_ID_BYTES], 'big')
+
+
+def anchored_root(response, window: int, poster: str) -> bytes:
+    # the root anchored in window by poster, read from the response of SystemAction.get_action
+    # the action is the one sent by SystemAction.add_action, the json of Action.dict() in the data of
+    # deliver_tx: '1' isc address, '2' tid, '3' aid, '4' type, '5' content, '6' signature (bytes in base64)
+    try:
+        action = json.loads(base64.b64decode(response['result']['deliver_tx']['data']).decode(ENC))
+        tid, aid = action['2'], action['3']
+        root, signature = base64.b64decode(action['5']), base64.b64decode(action['6'])
+    except (KeyError, TypeError, ValueError) as e:
+        raise DecodeFail("unexpected response of getAction, " + str(type(e)) + str(e))
+    if tid != window or aid != ANCHOR_STATE.value:
+        raise VerificationError("the NSB answered the action ({0}, {1}) for window {2}".format(tid, aid, window))
+    # the root is signed by the poster as send_anchor does (eth_sign of the root)
+    if not verify_signature(root, signature, poster)[0]:
+        raise VerificationError("the root anchored in window " + str(window) + " is not signed by " + poster)
+    return root
+
+
+def check_anchored(atte, proof: InclusionProof, response):
+    # raise VerificationError unless atte is included in proof.root, and proof.root is the root anchored
+    # in proof.window (the response of SystemAction.get_action) by the last signer of atte
+    if not isinstance(atte, Attestation):
+        atte = Attestation(atte)
+    poster = atte.signature(-1)[1]
+    if not verify_inclusion(attestation_leaf(atte), proof):
+        raise VerificationError("the attestation is not included in the root of the proof")
+    if proof.window != window_id(HexBytes(poster), proof.root):
+        raise VerificationError("window " + str(proof.window) + " is not the window of the root of " + poster)
+    if anchored_root(response, proof.window, poster) != proof.root:
+        raise VerificationError("the root of the proof is not the one anchored in window " + str(proof.window))
+
+
+def verify_inclusion(leaf: bytes, proof: InclusionProof) -> bool:
+    if leaf != proof.leaf:
+        return False
+    node = leaf
+    for sibling, on_right in proof.path:
+        node = node_hash(node, sibling) if on_right else node_hash(sibling, node)
+    return node == proof.root
+
+
+class ActionBatcher(object):
+    # collects the leaves of the attestations to be anchored on the NSB, the Merkle root of a window of
+    # them is posted as one action by post(root, window), window being the id derived from (scope, root)
+    # add returns a Future of the InclusionProof of the leaf, resolved once its window is anchored
+    # a window is closed after window seconds since its first leaf, or once it holds size leaves
+
+    def __init__(self, post, scope=b'', window=nsb_action_batch_window, size=nsb_action_batch_size):
+        self.post = post
+        # the poster of the roots (its address), which the window ids are derived with
+        self.scope = scope
+        self.window = window
+        self.size = size
+        self.lock = threading.Lock()
+        self.pending = []
+        self.timer = None
+        self.sequence = 0
+        self.anchored = 0
+
+    def add(self, leaf: bytes) -> Future:
+        future = Future()
+        with self.lock:
+            self.pending.append((leaf, future))
+            full = len(self.pending) >= self.size
+            if not full and self.timer is None:
+                self.timer = threading.Timer(self.window, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+        if full:
+            self.flush()
+        return future
+
+    def add_attestation(self, atte) -> Future:
+        return self.add(attestation_leaf(atte))
+
+    def flush(self):
+        # anchor the pending leaves now
+        with self.lock:
+            pending, self.pending = self.pending, []
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if len(pending) == 0:
+                return
+            self.sequence += 1
+
+        levels = merkle_tree([leaf for leaf, _ in pending])
+        root = levels[-1][0]
+        window = window_id(self.scope, root)
+        try:
+            self.post(root, window)
+        except Exception as e:
+            console_logger.error('anchoring window {0} of {1} attestations failed: {2}'.format(
+                window, len(pending), e
+            ))
+            for _, future in pending:
+                future.set_exception(e)
+            return
+        self.anchored += len(pending)
+        for index, (leaf, future) in enumerate(pending):
+            future.set_result(InclusionProof(root, leaf, index, merkle_path(levels, index), window))
+
+    def stats(self):
+        return {'windows': self.sequence, 'anchored': self.anchored, 'pending': len(self.pending)}
+
+    def close(self):
+        self.flush()
@@ -0,0 +1,111 @@
+
+# python modules
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import rlp
+
+# ethereum modules
+from eth_hash.auto import keccak
+
+# uip modules
+from uiputils.uiptypes import Attestation
+from uiputils.loggers import console_logger
+
+# eth modules
+from uiputils.ethtools import LocalSigner
+
+# constant
+#   batches smaller than this are signed in the calling thread, the pools don't pay off
+INLINE_BATCH_SIZE = 8
+
+# global
+#   the signer of a worker process
+process_signer = None
+
+
+def init_process_signer(private_key):
+    global process_signer
+    process_signer = LocalSigner(private_key)
+
+
+def process_sign(digest):
+    return process_signer.sign(digest)
+
+
+class AttestationSigner(object):
+    # signs attestations in bulk: the digests are computed first, the signatures are made in parallel
+    # signer: a LocalSigner (signed on a process pool), an object with .sign(bytes) such as a Tendermint
+    #   wallet, or a function of the hex digest such as VES.sign (both signed on a thread pool)
+    # the output is in the order of the input, last_timing holds the timing of the last batch
+
+    def __init__(self, signer, identification, workers=None):
+        self.signer = signer
+        self.identification = identification
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = None
+        self.last_timing = None
+
+    def _executor(self):
+        if self.executor is None:
+            if isinstance(self.signer, LocalSigner):
+                self.executor = ProcessPoolExecutor(
+                    self.workers, initializer=init_process_signer, initargs=(self.signer.private_key.to_bytes(),)
+                )
+            else:
+                self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix='atte-signer')
+        return self.executor
+
+    def _sign_one(self, digest):
+        if hasattr(self.signer, 'sign'):
+            return self.signer.sign(digest)
+        return self.signer('0x' + digest.hex())
+
+    def sign_digests(self, digests: list) -> list:
+        if len(digests) < INLINE_BATCH_SIZE:
+            return [self._sign_one(digest) for digest in digests]
+        if isinstance(self.signer, LocalSigner):
+            return list(self._executor().map(
+                process_sign, digests, chunksize=max(1, len(digests) // (self.workers * 4))
+            ))
+        return list(self._executor().map(self._sign_one, digests))
+
+    def _timed(self, digest_function, items):
+        begin = time.time()
+        digests = [digest_function(item) for item in items]
+        hashed = time.time()
+        signatures = self.sign_digests(digests)
+        signed = time.time()
+        self.last_timing = {
+            'count': len(items),
+            'hash': hashed - begin,
+            'sign': signed - hashed,
+            'total': signed - begin,
+            'per_second': len(items) / (signed - begin) if signed > begin else 0.0
+        }
+        console_logger.info('signed {count} attestations in {total:.3f}s (hash {hash:.3f}s, sign {sign:.3f}s)'.format(
+            **self.last_timing
+        ))
+        return signatures
+
+    def sign_contents(self, content_lists: list) -> list:
+        # create the attestations of the contents, return [Attestation]
+        signatures = self._timed(lambda content_list: keccak(rlp.encode([content_list, []])), content_lists)
+        return [
+            Attestation.create_attestation(content_list, [signature, self.identification])
+            for content_list, signature in zip(content_lists, signatures)
+        ]
+
+    def sign_attestations(self, attestations: list) -> list:
+        # append a signature to each attestation, return [rlp-encoded attestation]
+        signatures = self._timed(lambda atte: atte.hash, attestations)
+        return [
+            atte.sign_and_encode([signature, self.identification])
+            for atte, signature in zip(attestations, signatures)
+        ]
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
@@ -0,0 +1,233 @@
+
+# python modules
+import fcntl
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+
+# uip modules
+from uiputils.errors import InitializeError
+from uiputils.uiptypes import Attestation
+from uiputils.transaction import StateType
+from uiputils.loggers import console_logger
+
+# config
+from uiputils.config import attestation_store_dir, attestation_store_segment_size, attestation_store_commit_delay
+
+# constant
+#   record = header + rlp-encoded attestation
+#   header: magic, session_id, tid, state, length of the attestation, crc32 of the attestation
+RECORD_MAGIC = b'UIPA'
+RECORD_HEADER = struct.Struct('>4sQQBII')
+SEGMENT_NAME = re.compile(r'segment-(\d{8})\.log\Z')
+#   held (flock) by the store writing the directory, the index of a second writer would go stale
+LOCK_NAME = 'LOCK'
+
+
+def segment_name(number):
+    return 'segment-{0:08d}.log'.format(number)
+
+
+class AttestationStore(object):
+    # append-only store of rlp-encoded attestations, indexed by (session_id, tid, StateType)
+    # the records are appended to segment files, a new one is started once the current exceeds
+    # segment_size; the index is kept in memory and rebuilt from the segments on opening (a torn record
+    # at the tail of the last segment is truncated)
+    # put returns once the record is on disk, the writers waiting at the same time share one fsync
+    # (group commit); get returns the stored bytes as they are
+    # a directory is written by one store at a time, opening a directory in use raises InitializeError
+
+    def __init__(
+            self,
+            directory=attestation_store_dir,
+            segment_size=attestation_store_segment_size,
+            commit_delay=attestation_store_commit_delay
+    ):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.commit_delay = commit_delay
+        # segment number -> fd, every segment stays open for reading
+        self.segments = {}
+        self.current = None
+        self.current_size = 0
+        # session_id -> {(tid, state value): (segment number, offset of the attestation, length)}
+        self.index = {}
+
+        self.write_lock = threading.Lock()
+        self.sync_cond = threading.Condition()
+        self.written = 0
+        self.synced = 0
+        self.syncing = False
+        self.fsyncs = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self.lock_fd = os.open(os.path.join(directory, LOCK_NAME), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(self.lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(self.lock_fd)
+            raise InitializeError("attestation store " + directory + " is used by another store")
+        self._recover()
+
+    def _recover(self):
+        numbers = sorted(
+            int(matched.group(1)) for matched in map(SEGMENT_NAME.match, os.listdir(self.directory)) if matched
+        )
+        for number in numbers:
+            fd = os.open(os.path.join(self.directory, segment_name(number)), os.O_RDWR | os.O_APPEND)
+            self.segments[number] = fd
+            valid_size = self._scan(number, fd)
+            if valid_size != os.fstat(fd).st_size:
+                console_logger.warning('attestation store: segment {0} has a torn record at {1}, truncated'.format(
+                    number, valid_size
+                ))
+                os.ftruncate(fd, valid_size)
+                os.fsync(fd)
+            self.current, self.current_size = number, valid_size
+        if self.current is None:
+            self._open_segment(0)
+
+    def _scan(self, number, fd):
+        # index the records of the segment, return the size of its valid part
+        offset, size = 0, os.fstat(fd).st_size
+        while offset + RECORD_HEADER.size <= size:
+            magic, session_id, tid, state, length, crc = RECORD_HEADER.unpack(os.pread(fd, RECORD_HEADER.size, offset))
+            start = offset + RECORD_HEADER.size
+            if magic != RECORD_MAGIC or start + length > size or zlib.crc32(os.pread(fd, length, start)) != crc:
+                break
+            self.index.setdefault(session_id, {})[(tid, state)] = (number, start, length)
+            offset = start + length
+        return offset
+
+    def _open_segment(self, number):
+        fd = os.open(
+            os.path.join(self.directory, segment_name(number)), os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644
+        )
+        self.segments[number] = fd
+        self.current, self.current_size = number, 0
+        # make the new segment file itself durable
+        dir_fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    @staticmethod
+    def key_of(atte, session_id=None):
+        # (session_id, tid, state value) of an Attestation or its rlp bytes
+        # session_id: the session it is kept under, the SessionID of its content if None
+        if not isinstance(atte, Attestation):
+            atte = Attestation(atte)
+        content_session_id, tid, state = atte.index
+        return content_session_id if session_id is None else session_id, tid, state.value
+
+    def _append(self, session_id, tid, state, rlped_atte):
+        # write one record, return its sequence number; called with write_lock held
+        if self.current_size >= self.segment_size:
+            # the records of a sealed segment must be durable before the writes move on
+            os.fsync(self.segments[self.current])
+            self._open_segment(self.current + 1)
+        record = RECORD_HEADER.pack(
+            RECORD_MAGIC, session_id, tid, state, len(rlped_atte), zlib.crc32(rlped_atte)
+        ) + rlped_atte
+        os.write(self.segments[self.current], record)
+        start = self.current_size + RECORD_HEADER.size
+        self.current_size += len(record)
+        self.index.setdefault(session_id, {})[(tid, state)] = (self.current, start, len(rlped_atte))
+        self.written += 1
+        return self.written
+
+    def put(self, atte, sync=True, session_id=None):
+        # store an attestation (Attestation or rlp bytes) under the index of its content,
+        # in session_id instead of the SessionID of the content if given
+        return self.put_many([atte], sync, session_id)
+
+    def put_many(self, attestations, sync=True, session_id=None):
+        # store the attestations, all of them are made durable by one fsync
+        records = []
+        for atte in attestations:
+            rlped_atte = atte.encode() if isinstance(atte, Attestation) else bytes(atte)
+            records.append((AttestationStore.key_of(atte, session_id), rlped_atte))
+        with self.write_lock:
+            seq = 0
+            for (session_id, tid, state), rlped_atte in records:
+                seq = self._append(session_id, tid, state, rlped_atte)
+        if sync and seq:
+            self.sync(seq)
+        return len(records)
+
+    def sync(self, seq=None):
+        # wait until the records up to seq (all written records if None) are on disk
+        if seq is None:
+            seq = self.written
+        with self.sync_cond:
+            while self.synced < seq:
+                if self.syncing:
+                    # a commit is in progress, it may cover seq
+                    self.sync_cond.wait()
+                    continue
+                self.syncing = True
+                self.sync_cond.release()
+                try:
+                    if self.commit_delay:
+                        time.sleep(self.commit_delay)
+                    with self.write_lock:
+                        target, fd = self.written, self.segments[self.current]
+                    os.fsync(fd)
+                finally:
+                    self.sync_cond.acquire()
+                    self.syncing = False
+                    self.sync_cond.notify_all()
+                self.synced = max(self.synced, target)
+                self.fsyncs += 1
+
+    def location(self, session_id, tid, state):
+        if isinstance(state, StateType):
+            state = state.value
+        return self.index.get(session_id, {}).get((tid, state))
+
+    def get(self, session_id, tid, state):
+        # the rlp bytes of the attestation, None if it isn't stored
+        location = self.location(session_id, tid, state)
+        if location is None:
+            return None
+        number, start, length = location
+        return os.pread(self.segments[number], length, start)
+
+    def session(self, session_id):
+        # {(tid, StateType): rlp bytes} of the stored attestations of the session
+        return dict(
+            ((tid, StateType(state)), self.get(session_id, tid, state))
+            for tid, state in list(self.index.get(session_id, {}))
+        )
+
+    def __contains__(self, key):
+        return self.location(*key) is not None
+
+    def __len__(self):
+        return sum(len(session) for session in self.index.values())
+
+    def stats(self):
+        return {
+            'attestations': len(self),
+            'sessions': len(self.index),
+            'segments': len(self.segments),
+            'written': self.written,
+            'fsyncs': self.fsyncs
+        }
+
+    def close(self):
+        with self.write_lock:
+            if self.current is not None:
+                os.fsync(self.segments[self.current])
+            for fd in self.segments.values():
+                os.close(fd)
+            self.segments = {}
+            self.current = None
+            if self.lock_fd is not None:
+                # closing the file releases the flock
+                os.close(self.lock_fd)
+                self.lock_fd = None
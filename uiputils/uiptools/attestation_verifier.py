@@ -0,0 +1,163 @@
+
+# python modules
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# ethereum modules
+from eth_keys import KeyAPI
+from eth_utils import is_address as is_eth_address
+
+# ed25519 is only needed for the attestations signed on Tendermint
+try:
+    from nacl.signing import VerifyKey
+    from nacl.exceptions import BadSignatureError
+except ImportError:
+    VerifyKey = BadSignatureError = None
+
+# uip modules
+from uiputils.uiptypes import Attestation
+from uiputils.chain_dns import ChainDNS
+from uiputils.errors import VerificationError
+from uiputils.loggers import console_logger
+
+# config
+from uiputils.config import ETHSIGN_HEADER, attestation_require_ed25519
+
+# constant
+ENC = 'utf-8'
+#   batches with fewer signatures than this are verified in the calling process
+INLINE_BATCH_SIZE = 16
+
+
+def verify_signature(digest: bytes, sig: bytes, identification: str, pubkey: bytes = None):
+    # verify one signature of an attestation, made on digest by the address identification
+    # sig: 65-byte secp256k1 (v in {0, 1, 27, 28}) or 64-byte ed25519 signature
+    # pubkey: the known public key of the signer, recovered from the signature if None
+    # return (valid, the recovered public key if it wasn't known and the signature is valid)
+    if is_eth_address(identification):
+        if len(sig) != 65:
+            return False, None
+        if sig[64] >= 27:
+            sig = sig[:64] + bytes([sig[64] - 27])
+        signature = KeyAPI.Signature(sig)
+        msg = ETHSIGN_HEADER + bytes(str(len(digest)).encode(ENC)) + digest
+        if pubkey is not None:
+            return KeyAPI.PublicKey(pubkey).verify_msg(msg, signature), None
+        recovered = signature.recover_public_key_from_msg(msg)
+        if recovered.to_checksum_address().lower() != identification.lower():
+            return False, None
+        return True, recovered.to_bytes()
+
+    # Tendermint: the address is the ed25519 public key
+    if VerifyKey is None:
+        if attestation_require_ed25519:
+            raise VerificationError("PyNaCl is required to verify the ed25519 signature of " + identification)
+        console_logger.warning('PyNaCl is not installed, the ed25519 signature of {0} is not verified'.format(
+            identification
+        ))
+        return True, None
+    if pubkey is None:
+        pubkey = bytes.fromhex(identification[2:] if identification[0:2] == "0x" else identification)
+    try:
+        VerifyKey(pubkey).verify(digest, sig)
+    except (BadSignatureError, ValueError):
+        return False, None
+    return True, None
+
+
+def verify_signatures(jobs):
+    # jobs: [(digest, sig, identification, pubkey)], a chunk of work of a worker process
+    return [verify_signature(*job) for job in jobs]
+
+
+class AttestationVerifier(object):
+    # verifies every signature of attestations: the i-th is made on keccak(rlp.encode([Content, Signature[0...i-1]]))
+    # by the address identified with it (eth_sign convention for secp256k1, raw digest for ed25519)
+    # the public key of an address is taken from ChainDNS or learned from its first valid signature,
+    # the later signatures of the address are checked against it instead of recovered
+    _default = None
+    _lock = threading.Lock()
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.pubkeys = {}
+        self.lock = threading.Lock()
+        self.executor = None
+
+    @staticmethod
+    def default() -> 'AttestationVerifier':
+        if AttestationVerifier._default is None:
+            with AttestationVerifier._lock:
+                if AttestationVerifier._default is None:
+                    AttestationVerifier._default = AttestationVerifier()
+        return AttestationVerifier._default
+
+    def pubkey(self, address):
+        address = address.lower()
+        with self.lock:
+            if address in self.pubkeys:
+                return self.pubkeys[address]
+        pubkey = ChainDNS.getpubkey(address)
+        with self.lock:
+            self.pubkeys[address] = pubkey
+        return pubkey
+
+    def learn(self, address, pubkey):
+        with self.lock:
+            self.pubkeys[address.lower()] = pubkey
+
+    @staticmethod
+    def signed_digests(atte):
+        # return [(digest, sig, identification)] of the signatures of atte (Attestation, rlp bytes or list)
+        if not isinstance(atte, Attestation):
+            atte = Attestation(atte)
+        return [
+            (atte.prefix_hash(idx), sig.to_bytes(), addr)
+            for idx, (sig, addr) in enumerate(atte.signatures)
+        ]
+
+    def verify_batch(self, attestations: list) -> list:
+        # return [bool] in the order of attestations, an attestation is valid if all its signatures are
+        jobs, owners = [], []
+        valid = [True] * len(attestations)
+        for idx, atte in enumerate(attestations):
+            try:
+                signed = AttestationVerifier.signed_digests(atte)
+            except Exception:
+                valid[idx] = False
+                continue
+            if len(signed) == 0:
+                valid[idx] = False
+            for digest, sig, identification in signed:
+                jobs.append((digest, sig, identification, self.pubkey(identification)))
+                owners.append(idx)
+
+        for (_, _, identification, _), owner, (ok, recovered) in zip(jobs, owners, self._run(jobs)):
+            if not ok:
+                valid[owner] = False
+            elif recovered is not None:
+                self.learn(identification, recovered)
+        return valid
+
+    def _run(self, jobs):
+        if len(jobs) < INLINE_BATCH_SIZE:
+            return verify_signatures(jobs)
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(self.workers)
+        chunk_size = max(1, len(jobs) // (self.workers * 4))
+        chunks = [jobs[idx:idx + chunk_size] for idx in range(0, len(jobs), chunk_size)]
+        return [result for results in self.executor.map(verify_signatures, chunks) for result in results]
+
+    def verify(self, atte) -> bool:
+        return self.verify_batch([atte])[0]
+
+    def check(self, atte):
+        # raise VerificationError if any signature of atte is invalid
+        if not self.verify(atte):
+            raise VerificationError("wrong signature in attestation")
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
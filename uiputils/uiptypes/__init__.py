@@ -1,7 +1,7 @@
 
-from .merkleproof import MerkleProof
+from .merkleproof import MerkleProof, InclusionProof
 
 from .meta import *
 
-from .attestation import Attestation
+from .attestation import Attestation, SignaturePair
 
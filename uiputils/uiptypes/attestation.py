@@ -2,6 +2,7 @@
 # python modules
 import rlp
 import json
+from collections import namedtuple
 
 # ethereum modules
 from hexbytes import HexBytes
@@ -17,13 +18,24 @@ from uiputils.errors import DecodeFail, VerificationError
 from uiputils.ethtools import SignatureVerifier
 
 # config
-from uiputils.config import ETHSIGN_HEADER
+from uiputils.config import ETHSIGN_HEADER, attestation_content_format
+
+# rlp framing and the canonical encoding of the content
+from .canonical import list_prefix, item_span, list_items, canonical_encode, canonical_decode, is_canonical
 
 
 
 # constant
 ENC = 'utf-8'
 
+#   the formats of the on-chain transaction in Content
+CONTENT_FORMAT_JSON = 'json'
+CONTENT_FORMAT_BINARY = 'binary'
+
+# type
+#   [Signature, identification(str)], a tuple instead of a list: no per-pair list object to keep alive
+SignaturePair = namedtuple('SignaturePair', ('signature', 'identification'))
+
 
 class Attestation(object):
     """
@@ -36,6 +48,8 @@ class Attestation(object):
         ]
 
     Content = [executable_Transactoin(Bytes), State(Byte1), SessionID(Bytes), TransactionID(Bytes)]
+        executable_Transaction is either json.dumps(tilde_T, sort_keys=True) or the canonical encoding
+        (uiptypes/canonical.py), which is flagged by its first byte (CANONICAL_VERSION)
     Signature = (signature, identification)[], signature: Bytes65 = r: Bytes32, s: Bytes32, v: Byte1
 
     the difference between executable_Transaction and TransactionIntent is that:
@@ -51,37 +65,153 @@ class Attestation(object):
 
     on_chain Attestation: (hashed_Attestation, signature[i])
     """
+    # the attestations of a session are kept in bulk, there is no per-instance __dict__
+    __slots__ = (
+        'raw', 'encoded_content', 'encoded_signatures', 'signature_ends', 'prefix_hashes', '_content', '_signatures'
+    )
 
     def __init__(self, atte_list: bytes or list):
-        if isinstance(atte_list, bytes):
-            atte_list = rlp.decode(atte_list)
-        self.pre_hash = b"\x00"
-        self.content, self.signatures = self.recover_atte(atte_list)
-
-    def recover_atte(self, atte_list: list):
-        if len(atte_list) != 2:
+        # the attestation is a view over its rlp bytes, the fields are decoded on first access
+        if not isinstance(atte_list, bytes):
+            atte_list = rlp.encode(atte_list)
+        self.raw = atte_list
+        view = memoryview(atte_list)
+        start, end, is_list = item_span(view, 0, len(view))
+        if not is_list or end != len(view):
+            raise DecodeFail("the Attestation is not an rlp list")
+        items = list_items(view, start, end)
+        if len(items) != 2:
             raise ValueError(
                 "the format of Attestation must be [Content, Signature], but you give a length of " +
-                str(len(atte_list)) +
+                str(len(items)) +
                 " ?"
             )
-        # first right, then left (because of reference variable in python)
-        right_res = self.recover_signatures(atte_list)
-        left_res = Attestation.recover_content(atte_list[0])
-        return left_res, right_res
+        (content_offset, content_start, content_end, content_is_list), \
+            (_, signatures_start, signatures_end, signatures_is_list) = items
+        if not content_is_list or not signatures_is_list:
+            raise DecodeFail("the Content and the Signature of an Attestation must be lists")
+        content_count = len(list_items(view, content_start, content_end))
+        if content_count != 4:
+            raise ValueError(
+                "the format of Attestation must be [T, State, Sid, Tid], but you give a length of " +
+                str(content_count) +
+                " ?"
+            )
+
+        # the encoding is kept in pieces, so appending a signature doesn't re-encode the others:
+        #   rlp([Content, Signature]) = list_prefix + encoded_content + list_prefix + encoded_signatures
+        #   signature_ends[i]: the length of encoded_signatures[0...i-1]
+        #   prefix_hashes[i]: keccak(rlp.encode([Content, Signature[0...i-1]])), computed when needed
+        # the pieces are slices of raw until a signature is appended
+        signature_items = list_items(view, signatures_start, signatures_end)
+        self.encoded_content = view[content_offset:content_end]
+        self.encoded_signatures = view[signatures_start:signatures_end]
+        self.signature_ends = [0] + [item_end - signatures_start for _, _, item_end, _ in signature_items]
+        self.prefix_hashes = []
+        self._content = None
+        self._signatures = [None] * len(signature_items)
+
+        # a signature given in the hex string (e.g. returned by eth_sign) is encoded in its bytes,
+        # as the signers have signed on the encoding with the bytes
+        hex_signature = False
+        for _, pair_start, pair_end, _ in signature_items:
+            sig_start, sig_end, _ = item_span(view, pair_start, pair_end)
+            hex_signature = hex_signature or sig_end - sig_start > 65
+        if hex_signature:
+            signatures = self.signatures
+            self.encoded_signatures = bytearray()
+            self.signature_ends = [0]
+            self._signatures = []
+            self.raw = None
+            for signature_pair in signatures:
+                self.append_signature(signature_pair)
+
+    @property
+    def content(self):
+        if self._content is None:
+            self._content = Attestation.recover_content(rlp.decode(bytes(self.encoded_content)))
+        return self._content
+
+    @property
+    def signature_count(self):
+        return len(self._signatures)
+
+    def signature(self, idx):
+        # the idx-th SignaturePair(Signature, identification(str)), decoding only this one
+        if idx < 0:
+            idx += len(self._signatures)
+        if self._signatures[idx] is None:
+            try:
+                sig, addr = rlp.decode(bytes(
+                    self.encoded_signatures[self.signature_ends[idx]:self.signature_ends[idx + 1]]
+                ))
+                if len(sig) > 65:
+                    sig = sig.decode(ENC)
+                else:
+                    sig = HexBytes(sig).hex()
+                self._signatures[idx] = SignaturePair(SignatureVerifier.init_signature(sig), addr.decode(ENC))
+            except Exception as e:
+                raise DecodeFail("failed when recovering signatures, " + str(type(e)) + str(e))
+        return self._signatures[idx]
+
+    @property
+    def signatures(self):
+        return [self.signature(idx) for idx in range(len(self._signatures))]
+
+    @property
+    def pre_hash(self):
+        # the hash that the last signature is made on
+        if len(self._signatures) == 0:
+            return b"\x00"
+        return self.prefix_hash(len(self._signatures) - 1)
+
+    def append_signature(self, signature_pair):
+        # signature_pair: [Signature, identification(str)], it is kept as a SignaturePair
+        if not isinstance(self.encoded_signatures, bytearray):
+            self.encoded_signatures = bytearray(self.encoded_signatures)
+        self.encoded_signatures += rlp.encode([signature_pair[0].to_bytes(), signature_pair[1].encode(ENC)])
+        self.signature_ends.append(len(self.encoded_signatures))
+        self._signatures.append(SignaturePair(*signature_pair))
+        self.raw = None
+
+    def prefix_hash(self, count):
+        # keccak(rlp.encode([Content, Signature[0...count-1]])) without re-encoding anything
+        while len(self.prefix_hashes) <= count:
+            end = self.signature_ends[len(self.prefix_hashes)]
+            signatures_prefix = list_prefix(end)
+            self.prefix_hashes.append(keccak(b"".join((
+                list_prefix(len(self.encoded_content) + len(signatures_prefix) + end),
+                self.encoded_content,
+                signatures_prefix,
+                self.encoded_signatures[:end]
+            ))))
+        return self.prefix_hashes[count]
 
     def sign_and_encode(self, signature_pair):
         if not isinstance(signature_pair[0], Signature):
             signature_pair[0] = SignatureVerifier.init_signature(signature_pair[0])
-        self.pre_hash = self.hash
-        self.signatures.append(signature_pair)
+        self.append_signature(signature_pair)
         return self.encode()
 
     def encode(self):
-        return rlp.encode([
-            Attestation.encode_content(self.content),
-            Attestation.encode_signatures(self.signatures)
-        ])
+        # the decoded bytes are emitted as they are, until a signature is appended
+        if self.raw is not None:
+            return self.raw
+        signatures_prefix = list_prefix(len(self.encoded_signatures))
+        self.raw = b"".join((
+            list_prefix(len(self.encoded_content) + len(signatures_prefix) + len(self.encoded_signatures)),
+            self.encoded_content,
+            signatures_prefix,
+            self.encoded_signatures
+        ))
+        return self.raw
+
+    def to_dict(self):
+        # the readable form of the attestation, e.g. for logging
+        return {
+            'content': self.content,
+            'signatures': [[sig.to_hex(), addr] for sig, addr in self.signatures]
+        }
 
     @staticmethod
     def create_attestation(content_list: list, signature_pair: list):
@@ -96,7 +226,7 @@ class Attestation(object):
                 " ?"
             )
         try:
-            content_list[0] = json.loads(content_list[0].decode(ENC))
+            content_list[0] = Attestation.decode_transaction(content_list[0])
             content_list[1] = StateType(bytestoint(content_list[1]))
             content_list[2] = bytestoint(content_list[2])
             content_list[3] = bytestoint(content_list[3])
@@ -104,37 +234,51 @@ class Attestation(object):
             raise DecodeFail("failed when recovering content, " + str(type(e)) + str(e))
         return content_list
 
-    def recover_signatures(self, atte_list: list):
-        left_list, res_list = [], []
-        for sig, addr in atte_list[1]:
-            try:
-                rlped_data = rlp.encode([atte_list[0], left_list])
-                # print(sig, type(sig))
-                self.pre_hash = keccak(rlped_data)
-                left_list.append([sig, addr])
-                # print("here")
-                if len(sig) > 65:
-                    sig = sig.decode(ENC)
-                else:
-                    sig = HexBytes(sig).hex()
-                sig = SignatureVerifier.init_signature(sig)
-                addr = addr.decode(ENC)
-                res_list.append([sig, addr])
-            except Exception as e:
-                raise DecodeFail("failed when recovering signatures, " + str(type(e)) + str(e))
-            # if not SignatureVerifier.verify_by_raw_message(sig, self.pre_hash, addr):
-            #     raise VerificationError(
-            #         "wrong signature when verifying: " +
-            #         "\ncontent: " + HexBytes(rlped_data).hex() +
-            #         "\nsignature: " + sig.to_hex() +
-            #         "\naddress: " + addr
-            #     )
-        return res_list
+    @staticmethod
+    def encode_transaction(onchain_tx, content_format: str = None) -> bytes:
+        # executable_Transaction in content_format (attestation_content_format by default)
+        if content_format is None:
+            content_format = attestation_content_format
+        if content_format == CONTENT_FORMAT_BINARY:
+            return canonical_encode(onchain_tx)
+        if content_format == CONTENT_FORMAT_JSON:
+            return json.dumps(onchain_tx, sort_keys=True).encode(ENC)
+        raise ValueError("unknown content format: " + str(content_format))
+
+    @staticmethod
+    def decode_transaction(encoded_tx: bytes):
+        if is_canonical(encoded_tx):
+            return canonical_decode(encoded_tx)
+        return json.loads(encoded_tx.decode(ENC))
+
+    @property
+    def content_format(self):
+        # the format of executable_Transaction, told by its first byte without decoding the content
+        content_start, content_end, _ = item_span(self.encoded_content, 0, len(self.encoded_content))
+        tx_start, tx_end, _ = item_span(self.encoded_content, content_start, content_end)
+        if is_canonical(self.encoded_content[tx_start:tx_end]):
+            return CONTENT_FORMAT_BINARY
+        return CONTENT_FORMAT_JSON
+
+    @property
+    def index(self):
+        # (SessionID, TransactionID, State) read from Content, without decoding executable_Transaction
+        content_start, content_end, _ = item_span(self.encoded_content, 0, len(self.encoded_content))
+        _, (_, state_start, state_end, _), (_, sid_start, sid_end, _), (_, tid_start, tid_end, _) = \
+            list_items(self.encoded_content, content_start, content_end)
+        try:
+            return (
+                bytestoint(bytes(self.encoded_content[sid_start:sid_end])),
+                bytestoint(bytes(self.encoded_content[tid_start:tid_end])),
+                StateType(bytestoint(bytes(self.encoded_content[state_start:state_end])))
+            )
+        except Exception as e:
+            raise DecodeFail("failed when recovering the index of content, " + str(type(e)) + str(e))
 
     @staticmethod
-    def encode_content(content_list: list):
+    def encode_content(content_list: list, content_format: str = None):
         return [
-            json.dumps(content_list[0], sort_keys=True).encode('utf-8'),
+            Attestation.encode_transaction(content_list[0], content_format),
             HexBytes(hex(content_list[1].value)),
             HexBytes(hex(content_list[2])),
             HexBytes(hex(content_list[3]))
@@ -146,7 +290,7 @@ class Attestation(object):
 
     @property
     def hash(self):
-        return keccak(self.encode())
+        return self.prefix_hash(len(self._signatures))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,273 @@
+
+# python modules
+from functools import lru_cache
+
+# uip modules
+from uiputils.errors import DecodeFail
+
+# constant
+ENC = 'utf-8'
+#   the first byte of a canonically encoded value, a JSON text never starts with it
+CANONICAL_VERSION = b'\x01'
+
+# tags, the first byte of the payload of each encoded value
+TAG_STRING = b's'
+TAG_HEX = b'x'
+TAG_BYTES = b'b'
+TAG_POSITIVE = b'+'
+TAG_NEGATIVE = b'-'
+TAG_FLOAT = b'r'
+TAG_TRUE = b't'
+TAG_FALSE = b'f'
+TAG_NONE = b'n'
+TAG_LIST = b'l'
+TAG_DICT = b'd'
+
+
+# the headers of the strings and the lists shorter than 56 bytes
+SHORT_STRING_HEADERS = [bytes([0x80 + length]) for length in range(56)]
+SHORT_LIST_HEADERS = [bytes([0xc0 + length]) for length in range(56)]
+
+
+def list_prefix(length):
+    # the rlp header of a list whose payload is length bytes
+    if length < 56:
+        return SHORT_LIST_HEADERS[length]
+    length_bytes = length.to_bytes((length.bit_length() + 7) // 8, 'big')
+    return bytes([0xf7 + len(length_bytes)]) + length_bytes
+
+
+def string_item(payload):
+    # the rlp encoding of the byte string payload
+    length = len(payload)
+    if length == 1 and payload[0] < 0x80:
+        return payload
+    if length < 56:
+        return bytes([0x80 + length]) + payload
+    length_bytes = length.to_bytes((length.bit_length() + 7) // 8, 'big')
+    return bytes([0xb7 + len(length_bytes)]) + length_bytes + payload
+
+
+def item_span(data, offset, end):
+    # return (payload start, payload end, is list) of the rlp item at data[offset], within data[:end]
+    if offset >= end:
+        raise DecodeFail("rlp item out of range at " + str(offset))
+    prefix = data[offset]
+    if prefix < 0x80:
+        start, length, is_list = offset, 1, False
+    elif prefix < 0xb8:
+        start, length, is_list = offset + 1, prefix - 0x80, False
+    elif prefix < 0xc0:
+        start, is_list = offset + 1 + prefix - 0xb7, False
+        length = int.from_bytes(data[offset + 1:start], 'big')
+    elif prefix < 0xf8:
+        start, length, is_list = offset + 1, prefix - 0xc0, True
+    else:
+        start, is_list = offset + 1 + prefix - 0xf7, True
+        length = int.from_bytes(data[offset + 1:start], 'big')
+    if start + length > end:
+        raise DecodeFail("rlp item at " + str(offset) + " exceeds its list")
+    return start, start + length, is_list
+
+
+def list_items(data, start, end):
+    # return [(item offset, payload start, payload end, is list)] of the items of the list payload data[start:end]
+    items, offset = [], start
+    while offset < end:
+        payload_start, payload_end, is_list = item_span(data, offset, end)
+        items.append((offset, payload_start, payload_end, is_list))
+        offset = payload_end
+    return items
+
+
+def string_header(length):
+    if length < 56:
+        return SHORT_STRING_HEADERS[length]
+    length_bytes = length.to_bytes((length.bit_length() + 7) // 8, 'big')
+    return bytes([0xb7 + len(length_bytes)]) + length_bytes
+
+
+def tagged_item(tag, raw):
+    # the rlp string item of tag + raw, a lone tag (raw is empty) is a single byte < 0x80 and stands for itself
+    if not raw:
+        return tag
+    return string_header(len(raw) + 1) + tag + raw
+
+
+@lru_cache(maxsize=4096)
+def key_item(key):
+    # the dict keys repeat across the values, their items are encoded once
+    if type(key) is not str:
+        raise TypeError("keys must be str, not " + str(type(key)))
+    return string_item(key.encode(ENC))
+
+
+def encode_str(value):
+    # a lower-case hex string is encoded in its bytes, as long as it is decoded to the same string
+    if value[:2] == '0x' and value == value.lower():
+        try:
+            raw = bytes.fromhex(value[2:])
+        except ValueError:
+            raw = None
+        if raw is not None and len(value) == 2 + 2 * len(raw):
+            return tagged_item(TAG_HEX, raw)
+    return tagged_item(TAG_STRING, value.encode(ENC))
+
+
+def encode_int(value):
+    if value >= 0:
+        magnitude, tag = value, TAG_POSITIVE
+    else:
+        magnitude, tag = -value, TAG_NEGATIVE
+    return tagged_item(tag, magnitude.to_bytes((magnitude.bit_length() + 7) // 8, 'big'))
+
+
+def encode_dict(value):
+    pieces = [TAG_DICT]
+    for key in sorted(value):
+        pieces.append(key_item(key))
+        pieces.append(encode_value(value[key]))
+    payload = b"".join(pieces)
+    return list_prefix(len(payload)) + payload
+
+
+def encode_list(value):
+    payload = b"".join([TAG_LIST] + [encode_value(item) for item in value])
+    return list_prefix(len(payload)) + payload
+
+
+def encode_float(value):
+    return tagged_item(TAG_FLOAT, repr(value).encode(ENC))
+
+
+def encode_bytes(value):
+    return tagged_item(TAG_BYTES, bytes(value))
+
+
+ENCODERS = {
+    str: encode_str,
+    int: encode_int,
+    bool: lambda value: TAG_TRUE if value else TAG_FALSE,
+    type(None): lambda value: TAG_NONE,
+    dict: encode_dict,
+    list: encode_list,
+    tuple: encode_list,
+    float: encode_float,
+    bytes: encode_bytes,
+    bytearray: encode_bytes,
+}
+
+
+def encode_value(value) -> bytes:
+    # the canonical rlp encoding of a JSON-like value, every value is tagged with its type:
+    #   str: s + utf-8, or x + bytes for a lower-case hex string ("0x...")
+    #   int: + or - followed by the big-endian magnitude, bool: t/f, None: n, float: r + repr, bytes: b + bytes
+    #   list: [l, items...], dict: [d, key, value, key, value...] with the keys sorted
+    # a tag without payload (0, "", "0x", b"", bool, None) is the single tag byte, as rlp encodes the bytes
+    # below 0x80; equal values (json.dumps(..., sort_keys=True) equal) have the same encoding
+    encoder = ENCODERS.get(type(value))
+    if encoder is None:
+        # subclasses, e.g. HexBytes or an IntEnum
+        for value_type in (bool, str, int, dict, list, tuple, float, bytes, bytearray):
+            if isinstance(value, value_type):
+                encoder = ENCODERS[value_type]
+                break
+        else:
+            raise TypeError("Object of type " + type(value).__name__ + " is not canonically encodable")
+    return encoder(value)
+
+
+# the values of the single tag bytes, 0 is encoded as + only
+SINGLE_BYTE_VALUES = {
+    TAG_POSITIVE[0]: 0,
+    TAG_STRING[0]: '',
+    TAG_HEX[0]: '0x',
+    TAG_BYTES[0]: b'',
+    TAG_TRUE[0]: True,
+    TAG_FALSE[0]: False,
+    TAG_NONE[0]: None,
+}
+
+
+def decode_value(data, offset, end):
+    # return (the value encoded at data[offset], the offset after it)
+    # data: bytes, only the canonical items are accepted, so a value has a single encoding
+    if offset >= end:
+        raise DecodeFail("rlp item out of range at " + str(offset))
+    prefix = data[offset]
+    if prefix < 0x80:
+        # a tag without payload
+        if prefix not in SINGLE_BYTE_VALUES:
+            raise DecodeFail("unknown single-byte tag " + str(prefix) + " at " + str(offset))
+        return SINGLE_BYTE_VALUES[prefix], offset + 1
+    if prefix < 0xb8:
+        start, stop, is_list = offset + 1, offset + 1 + prefix - 0x80, False
+    elif 0xc0 <= prefix < 0xf8:
+        start, stop, is_list = offset + 1, offset + 1 + prefix - 0xc0, True
+    else:
+        start, stop, is_list = item_span(data, offset, end)
+        if stop - start < 56 or data[offset + 1] == 0:
+            raise DecodeFail("non-canonical length at " + str(offset))
+    if stop > end:
+        raise DecodeFail("rlp item at " + str(offset) + " exceeds its list")
+    if start == stop:
+        raise DecodeFail("untagged value at " + str(offset))
+    tag = data[start]
+    if is_list:
+        position = start + 1
+        if tag == TAG_DICT[0]:
+            items = {}
+            last_key = None
+            while position < stop:
+                key_start, key_stop, key_is_list = item_span(data, position, stop)
+                if key_is_list:
+                    raise DecodeFail("the key at " + str(position) + " is not a string")
+                key = str(data[key_start:key_stop], ENC)
+                if last_key is not None and key <= last_key:
+                    raise DecodeFail("the keys are not sorted at " + str(position))
+                items[key], position = decode_value(data, key_stop, stop)
+                last_key = key
+            return items, stop
+        if tag == TAG_LIST[0]:
+            items = []
+            while position < stop:
+                item, position = decode_value(data, position, stop)
+                items.append(item)
+            return items, stop
+        raise DecodeFail("unknown list tag " + str(tag))
+
+    if stop - start == 1:
+        raise DecodeFail("non-canonical tag item at " + str(offset))
+    if tag == TAG_STRING[0]:
+        return str(data[start + 1:stop], ENC), stop
+    if tag == TAG_HEX[0]:
+        return '0x' + data[start + 1:stop].hex(), stop
+    if tag == TAG_POSITIVE[0] or tag == TAG_NEGATIVE[0]:
+        if data[start + 1] == 0:
+            raise DecodeFail("leading zero of the integer at " + str(offset))
+        magnitude = int.from_bytes(data[start + 1:stop], 'big')
+        return (magnitude if tag == TAG_POSITIVE[0] else -magnitude), stop
+    if tag == TAG_FLOAT[0]:
+        return float(str(data[start + 1:stop], ENC)), stop
+    if tag == TAG_BYTES[0]:
+        return data[start + 1:stop], stop
+    raise DecodeFail("unknown tag " + str(tag) + " at " + str(offset))
+
+
+def canonical_encode(value) -> bytes:
+    # the versioned canonical encoding of value
+    return CANONICAL_VERSION + encode_value(value)
+
+
+def canonical_decode(data: bytes):
+    data = bytes(data)
+    if data[0:1] != CANONICAL_VERSION:
+        raise DecodeFail("not a canonical encoding of version " + str(CANONICAL_VERSION[0]))
+    value, end = decode_value(data, 1, len(data))
+    if end != len(data):
+        raise DecodeFail("trailing bytes after the canonical encoding")
+    return value
+
+
+def is_canonical(data) -> bool:
+    return data[0:1] == CANONICAL_VERSION
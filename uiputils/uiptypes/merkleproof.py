@@ -4,3 +4,8 @@ from collections import namedtuple
 
 
 MerkleProof = namedtuple('MerkleProof', 'blockaddr storagehash key value')
+
+# the inclusion of a leaf in a Merkle root anchored on the NSB
+#   path: [(sibling hash, whether the sibling is on the right)] from the leaf up to the root
+#   window: the sequence number of the batch the root was anchored by
+InclusionProof = namedtuple('InclusionProof', 'root leaf index path window')
@@ -1,9 +1,10 @@
 
 # python modules
+import os
 from random import randint
+from concurrent.futures import Future
 import rlp
 import logging.handlers
-import json
 
 # ethereum modules
 from hexbytes import HexBytes
@@ -16,12 +17,16 @@ from uiputils.transaction_intents import TransactionIntents
 from uiputils.chain_dns import ChainDNS
 import isc as isc_module
 from isc import TenInsuranceSmartContract as InsuranceSmartContract
-from uiputils.errors import Missing, VerificationError
+from uiputils.errors import Missing, Mismatch, VerificationError, BackpressureError
 from uiputils.uiptypes import Attestation
+from uiputils.uiptools.attestation_verifier import AttestationVerifier
+from uiputils.uiptools.attestation_signer import AttestationSigner
+from uiputils.uiptools.attestation_store import AttestationStore
+from uiputils.uiptools.action_batcher import ActionBatcher, ANCHOR_STATE, check_anchored
 from uiputils.contract.wrapped_contract_function import ContractFunctionClient
 
 # eth modules
-from uiputils.ethtools import JsonRPC
+from uiputils.ethtools import JsonRPC, RateLimiter, UnlockManager, LocalSigner, NonceManager, SignatureVerifier
 
 # nsb modules
 from py_nsbcli import Client
@@ -29,7 +34,9 @@ from py_nsbcli import Client
 from py_nsbcli.system_action import SystemAction, Action
 
 # config
-from uiputils.config import HTTP_HEADER, ves_log_dir, action_using_flag, alice
+from uiputils.config import (
+    HTTP_HEADER, ves_log_dir, action_using_flag, alice, nsb_action_batching, attestation_store_dir
+)
 from uiputils.loggers import  console_logger
 
 # constant
@@ -70,6 +77,15 @@ class VerifiableExecutionSystem:
         self.password = "123456"
         self.chain_host = "http://162.105.87.118:8545"
         self.domain = "Ethereum://chain3"
+        # signs by eth_sign on the node if None, see use_local_signer
+        self.signer = None
+        self.attestation_signer = None
+        # sends by eth_sendTransaction if None, see use_nonce_manager
+        self.nonce_manager = None
+        # opened on first use, see attestations
+        self.attestation_store = None
+        # used if nsb_action_batching
+        self.action_batcher = None
         ###########################################################
 
         self.nsb = Client("http://47.254.66.11:26657")
@@ -94,6 +110,12 @@ class VerifiableExecutionSystem:
     #     pass
 
     def session_setup_prepare(self, op_intents_json):
+        # refuse new sessions while the rpc requests of the running ones are queued up
+        if RateLimiter.overloaded(self.chain_host):
+            error = BackpressureError("rpc queue of " + self.chain_host + " is full, try again later")
+            self.debug("setupPrepareError {exec}".format(exec=error.error_info))
+            raise error
+
         session_id = 0
         while session_id in self.txs_pool:
             session_id = randint(0, 0xffffffff)
@@ -276,19 +298,11 @@ class VerifiableExecutionSystem:
 
         if testing:
             return
+        if self.nonce_manager is not None:
+            return self.pipeline_txinfo_to_isc(isc, tx_intents)
         for idx, tx_intent in enumerate(tx_intents.intents):
             console_logger.info('updating tx_info(index: {0}): {1}'.format(idx, tx_intent.jsonize()))
-            intent_json = dict(tx_intent.jsonize())
-
-            fr = "0x0000000000000000000000000000000000000000"
-            to = "0x0000000000000000000000000000000000000000"
-            amt = 0
-            if 'from' in intent_json:
-                fr = intent_json['from']
-            if 'to' in intent_json:
-                to = intent_json['to']
-            if 'value' in intent_json:
-                amt = int(intent_json['value'], 16)
+            fr, to, amt = VerifiableExecutionSystem.txinfo_of(tx_intent)
 
             update_lazyfunc = isc.update_tx_info(
                 idx,
@@ -296,7 +310,7 @@ class VerifiableExecutionSystem:
                 to=to,
                 seq=idx,
                 amt=amt,
-                meta=tx_intent.__dict__,
+                meta=tx_intent.to_dict(),
                 lazy=True
             )
             self.unlockself()
@@ -318,22 +332,81 @@ class VerifiableExecutionSystem:
             )
             # TODO: check isc-info updated
 
+    @staticmethod
+    def txinfo_of(tx_intent):
+        intent_json = dict(tx_intent.jsonize())
+        fr = intent_json.get('from', "0x0000000000000000000000000000000000000000")
+        to = intent_json.get('to', "0x0000000000000000000000000000000000000000")
+        amt = int(intent_json['value'], 16) if 'value' in intent_json else 0
+        return fr, to, amt
+
+    def pipeline_txinfo_to_isc(self, isc, tx_intents):
+        # send all the updates and freezes at once, the nonces keep them in order on the chain
+        lazy_funcs = []
+        for idx, tx_intent in enumerate(tx_intents.intents):
+            fr, to, amt = VerifiableExecutionSystem.txinfo_of(tx_intent)
+            lazy_funcs.append(isc.update_tx_info(
+                idx, fr=fr, to=to, seq=idx, amt=amt, meta=tx_intent.to_dict(), lazy=True
+            ))
+            lazy_funcs.append(isc.freeze_info(idx, lazy=True))
+        for lazy_func in lazy_funcs:
+            lazy_func.transact()
+        console_logger.info('isc({0}) sent {1} updates of information: {2}'.format(
+            isc.address, len(tx_intents.intents), self.nonce_manager.stats()
+        ))
+        for lazy_func in lazy_funcs:
+            console_logger.info('update response: {0}'.format(lazy_func.loop_and_wait()))
+        for idx in range(len(tx_intents.intents)):
+            console_logger.info(
+                'isc({0})updated information(index: {1}): {2}'.format(
+                    isc.address, idx, isc.get_transaction_info(idx)
+                )
+            )
+
     def unlockself(self, hostname=None):
-        unlock = JsonRPC.personal_unlock_account(self.address, self.password, 20)
-        response = JsonRPC.send(unlock, HTTP_HEADER, self.chain_host)
-        if not response['result']:
-            raise ValueError("unlock failed. wrong password?")
+        # only sends personal_unlockAccount if the last unlock is about to lapse
+        UnlockManager.ensure(self.chain_host, self.address, self.password)
+
+    def use_local_signer(self, keystore_path):
+        # sign in-process with the key of the keystore file, instead of by eth_sign
+        signer = LocalSigner.load(keystore_path, self.password)
+        if signer.address.lower() != self.address.lower():
+            raise Mismatch("keystore " + keystore_path + " is not of account " + self.address)
+        self.signer = signer
+        self.attestation_signer = None
+
+    def use_nonce_manager(self, **kwargs):
+        # send the transactions of the ves raw, signed by the local signer with the nonces assigned
+        # locally, so the updates of an isc are pipelined instead of waiting for each receipt
+        if self.signer is None:
+            raise Missing("a local signer is required to sign the raw transactions, see use_local_signer")
+        self.nonce_manager = NonceManager.of(self.chain_host, self.signer, **kwargs)
+        return self.nonce_manager
 
     def sign(self, msg):
-        self.unlockself()
+        if self.signer is not None:
+            return self.signer.sign(msg)
         sign_json = JsonRPC.eth_sign(self.address, msg)
-        return JsonRPC.send(sign_json, HTTP_HEADER, self.chain_host)['result']
+        return UnlockManager.run(
+            self.chain_host, self.address, self.password, JsonRPC.send, sign_json, HTTP_HEADER, self.chain_host
+        )['result']
 
     def watching(self, session_id):
         pass
 
+    def attestations(self) -> AttestationStore:
+        if self.attestation_store is None:
+            # one directory per VES account, the store holds it exclusively
+            self.attestation_store = AttestationStore(os.path.join(attestation_store_dir, self.address.lower()))
+        return self.attestation_store
+
     def add_attestation(self, session_id, atte):
-        pass
+        # atte: Attestation or its rlp bytes, kept under session_id and the (tid, state) of its content
+        self.attestations().put(atte, session_id=session_id)
+
+    def get_attestation(self, session_id, tid, state):
+        # the rlp bytes of the stored attestation, None if it isn't stored
+        return self.attestations().get(session_id, tid, state)
 
     def add_merkleproof(self, session_id, merk):
         pass
@@ -346,7 +419,8 @@ class VerifiableExecutionSystem:
         else:  # assuming be class dApp
             self.user_pool[users.name] = users
 
-    def receive(self, rlped_atte, session_id, tid, aid, host_name=None):
+    def receive(self, rlped_atte, session_id, tid, aid, host_name=None, proof=None):
+        # proof: the InclusionProof of the attestation, if it was anchored in a batch
         try:
             if session_id not in self.txs_pool:
                 raise KeyError("No such session_id" + str(session_id))
@@ -359,8 +433,16 @@ class VerifiableExecutionSystem:
             # )
             sys_act = SystemAction(self.nsb.host)
 
+            # every signature of the chain must be valid
+            AttestationVerifier.default().check(rlped_atte)
             atte = Attestation(rlped_atte)
-            print(sys_act.get_action(alice, bytes.fromhex("123456"), tid, aid))
+            if proof is not None:
+                check_anchored(atte, proof, sys_act.get_action(
+                    alice, bytes.fromhex("123456"), proof.window, ANCHOR_STATE.value
+                ))
+            else:
+                print(sys_act.get_action(alice, bytes.fromhex("123456"), tid, aid))
+            self.add_attestation(session_id, atte)
 
         except VerificationError as e:
             # TODO: stop ISC ?
@@ -369,28 +451,55 @@ class VerifiableExecutionSystem:
         return atte
 
     def sign_attestation(self, atte: Attestation):
-        return atte.sign_and_encode([
+        rlped_atte = atte.sign_and_encode([
             self.sign(HexBytes(atte.hash).hex()),
             self.address
         ])
+        # kept, so a restarted VES still has the attestations it signed
+        self.attestations().put(rlped_atte)
+        return rlped_atte
 
     def init_attestation(self, onchain_tx: dict, state: StateType, session_index: int, tx_index: int, host_name=None):
-        content_list = [
-            json.dumps(
-                onchain_tx,
-                sort_keys=True
-            ).encode(ENC),
-            HexBytes(state.value),
-            HexBytes(session_index),
-            HexBytes(tx_index)
-        ]
-        return Attestation.create_attestation(
+        content_list = VerifiableExecutionSystem.attestation_content(onchain_tx, state, session_index, tx_index)
+        atte = Attestation.create_attestation(
             content_list,
             [
                 self.sign(HexBytes(keccak(rlp.encode([content_list, []]))).hex()),
                 self.address
             ]
         )
+        self.attestations().put(atte, session_id=session_index)
+        return atte
+
+    @staticmethod
+    def attestation_content(onchain_tx: dict, state: StateType, session_index: int, tx_index: int):
+        return [
+            Attestation.encode_transaction(onchain_tx),
+            HexBytes(state.value),
+            HexBytes(session_index),
+            HexBytes(tx_index)
+        ]
+
+    def batch_signer(self) -> AttestationSigner:
+        # in-process signing runs on a process pool, eth_sign requests on a thread pool
+        if self.attestation_signer is None:
+            self.attestation_signer = AttestationSigner(self.signer or self.sign, self.address)
+        return self.attestation_signer
+
+    def init_attestations(self, attestation_args: list):
+        # attestation_args: [(onchain_tx, state, session_index, tx_index)], return [Attestation] in order
+        attes = self.batch_signer().sign_contents(
+            [VerifiableExecutionSystem.attestation_content(*args) for args in attestation_args]
+        )
+        # one fsync for the batch
+        self.attestations().put_many(attes)
+        return attes
+
+    def sign_attestations(self, attes: list):
+        # the batched sign_attestation, return [rlp-encoded attestation] in order
+        rlped_attes = self.batch_signer().sign_attestations(attes)
+        self.attestations().put_many(rlped_attes)
+        return rlped_attes
 
     def send_attestation(
             self,
@@ -398,7 +507,9 @@ class VerifiableExecutionSystem:
             atte: Attestation,
             tx_index, state: StateType,
             host_name=None
-    ) -> ContractFunctionClient:
+    ) -> Future:
+        # return a Future of the InclusionProof of atte if the attestations are anchored in batches,
+        # of None if atte is added as an action of its own
 
         console_logger.info(
             'ves ({0}) adding atte[\n'
@@ -407,16 +518,22 @@ class VerifiableExecutionSystem:
             '    atte: ({4}, {5})\n'
             ']'.format(
                 self.address, self.txs_pool[session_index]['isc_addr'], tx_index, state.value,
-                HexBytes(atte.pre_hash).hex(), atte.signatures[-1][0].to_hex()
+                HexBytes(atte.pre_hash).hex(), atte.signature(-1)[0].to_hex()
             )
         )
 
+        if nsb_action_batching:
+            # resolved to the InclusionProof of atte once its window is anchored
+            return self.anchor_batcher().add_attestation(atte)
         sys_act = SystemAction(self.nsb.host)
         sys_act.add_action(alice, Action(
             bytes.fromhex("123456"), tx_index, state.value,
             action_using_flag["Tendermint"].value, HexBytes(atte.pre_hash),
-            atte.signatures[-1][0].bytes()
+            atte.signature(-1)[0].bytes()
         ))
+        added = Future()
+        added.set_result(None)
+        return added
 
         # return self.nsb.add_action_proposal(
         #     self.txs_pool[session_index]['isc_addr'],
@@ -426,6 +543,23 @@ class VerifiableExecutionSystem:
         #     atte.signatures[-1][0].to_hex()
         # )
 
+    def anchor_batcher(self) -> ActionBatcher:
+        if self.action_batcher is None:
+            self.action_batcher = ActionBatcher(self.send_anchor, HexBytes(self.address))
+        return self.action_batcher
+
+    def send_anchor(self, root: bytes, window: int):
+        # one action for the Merkle root of a window of attestations
+        console_logger.info('ves ({0}) anchoring window {1}, root: {2}'.format(
+            self.address, window, HexBytes(root).hex()
+        ))
+        sys_act = SystemAction(self.nsb.host)
+        sys_act.add_action(alice, Action(
+            bytes.fromhex("123456"), window, ANCHOR_STATE.value,
+            action_using_flag["Tendermint"].value, root,
+            SignatureVerifier.init_signature(self.sign(HexBytes(root).hex())).bytes()
+        ))
+
     def debug(self, msg):
         VerifiableExecutionSystem.VesLog.logger.debug(msg, extra={'vesaddr': self.address})
 